@@ -0,0 +1,254 @@
+# rally_racer_project/benchmark.py
+# This file replays fixed, seeded scenarios with scripted inputs through the real simulation and
+# drawing code (on SDL's dummy video/audio drivers) and reports ms/frame per phase and overall
+# throughput. Results can be saved as a JSON baseline and compared against a later run.
+#
+# Example:
+#   python benchmark.py --out baseline.json
+#   python benchmark.py --baseline baseline.json --threshold 0.15
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+import numpy as np
+
+import constants as const
+import rng
+from utils import angle_difference, clamp
+from course_generator import generate_course
+from race_simulation import RaceSimulation
+from tire_tracks import TireTrackLayer
+from frame_profiler import FrameProfiler
+from main import draw_world_background, draw_race_world, next_checkpoint_map_index
+from ui_elements import draw_map
+from classes import Car, MudPatch, Ramp
+
+BENCHMARK_SEED = 1234
+BENCHMARK_FRAME_DT = 1.0 / const.RENDER_FPS # Every scenario renders at a fixed simulated 60 FPS
+REGRESSION_NOISE_FLOOR_MS = 0.05 # Differences below this are never reported as regressions
+
+
+# --- Scripted inputs ---
+def autopilot_inputs(sim):
+    """Full throttle toward the player's next checkpoint (or the start/finish line)."""
+    player_car = sim.player_car; course = sim.course
+    next_index = sim.player_next_checkpoint_index
+    if player_car.race_started and 0 <= next_index < sim.num_course_checkpoints:
+        target_x, target_y = course.checkpoints[next_index + 2].world_x, course.checkpoints[next_index + 2].world_y
+    else:
+        sf_line = course.start_finish_line
+        target_x = (sf_line[0][0] + sf_line[1][0]) / 2.0; target_y = (sf_line[0][1] + sf_line[1][1]) / 2.0
+    target_heading = math.degrees(math.atan2(target_y - player_car.world_y, target_x - player_car.world_x))
+    steer = clamp(angle_difference(target_heading, player_car.heading) / 30.0, -1.0, 1.0)
+    return (1.0 if abs(steer) < 0.8 else 0.6), 0.0, steer, 0.0
+
+def circling_inputs(sim):
+    return 1.0, 0.0, 1.0, (1.0 if sim.time_s % 2.0 < 0.5 else 0.0)
+
+def weaving_inputs(sim):
+    return 1.0, 0.0, math.sin(sim.time_s * 1.5) * 0.6, (1.0 if sim.time_s % 3.0 < 0.4 else 0.0)
+
+def straight_inputs(sim):
+    return 1.0, 0.0, 0.0, 0.0
+
+
+# --- Scenarios ---
+# Each builder returns (sim, input_fn, frames, countdown_frames). frames=None runs until every car
+# has finished (capped at FULL_RACE_MAX_FRAMES).
+FULL_RACE_MAX_FRAMES = 5400
+
+def build_grass_drive(physics_backend):
+    sim = RaceSimulation.create(num_laps=1, num_ai=0, player_car=Car(const.CENTER_X, const.CENTER_Y), physics_backend=physics_backend)
+    sim.course.mud_patches = []; sim.course.ramps = []; sim.course.visual_hills = []
+    sim.course.rebuild_lookups()
+    return sim, weaving_inputs, 600, 0
+
+def build_mud_particles(physics_backend):
+    sim = RaceSimulation.create(num_laps=1, num_ai=0, player_car=Car(const.CENTER_X, const.CENTER_Y), physics_backend=physics_backend)
+    sim.course.mud_patches = [MudPatch(0.0, 20.0, 1800)] # One huge patch the car circles inside
+    sim.course.rebuild_lookups()
+    return sim, circling_inputs, 600, 0
+
+def build_ai_pack(physics_backend):
+    sim = RaceSimulation.create(num_laps=1, num_ai=const.MAX_AI_OPPONENTS, player_car=Car(const.CENTER_X, const.CENTER_Y), physics_backend=physics_backend)
+    return sim, autopilot_inputs, 600, 0
+
+def build_ramp_field(physics_backend):
+    sim = RaceSimulation.create(num_laps=1, num_ai=2, player_car=Car(const.CENTER_X, const.CENTER_Y), physics_backend=physics_backend)
+    # Rows of ramps straight ahead of the grid (cars start facing -x)
+    sim.course.ramps = [Ramp(-300.0 - col * 220.0, -250.0 + row * 125.0, 40) for col in range(14) for row in range(5)]
+    sim.course.rebuild_lookups()
+    return sim, straight_inputs, 480, 0
+
+def build_full_race(physics_backend):
+    sim = RaceSimulation.create(num_laps=1, num_checkpoints=2, num_ai=3, player_car=Car(const.CENTER_X, const.CENTER_Y), physics_backend=physics_backend)
+    return sim, autopilot_inputs, None, int(3.0 * const.RENDER_FPS)
+
+SCENARIOS = {
+    "grass_drive": build_grass_drive,
+    "mud_particles": build_mud_particles,
+    "ai_pack": build_ai_pack,
+    "ramp_field": build_ramp_field,
+    "full_race": build_full_race,
+}
+
+
+def run_scenario(name, screen, physics_backend=const.DEFAULT_PHYSICS_BACKEND, frames=None):
+    """
+    Runs one scenario end to end and returns its timing summary.
+
+    Args:
+        frames (int, optional): Overrides the scenario's frame count (not its countdown).
+    """
+    rng.seed_all(BENCHMARK_SEED)
+    sim, input_fn, scenario_frames, countdown_frames = SCENARIOS[name](physics_backend)
+    if frames is not None: scenario_frames = frames
+    map_rect = pygame.Rect(const.SCREEN_WIDTH - const.MAP_WIDTH - const.MAP_MARGIN, const.MAP_MARGIN, const.MAP_WIDTH, const.MAP_HEIGHT)
+    tire_tracks = TireTrackLayer()
+    max_frames = countdown_frames + (scenario_frames if scenario_frames is not None else FULL_RACE_MAX_FRAMES)
+    profiler = FrameProfiler(history_frames=max_frames); sim.profiler = profiler
+    physics_dt = const.PHYSICS_TIME_STEP; physics_accumulator = 0.0; steps = 0; frame = 0
+
+    wall_start = time.perf_counter()
+    while frame < max_frames:
+        racing = frame >= countdown_frames
+        if frame == countdown_frames: sim.start_race()
+        if scenario_frames is None and racing and sim.all_finished: break
+        profiler.begin_frame(); profiler.switch("update")
+        render_alpha = 1.0
+        if racing:
+            physics_accumulator += BENCHMARK_FRAME_DT
+            while physics_accumulator >= physics_dt:
+                sim.step(physics_dt, input_fn(sim))
+                with profiler.section("tire_tracks"):
+                    for car_obj in sim.cars: car_obj.leave_tire_tracks(tire_tracks, sim.time_s)
+                physics_accumulator -= physics_dt; steps += 1
+            render_alpha = physics_accumulator / physics_dt
+            sim.update_standings()
+        cam_x, cam_y, _ = sim.player_car.interpolated_pose(render_alpha)
+        draw_world_background(screen, sim.course, cam_x, cam_y, tire_tracks, profiler, sim.time_s)
+        map_next_cp_idx = next_checkpoint_map_index(sim)
+        draw_race_world(screen, sim, cam_x, cam_y, render_alpha, map_next_cp_idx, profiler)
+        profiler.switch("map")
+        draw_map(screen, sim.player_car, sim.ai_cars, sim.course.mud_patches, sim.course.checkpoints, map_next_cp_idx,
+                 const.START_FINISH_LINE, map_rect, const.WORLD_BOUNDS, sim.course.ramps, sim.course.visual_hills)
+        profiler.switch("flip")
+        pygame.display.flip()
+        pygame.event.pump()
+        profiler.end_frame()
+        frame += 1
+    wall_time = time.perf_counter() - wall_start
+    if sim.fleet: sim.fleet.release()
+
+    stats = profiler.stats()
+    frame_row = stats[-1]
+    return {
+        'frames': frame,
+        'sim_steps': steps,
+        'wall_time_s': round(wall_time, 3),
+        'ms_per_frame': round(frame_row[1], 3),
+        'p95_ms_per_frame': round(frame_row[2], 3),
+        'frames_per_s': round(frame / wall_time, 2) if wall_time > 0 else 0.0,
+        'sim_steps_per_s': round(steps / wall_time, 1) if wall_time > 0 else 0.0,
+        'all_finished': sim.all_finished,
+        'phases': {phase: round(mean_ms, 4) for phase, mean_ms, _, _ in stats[:-1]},
+    }
+
+def run_course_generation(count=20):
+    """Times generate_course over a fixed run of seeds."""
+    timings = []
+    for i in range(count):
+        rng.seed_all(BENCHMARK_SEED + i)
+        start = time.perf_counter()
+        generate_course(const.DEFAULT_NUM_CHECKPOINTS)
+        timings.append(time.perf_counter() - start)
+    timings_ms = np.array(timings) * 1000.0
+    return {'courses': count, 'ms_per_course': round(float(timings_ms.mean()), 3),
+            'p95_ms_per_course': round(float(np.percentile(timings_ms, 95)), 3)}
+
+
+def compare_results(current, baseline, threshold):
+    """
+    Returns a list of human-readable regressions: metrics that got slower than baseline by more
+    than threshold (a fraction) and by more than REGRESSION_NOISE_FLOOR_MS.
+    """
+    regressions = []
+    def check(label, now, before):
+        if before is None or now is None: return
+        if now > before * (1.0 + threshold) and now - before > REGRESSION_NOISE_FLOOR_MS:
+            regressions.append(f"{label}: {before:.3f} -> {now:.3f} ms (+{(now / before - 1.0) * 100 if before > 0 else float('inf'):.0f}%)")
+    for name, result in current['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base: continue
+        check(f"{name} frame", result['ms_per_frame'], base.get('ms_per_frame'))
+        for phase, mean_ms in result['phases'].items():
+            check(f"{name} {phase}", mean_ms, base.get('phases', {}).get(phase))
+    if 'course_generation' in current and 'course_generation' in baseline:
+        check("course_generation", current['course_generation']['ms_per_course'], baseline['course_generation']['ms_per_course'])
+    return regressions
+
+
+def print_results(results):
+    for name, result in results['scenarios'].items():
+        print(f"{name:<14} {result['ms_per_frame']:8.2f} ms/frame (p95 {result['p95_ms_per_frame']:.2f})  "
+              f"{result['frames_per_s']:7.1f} frames/s  {result['sim_steps_per_s']:8.0f} steps/s  {result['frames']} frames")
+        top_phases = sorted(result['phases'].items(), key=lambda item: item[1], reverse=True)[:6]
+        print("               " + ", ".join(f"{phase} {mean_ms:.2f}" for phase, mean_ms in top_phases))
+    if 'course_generation' in results:
+        generation = results['course_generation']
+        print(f"{'course_gen':<14} {generation['ms_per_course']:8.2f} ms/course (p95 {generation['p95_ms_per_course']:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay fixed scenarios and report per-phase frame timings")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--frames", type=int, default=None, help="Override every scenario's frame count")
+    parser.add_argument("--physics", choices=const.PHYSICS_BACKENDS, default=const.DEFAULT_PHYSICS_BACKEND)
+    parser.add_argument("--skip-course-generation", action="store_true")
+    parser.add_argument("--out", default=None, help="Write results as JSON (use as a later --baseline)")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((const.SCREEN_WIDTH, const.SCREEN_HEIGHT))
+
+    results = {
+        'meta': {
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S"), 'python': platform.python_version(),
+            'pygame': pygame.version.ver, 'numpy': np.__version__, 'platform': platform.platform(),
+            'physics_backend': args.physics, 'seed': BENCHMARK_SEED,
+        },
+        'scenarios': {},
+    }
+    for name in args.scenarios:
+        results['scenarios'][name] = run_scenario(name, screen, args.physics, args.frames)
+    if not args.skip_course_generation:
+        results['course_generation'] = run_course_generation()
+    pygame.quit()
+
+    print_results(results)
+    if args.out:
+        with open(args.out, "w") as out_file: json.dump(results, out_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file: baseline = json.load(baseline_file)
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) vs {args.baseline}:")
+            for line in regressions: print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions vs {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == '__main__':
+    main()
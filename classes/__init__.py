@@ -7,13 +7,15 @@
 # For example, `from classes import Car` instead of `from classes.car import Car`.
 
 from .car import Car
-from .particle import Particle, DustParticle, MudParticle
+from .car_fleet import CarFleetState, FleetCarView
+from .car_sprites import CarSpriteCache
+from .particle import ParticleSystem
 from .track_elements import Ramp, MudPatch, Checkpoint
 
 # You can list all classes you want to be easily accessible when importing from 'classes'
 # This helps to create a cleaner API for your package.
 __all__ = [
-    "Car",
-    "Particle", "DustParticle", "MudParticle",
+    "Car", "CarFleetState", "FleetCarView", "CarSpriteCache",
+    "ParticleSystem",
     "Ramp", "MudPatch", "Checkpoint"
 ]
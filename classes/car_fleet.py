@@ -0,0 +1,162 @@
+# rally_racer_project/classes/car_fleet.py
+# This file defines CarFleetState, a struct-of-arrays copy of the Car physics state that
+# advances every car in one vectorized NumPy pass, and FleetCarView, the Car subclass a
+# car becomes while its state lives in a fleet row.
+
+import math
+import numpy as np
+
+import constants as const
+
+from .car import Car
+
+# Per-car physics state that moves into the fleet arrays while a car is bound.
+FLEET_FLOAT_FIELDS = (
+    "world_x", "world_y", "prev_world_x", "prev_world_y", "heading", "prev_heading",
+    "velocity_x", "velocity_y", "speed", "rpm",
+    "steering_input", "throttle_input", "brake_input", "handbrake_input",
+    "airborne_timer", "max_car_speed", "engine_power", "brake_power", "friction",
+    "drift_friction_multiplier", "handbrake_friction_multiplier", "handbrake_side_grip_loss",
+    "drift_threshold_speed", "surface_friction_multiplier", "surface_speed_dampening",
+)
+FLEET_BOOL_FIELDS = ("is_airborne", "is_handbraking", "is_drifting", "on_mud", "on_road", "on_grass")
+
+
+def _row_property(name, cast):
+    def getter(self):
+        return cast(self._fleet.arrays[name][self._fleet_row])
+    def setter(self, value):
+        self._fleet.arrays[name][self._fleet_row] = value
+    return property(getter, setter)
+
+
+class FleetCarView(Car):
+    """
+    A Car whose physics state is a row of a CarFleetState. Every other Car method keeps
+    working unchanged because the physics attributes become properties reading and
+    writing that row.
+    """
+    pass
+
+for _name in FLEET_FLOAT_FIELDS: setattr(FleetCarView, _name, _row_property(_name, float))
+for _name in FLEET_BOOL_FIELDS: setattr(FleetCarView, _name, _row_property(_name, bool))
+
+
+class CarFleetState:
+    """
+    Struct-of-arrays physics state for a group of cars. step() has the same semantics as
+    calling Car.update (without particle effects) on every car, but does it in one pass.
+    """
+    def __init__(self, cars):
+        """
+        Args:
+            cars (list): The cars to bind. Each becomes a FleetCarView on row i until release().
+        """
+        self.cars = list(cars)
+        self.size = len(self.cars)
+        self.arrays = {}
+        for name in FLEET_FLOAT_FIELDS: self.arrays[name] = np.zeros(self.size, dtype=np.float64)
+        for name in FLEET_BOOL_FIELDS: self.arrays[name] = np.zeros(self.size, dtype=bool)
+        for row, car in enumerate(self.cars):
+            self._bind(car, row)
+
+    def __getattr__(self, name):
+        # Allows fleet.world_x etc. as shorthand for fleet.arrays['world_x']
+        arrays = self.__dict__.get('arrays')
+        if arrays is not None and name in arrays: return arrays[name]
+        raise AttributeError(name)
+
+    def _bind(self, car, row):
+        if isinstance(car, FleetCarView):
+            raise ValueError("Car is already bound to a CarFleetState")
+        for name in FLEET_FLOAT_FIELDS + FLEET_BOOL_FIELDS:
+            self.arrays[name][row] = car.__dict__.pop(name)
+        car._fleet = self; car._fleet_row = row
+        car.__class__ = FleetCarView
+
+    def release(self):
+        """Copies every row back into its car and turns the cars back into plain Car objects."""
+        for row, car in enumerate(self.cars):
+            values = {name: getattr(car, name) for name in FLEET_FLOAT_FIELDS + FLEET_BOOL_FIELDS}
+            car.__class__ = Car
+            car.__dict__.update(values)
+            del car._fleet, car._fleet_row
+        self.cars = []; self.size = 0
+
+    def step(self, dt):
+        """Vectorized equivalent of Car.update(dt, update_effects=False) for every row."""
+        if dt <= 0 or self.size == 0: return
+        a = self.arrays
+        a["prev_world_x"][:] = a["world_x"]; a["prev_world_y"][:] = a["world_y"]; a["prev_heading"][:] = a["heading"]
+        a["is_handbraking"][:] = a["handbrake_input"] > 0.5
+
+        airborne_before = a["is_airborne"].copy()
+        a["airborne_timer"][airborne_before] -= dt
+        a["is_airborne"][airborne_before & (a["airborne_timer"] <= 0)] = False
+        airborne = a["is_airborne"].copy(); grounded = ~airborne
+
+        old_speed = a["speed"]; max_speed = a["max_car_speed"]
+        speed_factor_denom = np.where(max_speed > 0, max_speed, 1.0)
+        turn_effectiveness = np.where(airborne, const.AIRBORNE_TURN_EFFECTIVENESS, const.MIN_TURN_EFFECTIVENESS)
+        speed_factor_for_turning = turn_effectiveness + (1.0 - turn_effectiveness) * (1.0 - np.clip(old_speed / speed_factor_denom, 0, 1))
+        turn_amount = a["steering_input"] * const.CAR_TURN_RATE * speed_factor_for_turning * dt
+        turn_amount = np.where(airborne, turn_amount * const.AIRBORNE_TURN_EFFECTIVENESS, turn_amount)
+        heading = np.mod(a["heading"] + turn_amount, 360); a["heading"][:] = heading
+        heading_rad = heading * math.pi / 180.0
+        cos_h = np.cos(heading_rad); sin_h = np.sin(heading_rad)
+
+        effective_throttle = a["throttle_input"] * (1.0 - a["handbrake_input"] * 0.8)
+        accel_magnitude = a["engine_power"] * effective_throttle
+        vx = np.where(grounded, a["velocity_x"] + (cos_h * accel_magnitude) * dt, a["velocity_x"])
+        vy = np.where(grounded, a["velocity_y"] + (sin_h * accel_magnitude) * dt, a["velocity_y"])
+
+        braking = (a["brake_input"] > 0) & (old_speed > 0.01) & grounded
+        safe_speed = np.where(braking, old_speed, 1.0)
+        brake_force_magnitude = a["brake_power"] * a["brake_input"]
+        brake_impulse_x = (-vx / safe_speed) * brake_force_magnitude * dt
+        brake_impulse_y = (-vy / safe_speed) * brake_force_magnitude * dt
+        vx = np.where(braking, np.where(np.abs(brake_impulse_x) >= np.abs(vx), 0.0, vx + brake_impulse_x), vx)
+        vy = np.where(braking, np.where(np.abs(brake_impulse_y) >= np.abs(vy), 0.0, vy + brake_impulse_y), vy)
+
+        # Surface multipliers (blended over the tires), overridden while airborne as in Car.update
+        surface_friction_multiplier = np.where(airborne, const.AIRBORNE_FRICTION_MULTIPLIER, a["surface_friction_multiplier"])
+        speed_dampening_factor = np.where(airborne, 1.0, a["surface_speed_dampening"])
+        current_actual_base_friction = a["friction"] * surface_friction_multiplier
+
+        velocity_angle_deg = np.arctan2(vy, vx) * 180.0 / math.pi
+        angle_diff_heading_velocity = np.where(old_speed > 0.1, np.abs(np.mod(heading - velocity_angle_deg + 180, 360) - 180), 0.0)
+        drifting_now = (old_speed > a["drift_threshold_speed"]) & (angle_diff_heading_velocity > const.DRIFT_THRESHOLD_ANGLE)
+        a["is_drifting"][grounded] = drifting_now[grounded] # Airborne cars keep their previous drift state
+        handbraking = a["is_handbraking"] & grounded; drifting = a["is_drifting"] & grounded
+        drift_effect_multiplier = np.where(handbraking, a["handbrake_friction_multiplier"], np.where(drifting, a["drift_friction_multiplier"], 1.0))
+        side_grip_loss_factor = np.where(handbraking, a["handbrake_side_grip_loss"], 1.0)
+
+        friction_factor_dt = np.minimum(current_actual_base_friction * drift_effect_multiplier, 0.999) ** dt
+        forward_velocity_component = (vx * cos_h + vy * sin_h) * friction_factor_dt
+        sideways_velocity_component = (-vx * sin_h + vy * cos_h) * friction_factor_dt
+        sideways_velocity_component = sideways_velocity_component * side_grip_loss_factor ** dt
+        vx = forward_velocity_component * cos_h - sideways_velocity_component * sin_h
+        vy = forward_velocity_component * sin_h + sideways_velocity_component * cos_h
+
+        dampening_dt = speed_dampening_factor ** dt
+        vx = vx * dampening_dt; vy = vy * dampening_dt
+
+        speed = np.sqrt(vx**2 + vy**2)
+        over_cap = speed > max_speed
+        scale = np.where(over_cap, max_speed / np.where(speed > 0, speed, 1.0), 1.0)
+        vx = vx * scale; vy = vy * scale; speed = np.where(over_cap, max_speed, speed)
+
+        rpm = a["rpm"]; throttle = a["throttle_input"]
+        auto_stop = (speed < 0.5) & (throttle < 0.01) & (a["brake_input"] < 0.01) & grounded
+        vx[auto_stop] = 0.0; vy[auto_stop] = 0.0; speed[auto_stop] = 0.0
+        rpm = np.where(auto_stop, rpm + (const.IDLE_RPM - rpm) * 0.1, rpm)
+
+        a["velocity_x"][:] = vx; a["velocity_y"][:] = vy; a["speed"][:] = speed
+        a["world_x"] += vx * dt; a["world_y"] += vy * dt
+
+        speed_ratio_rpm = np.clip(speed / speed_factor_denom, 0, 1)
+        target_rpm = np.where((throttle > 0.1) & grounded,
+                              const.IDLE_RPM + (const.MAX_RPM - const.IDLE_RPM) * (0.2 + 0.8 * throttle) * (0.4 + 0.6 * speed_ratio_rpm),
+                              np.where(speed > 0.1, const.IDLE_RPM + (const.MAX_RPM * 0.5) * speed_ratio_rpm, const.IDLE_RPM))
+        rpm = rpm + (target_rpm - rpm) * 0.15
+        a["rpm"][:] = np.clip(rpm, const.IDLE_RPM * 0.8, const.MAX_RPM)
@@ -0,0 +1,108 @@
+# classes/car_sprites.py
+# This file contains CarSpriteCache, the pre-rotated car and shadow sprites used to draw cars with a
+# single blit each instead of rotating and rasterizing their polygons every frame.
+
+import math
+from collections import OrderedDict
+
+import pygame
+
+import constants as const
+from utils import lerp
+
+
+class CarSpriteCache:
+    """
+    Anti-aliased sprites of a car's shapes rotated to headings in steps of heading_step degrees.
+    Car sprites are keyed by body colour, so cars of the same colour share them; shadow sprites
+    are shared by every car and keyed by how far through a jump the car is as well, in
+    CAR_SHADOW_JUMP_STEPS steps, with the jump's shrinking and fading baked in, so drawing a
+    shadow is one blit of a cached surface even mid-air. Sprites are rendered on first
+    use (supersampled, then smoothscaled down) and the least recently used are dropped once there
+    are more than max_sprites. Every sprite is square with the car's centre at its centre.
+    """
+    def __init__(self, heading_step=const.CAR_SPRITE_HEADING_STEP, max_sprites=const.CAR_SPRITE_CACHE_SIZE,
+                 supersample=const.CAR_SPRITE_SUPERSAMPLE):
+        """
+        Args:
+            heading_step (float, optional): Degrees between pre-rotated headings.
+            max_sprites (int, optional): Sprites kept before the least recently used is dropped.
+            supersample (int, optional): Sprites are drawn this many times larger, then scaled down.
+        """
+        self.heading_step = heading_step
+        self.num_headings = round(360 / heading_step)
+        self.max_sprites = max_sprites
+        self.supersample = supersample
+        self.sprites = OrderedDict() # (colour, heading bucket) or (None, heading bucket, jump bucket) for shadows -> pygame.Surface
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def clear(self):
+        self.sprites.clear()
+
+    def car_sprite(self, car, heading):
+        return self._get(car, (car.color, self._bucket(heading)))
+
+    def shadow_sprite(self, car, heading, jump_arc=0.0):
+        """The car's shadow at heading, shrunk and faded for jump_arc (Car.jump_arc: 0 on the ground, 1 at the top of a jump)."""
+        return self._get(car, (None, self._bucket(heading), round(jump_arc * const.CAR_SHADOW_JUMP_STEPS)))
+
+    def _bucket(self, heading):
+        return round(heading / self.heading_step) % self.num_headings
+
+    def _get(self, car, key):
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key); return sprite
+        if key[0] is None:
+            jump_arc = key[2] / const.CAR_SHADOW_JUMP_STEPS
+            sprite = self._render_shadow(car, key[1] * self.heading_step, lerp(1.0, const.AIRBORNE_SHADOW_SCALE, jump_arc),
+                                         int(const.SHADOW_COLOR[3] * lerp(1.0, 0.3, jump_arc)))
+        else:
+            sprite = self._render(car, key[0], key[1] * self.heading_step)
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.max_sprites: self.sprites.popitem(last=False)
+        return sprite
+
+    def _render(self, car, color, heading):
+        """Draws the car's tires, spoiler, body and window at heading."""
+        layers = [(polygon, const.TIRE_COLOR, False) for polygon in _tire_polygons(car)] + \
+                 [(car.base_shape_spoiler, const.SPOILER_COLOR, True), (car.base_shape_body, color, True),
+                  (car.base_shape_window, const.CAR_WINDOW_COLOR, True)]
+        radius = max(math.hypot(x, y) for polygon, _, _ in layers for x, y in polygon)
+        size = 2 * (math.ceil(radius) + 2); scale = self.supersample; centre = size * scale / 2
+        rad = math.radians(heading); cos_a = math.cos(rad) * scale; sin_a = math.sin(rad) * scale
+        big = pygame.Surface((size * scale, size * scale), pygame.SRCALPHA); big.fill((0, 0, 0, 0))
+        for polygon, layer_color, outlined in layers:
+            points = [(x*cos_a - y*sin_a + centre, x*sin_a + y*cos_a + centre) for x, y in polygon]
+            pygame.draw.polygon(big, layer_color, points)
+            if outlined: pygame.draw.lines(big, const.BLACK, True, points, scale)
+        return pygame.transform.smoothscale(big, (size, size))
+
+    def _render_shadow(self, car, heading, scale, alpha):
+        """
+        Draws the car's shadow at heading: its tires, spoiler and body, each scaled by scale about its
+        own centre, in black with the given alpha. The parts are drawn over each other into a surface
+        just big enough for them, so overlaps don't darken, and blending it is the shadow's only blend.
+        """
+        parts = []
+        for polygon in _tire_polygons(car) + [car.base_shape_spoiler, car.base_shape_body]:
+            part_x = sum(x for x, _ in polygon) / len(polygon); part_y = sum(y for _, y in polygon) / len(polygon)
+            parts.append([(part_x + (x - part_x) * scale, part_y + (y - part_y) * scale) for x, y in polygon])
+        rad = math.radians(heading); cos_a = math.cos(rad); sin_a = math.sin(rad)
+        parts = [[(x*cos_a - y*sin_a, x*sin_a + y*cos_a) for x, y in part] for part in parts]
+        half_size = math.ceil(max(max(abs(x), abs(y)) for part in parts for x, y in part)) + 1
+        size = 2 * half_size; supersample = self.supersample
+        big = pygame.Surface((size * supersample, size * supersample), pygame.SRCALPHA); big.fill((0, 0, 0, 0))
+        for part in parts:
+            pygame.draw.polygon(big, (*const.BLACK[:3], alpha), [((x + half_size) * supersample, (y + half_size) * supersample) for x, y in part])
+        return pygame.transform.smoothscale(big, (size, size))
+
+
+def _tire_polygons(car):
+    return [[(cx + px, cy + py) for px, py in ((-w/2, -h/2), (w/2, -h/2), (w/2, h/2), (-w/2, h/2))] for cx, cy, w, h in car.base_shape_tires]
+
+
+# Shared by every car
+CAR_SPRITES = CarSpriteCache()
@@ -1,131 +1,128 @@
 # classes/particle.py
-# This file contains the Particle class and its derivatives (DustParticle, MudParticle)
-# for the Rally Racer game.
+# This file contains ParticleSystem, which keeps every dust and mud particle of a race in NumPy
+# arrays, for the Rally Racer game.
 
 import pygame
-import random
-import math 
+import numpy as np
 
-# Assuming constants.py and utils.py are in the parent directory or project root is in PYTHONPATH.
-import constants as const 
-# MODIFIED: Added 'clamp' to the import from utils
-from utils import lerp, clamp # Make sure clamp is imported here
+# Assuming constants.py is in the parent directory or project root is in PYTHONPATH.
+import constants as const
+import rng
 
-class Particle:
+# Particle kinds in a ParticleSystem
+DUST = 0
+MUD = 1
+
+# Per-kind settings, indexed by kind
+_KIND_LIFETIMES = (const.DUST_LIFETIME, const.MUD_LIFETIME)
+_KIND_START_SIZES = np.array((const.DUST_START_SIZE, const.MUD_START_SIZE), dtype=np.float64)
+_KIND_END_SIZES = np.array((const.DUST_END_SIZE, const.MUD_END_SIZE), dtype=np.float64)
+_KIND_COLORS = (const.DUST_COLOR, const.MUD_SPLASH_COLOR)
+_KIND_ALPHAS = np.array([color[3] if len(color) == 4 else 255 for color in _KIND_COLORS], dtype=np.float64)
+_KIND_DRIFT_SCALES = (0.1, 0.2)
+_KIND_DRIFT_DAMPENING = np.array((0.95, 0.90))
+
+
+class ParticleSystem:
     """
-    Base class for a simple 2D particle with a lifetime, size transition, and drift.
+    Every dust and mud particle of a race, stored in preallocated NumPy arrays. Live particles
+    occupy slots [0, count) in the order they were emitted; emitters write into the next free slot
+    and update() ages and moves them all in one vectorized pass, then compacts the survivors to the
+    front. A particle drifts and slows down, and shrinks and fades over its lifetime. Each particle
+    belongs to an owner (a car's index), so emitters can cap their own particles and a car's
+    particles can be cleared on their own.
     """
-    def __init__(self, world_x, world_y, lifetime, start_size, end_size, color, 
-                 initial_drift_x=0, initial_drift_y=0, drift_dampening=0.95):
+    def __init__(self, capacity, num_owners):
         """
-        Initializes a particle.
-
         Args:
-            world_x (float): Initial world x-coordinate.
-            world_y (float): Initial world y-coordinate.
-            lifetime (float): Base lifetime of the particle in seconds. A random variation is added.
-            start_size (int): Initial size (radius) of the particle in pixels.
-            end_size (int): Final size (radius) of the particle at the end of its life.
-            color (tuple): Color of the particle (R, G, B) or (R, G, B, A). Alpha is used if present.
-            initial_drift_x (float, optional): Initial horizontal drift speed. Defaults to 0.
-            initial_drift_y (float, optional): Initial vertical drift speed. Defaults to 0.
-            drift_dampening (float, optional): Factor by which drift speed is reduced each update. Defaults to 0.95.
+            capacity (int): Particles that can be alive at once; emitting beyond it is a no-op.
+            num_owners (int): Owners are identified by an index in [0, num_owners).
         """
-        self.world_x = world_x
-        self.world_y = world_y
-        
-        self.lifetime = lifetime + random.uniform(-lifetime * 0.2, lifetime * 0.2)
-        self.max_lifetime = max(0.1, self.lifetime) 
-
-        self.start_size = start_size
-        self.end_size = end_size
-        self.color = color 
-
-        self.drift_x = initial_drift_x
-        self.drift_y = initial_drift_y
-        self.drift_dampening = drift_dampening
+        self.capacity = capacity
+        self.count = 0
+        self.world_x = np.zeros(capacity); self.world_y = np.zeros(capacity)
+        self.drift_x = np.zeros(capacity); self.drift_y = np.zeros(capacity)
+        self.lifetime = np.zeros(capacity); self.max_lifetime = np.ones(capacity)
+        self.kind = np.zeros(capacity, dtype=np.intp); self.owner = np.zeros(capacity, dtype=np.intp)
+        self.counts = np.zeros((num_owners, len(_KIND_COLORS)), dtype=np.intp) # Live particles per (owner, kind)
+        self._max_size = int(max(_KIND_START_SIZES.max(), _KIND_END_SIZES.max()))
+        self._sprites = np.full(len(_KIND_COLORS) * (self._max_size + 1) * 256, None, dtype=object) # By _sprite_ids(), filled on first use
+
+    def __len__(self):
+        return self.count
+
+    def count_of(self, owner, kind):
+        return int(self.counts[owner, kind])
+
+    def emit(self, owner, kind, world_x, world_y, initial_drift_x=0.0, initial_drift_y=0.0):
+        """Adds one particle of the given kind; its drift is scaled per kind, and mud is also thrown upward at random."""
+        if self.count >= self.capacity: return
+        particle_random = rng.stream("particles")
+        drift_scale = _KIND_DRIFT_SCALES[kind]
+        drift_x = initial_drift_x * drift_scale; drift_y = initial_drift_y * drift_scale
+        if kind == MUD: drift_y -= particle_random.uniform(10, 40)
+        base_lifetime = _KIND_LIFETIMES[kind]
+        lifetime = base_lifetime + particle_random.uniform(-base_lifetime * 0.2, base_lifetime * 0.2)
+        i = self.count
+        self.world_x[i] = world_x; self.world_y[i] = world_y; self.drift_x[i] = drift_x; self.drift_y[i] = drift_y
+        self.lifetime[i] = lifetime; self.max_lifetime[i] = max(0.1, lifetime)
+        self.kind[i] = kind; self.owner[i] = owner
+        self.count = i + 1; self.counts[owner, kind] += 1
 
     def update(self, dt):
-        """
-        Updates the particle's state (lifetime, position due to drift).
-        """
-        self.lifetime -= dt
-        if self.lifetime <= 0:
-            return False
-
-        self.world_x += self.drift_x * dt
-        self.world_y += self.drift_y * dt
-
-        self.drift_x *= (self.drift_dampening ** dt) 
-        self.drift_y *= (self.drift_dampening ** dt)
-        
-        return True
+        """Ages, moves and slows every particle, then drops the expired ones."""
+        n = self.count
+        if n == 0: return
+        lifetime = self.lifetime[:n]; lifetime -= dt
+        alive = lifetime > 0
+        self.world_x[:n] += self.drift_x[:n] * dt; self.world_y[:n] += self.drift_y[:n] * dt
+        dampening = (_KIND_DRIFT_DAMPENING ** dt)[self.kind[:n]]
+        self.drift_x[:n] *= dampening; self.drift_y[:n] *= dampening
+        if not alive.all(): self._compact(alive)
+
+    def clear(self):
+        self.count = 0; self.counts[:] = 0
+
+    def clear_owner(self, owner):
+        if self.count and self.counts[owner].any(): self._compact(self.owner[:self.count] != owner)
+
+    def _compact(self, keep):
+        """Moves the particles where keep is True to the front, in order, and recounts."""
+        kept = np.flatnonzero(keep); n = len(kept)
+        for array in (self.world_x, self.world_y, self.drift_x, self.drift_y, self.lifetime, self.max_lifetime, self.kind, self.owner):
+            array[:n] = array[kept]
+        self.count = n
+        self.counts[:] = 0
+        np.add.at(self.counts, (self.owner[:n], self.kind[:n]), 1)
+
+    def _sprite_ids(self, kind, size, alpha):
+        return (kind * (self._max_size + 1) + size) * 256 + alpha
+
+    def _render_sprites(self, sprite_ids):
+        for sprite_id in np.unique(sprite_ids).tolist():
+            kind_and_size, alpha = divmod(sprite_id, 256); kind, size = divmod(kind_and_size, self._max_size + 1)
+            sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA); sprite.fill((0, 0, 0, 0))
+            pygame.draw.circle(sprite, (*_KIND_COLORS[kind][:3], alpha), (size, size), size)
+            self._sprites[sprite_id] = sprite
 
     def draw(self, surface, camera_offset_x, camera_offset_y):
-        """
-        Draws the particle on the given surface, relative to the camera.
-        """
-        if self.lifetime <= 0:
-            return
-
-        screen_x = int(self.world_x - camera_offset_x + const.CENTER_X)
-        screen_y = int(self.world_y - camera_offset_y + const.CENTER_Y)
-
-        life_ratio = max(0, self.lifetime / self.max_lifetime) 
-        current_size = int(lerp(self.end_size, self.start_size, life_ratio**0.5))
-
-        if current_size < 1: 
-            return
-
-        if not (-current_size < screen_x < const.SCREEN_WIDTH + current_size and \
-                -current_size < screen_y < const.SCREEN_HEIGHT + current_size):
-            return
-
-        base_alpha = 255
-        if len(self.color) == 4: 
-            base_alpha = self.color[3]
-        
-        current_alpha = int(lerp(0, base_alpha, life_ratio)) 
-        current_alpha = clamp(current_alpha, 0, 255) # clamp is now defined
-
-        try:
-            final_color = (*self.color[:3], current_alpha)
-            particle_surf = pygame.Surface((current_size * 2, current_size * 2), pygame.SRCALPHA)
-            particle_surf.fill((0,0,0,0)) 
-            pygame.draw.circle(particle_surf, final_color, (current_size, current_size), current_size)
-            surface.blit(particle_surf, (screen_x - current_size, screen_y - current_size))
-        except ValueError: 
-            pygame.draw.circle(surface, self.color[:3], (screen_x, screen_y), current_size)
-
-
-class DustParticle(Particle):
-    """
-    A specialized particle for dust effects, inheriting from Particle.
-    """
-    def __init__(self, world_x, world_y, initial_drift_x=0, initial_drift_y=0):
-        super().__init__(
-            world_x, world_y,
-            const.DUST_LIFETIME,
-            const.DUST_START_SIZE,
-            const.DUST_END_SIZE,
-            const.DUST_COLOR, 
-            initial_drift_x * 0.1, 
-            initial_drift_y * 0.1,
-            drift_dampening=0.95 
-        )
-
-class MudParticle(Particle):
-    """
-    A specialized particle for mud splash effects, inheriting from Particle.
-    """
-    def __init__(self, world_x, world_y, initial_drift_x=0, initial_drift_y=0):
-        super().__init__(
-            world_x, world_y,
-            const.MUD_LIFETIME,
-            const.MUD_START_SIZE,
-            const.MUD_END_SIZE,
-            const.MUD_SPLASH_COLOR, 
-            initial_drift_x * 0.2, 
-            initial_drift_y * 0.2 - random.uniform(10, 40), 
-            drift_dampening=0.90 
-        )
+        """Draws every particle on screen, shrinking and fading with age, in one batched blit."""
+        n = self.count
+        if n == 0: return
+        kind = self.kind[:n]
+        screen_x = (self.world_x[:n] - camera_offset_x + const.CENTER_X).astype(np.intp) # Truncated, like int()
+        screen_y = (self.world_y[:n] - camera_offset_y + const.CENTER_Y).astype(np.intp)
+        life_ratio = np.maximum(0.0, self.lifetime[:n] / self.max_lifetime[:n])
+        start_size = _KIND_START_SIZES[kind]; end_size = _KIND_END_SIZES[kind]
+        size = (end_size + (start_size - end_size) * np.sqrt(life_ratio)).astype(np.intp)
+        alpha = np.clip((_KIND_ALPHAS[kind] * life_ratio).astype(np.intp), 0, 255)
+        visible = (size >= 1) & (-size < screen_x) & (screen_x < const.SCREEN_WIDTH + size) & \
+                  (-size < screen_y) & (screen_y < const.SCREEN_HEIGHT + size)
+        if not visible.any(): return
+        size = size[visible]
+        sprite_ids = self._sprite_ids(kind[visible], size, alpha[visible])
+        sprites = self._sprites[sprite_ids]
+        missing = sprites == None
+        if missing.any():
+            self._render_sprites(sprite_ids[missing]); sprites = self._sprites[sprite_ids]
+        surface.blits(zip(sprites.tolist(), zip((screen_x[visible] - size).tolist(), (screen_y[visible] - size).tolist())), doreturn=False)
@@ -2,10 +2,12 @@
 # This file defines classes for track elements like Ramps, MudPatches, and Checkpoints.
 
 import pygame
-import random
 import math
+import bisect
+import numpy as np
 
 import constants as const
+import rng
 from utils import deg_to_rad, lerp, clamp # Ensure clamp is imported from utils
 
 class Ramp:
@@ -96,41 +98,61 @@ class Ramp:
         pygame.draw.circle(surface, const.RAMP_DEBUG_COLOR, (screen_x, screen_y), screen_radius, 2)
 
 
-# --- MudPatch Class (Remains Unchanged from your provided file) ---
+# --- MudPatch Class ---
 class MudPatch:
     def __init__(self, world_x, world_y, size):
         self.world_x = world_x; self.world_y = world_y; self.size = size; self.color = const.MUD_COLOR; self.border_color = const.DARK_MUD_COLOR
         self.points_rel = self._generate_random_points(size); self.points_world = [(x + world_x, y + world_y) for x, y in self.points_rel]
         self.rect = self._calculate_bounding_rect(self.points_world)
+        self._compile_geometry()
     def _generate_random_points(self, size):
-        points = []; num_vertices = random.randint(const.MIN_MUD_VERTICES, const.MAX_MUD_VERTICES); avg_radius = size / 2.0
+        course_random = rng.stream("course")
+        points = []; num_vertices = course_random.randint(const.MIN_MUD_VERTICES, const.MAX_MUD_VERTICES); avg_radius = size / 2.0
         for i in range(num_vertices):
-            angle = (i / num_vertices) * 2 * math.pi; radius_variation = random.uniform(1.0 - const.MUD_RADIUS_VARIATION, 1.0 + const.MUD_RADIUS_VARIATION)
-            radius = avg_radius * radius_variation; angle += random.uniform(-0.5 / num_vertices, 0.5 / num_vertices) * 2 * math.pi
+            angle = (i / num_vertices) * 2 * math.pi; radius_variation = course_random.uniform(1.0 - const.MUD_RADIUS_VARIATION, 1.0 + const.MUD_RADIUS_VARIATION)
+            radius = avg_radius * radius_variation; angle += course_random.uniform(-0.5 / num_vertices, 0.5 / num_vertices) * 2 * math.pi
             x = radius * math.cos(angle); y = radius * math.sin(angle); points.append((x, y))
         points.sort(key=lambda p: math.atan2(p[1], p[0])); return points
     def _calculate_bounding_rect(self, points_list):
         if not points_list: return pygame.Rect(self.world_x, self.world_y, 0, 0)
         min_x = min(p[0] for p in points_list); max_x = max(p[0] for p in points_list); min_y = min(p[1] for p in points_list); max_y = max(p[1] for p in points_list)
         return pygame.Rect(min_x, min_y, max_x - min_x, max_y - min_y)
+    def _compile_geometry(self):
+        """
+        Precomputes what containment tests need. The vertices are sorted by angle around the centre and
+        no gap between them reaches 180 degrees, so the patch is star-shaped: the angle sector a point
+        falls in names the one edge it must be on the centre's side of. _edge_planes[k] is that edge as
+        (nx, ny, c), inside meaning nx*dx + ny*dy > c for (dx, dy) relative to the centre; sectors 0 and
+        n share the edge that wraps from the last vertex back to the first.
+        """
+        self._vertex_angles = [math.atan2(y, x) for x, y in self.points_rel]
+        edge_planes = []; inner_radius_sq = math.inf
+        for (ax, ay), (bx, by) in zip(self.points_rel[-1:] + self.points_rel[:-1], self.points_rel):
+            nx = ay - by; ny = bx - ax; c = nx * ax + ny * ay
+            edge_planes.append((nx, ny, c))
+            normal_len_sq = nx * nx + ny * ny
+            if normal_len_sq > 1e-12: inner_radius_sq = min(inner_radius_sq, c * c / normal_len_sq)
+        edge_planes.append(edge_planes[0] if edge_planes else (0.0, 0.0, 0.0))
+        self._edge_planes = edge_planes; self._edge_planes_array = np.array(edge_planes, dtype=np.float64)
+        self._vertex_angles_array = np.array(self._vertex_angles, dtype=np.float64)
+        self._inner_radius_sq = inner_radius_sq if len(self.points_rel) >= 3 else -1.0 # Always inside within this distance of the centre
+        self._outer_radius_sq = max((x * x + y * y for x, y in self.points_rel), default=-1.0) # Never inside beyond it
     def draw(self, surface, offset_x, offset_y):
         screen_points = [(int(px - offset_x + const.CENTER_X), int(py - offset_y + const.CENTER_Y)) for px, py in self.points_world]
         screen_rect = self.rect.move(-offset_x + const.CENTER_X, -offset_y + const.CENTER_Y)
         if screen_rect.colliderect(surface.get_rect()):
             if len(screen_points) > 2: pygame.draw.polygon(surface, self.color, screen_points); pygame.draw.polygon(surface, self.border_color, screen_points, 2)
-    def check_collision(self, point): # This is point collision for mud, car uses rect for broad phase
-        if not self.rect.collidepoint(point): return False
-        x, y = point; n = len(self.points_world); inside = False; p1x, p1y = self.points_world[0]
-        for i in range(n + 1):
-            p2x, p2y = self.points_world[i % n]
-            if y > min(p1y, p2y):
-                if y <= max(p1y, p2y):
-                    if x <= max(p1x, p2x):
-                        if p1y != p2y: xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                        else: xinters = p1x 
-                        if p1x == p2x or x <= xinters: inside = not inside
-            p1x, p1y = p2x, p2y
-        return inside
+    def check_collision(self, point): # Point-in-patch: a radius check, then one edge test picked by angle
+        dx = point[0] - self.world_x; dy = point[1] - self.world_y; dist_sq = dx * dx + dy * dy
+        if dist_sq >= self._outer_radius_sq: return False
+        if dist_sq < self._inner_radius_sq: return True
+        nx, ny, c = self._edge_planes[bisect.bisect_right(self._vertex_angles, math.atan2(dy, dx))]
+        return nx * dx + ny * dy > c
+    def check_collision_many(self, xs, ys):
+        """Vectorized check_collision() for arrays of world positions; returns a bool array."""
+        dx = np.asarray(xs, dtype=np.float64) - self.world_x; dy = np.asarray(ys, dtype=np.float64) - self.world_y
+        planes = self._edge_planes_array[np.searchsorted(self._vertex_angles_array, np.arctan2(dy, dx), side="right")]
+        return (dx * dx + dy * dy < self._outer_radius_sq) & (planes[..., 0] * dx + planes[..., 1] * dy > planes[..., 2])
 
 # --- Checkpoint Class (Remains Unchanged from your provided file) ---
 class Checkpoint: 
@@ -102,6 +102,12 @@ MAX_AIRBORNE_DURATION = 1.2
 SHADOW_OFFSET_X = 8            
 SHADOW_OFFSET_Y = 8            
 AIRBORNE_SHADOW_SCALE = 0.5    
+CAR_SPRITE_HEADING_STEP = 2    # Degrees between the pre-rotated car sprites
+CAR_SPRITE_SUPERSAMPLE = 4     # Car sprites are drawn this much larger, then scaled down for anti-aliasing
+CAR_SHADOW_JUMP_STEPS = 12     # Cached shadow sizes between on the ground and the top of a jump
+# Car and shadow sprites kept before the least recently used is dropped: every heading of every body colour
+# (the player's, the AI list and the AI fallback) and of every shadow jump step
+CAR_SPRITE_CACHE_SIZE = round(360 / CAR_SPRITE_HEADING_STEP) * (len(AI_AVAILABLE_COLORS) + 2 + CAR_SHADOW_JUMP_STEPS + 1)
 
 BASE_AI_LOOKAHEAD_FACTOR = 1.5
 BASE_AI_TURN_THRESHOLD = 20
@@ -120,6 +126,11 @@ MAX_MUD_VERTICES = 10
 MUD_RADIUS_VARIATION = 0.4 
 WORLD_BOUNDS = 4000
 MIN_OBJ_SEPARATION = 200 
+SPATIAL_INDEX_CELL_SIZE = 256 # World units per cell of the course's track element grids
+SURFACE_MAP_CELL_SIZE = 4     # World units per cell of the baked surface map
+# Surface map bit flags (a cell with none set is grass)
+SURFACE_GRASS = 0; SURFACE_ROAD = 1; SURFACE_MUD = 2; SURFACE_RAMP = 4; SURFACE_HILL_CREST = 8
+COLLISION_BROAD_PHASE_MIN_CARS = 8 # Fields this large sort-and-sweep for car-car collision pairs; smaller ones test every pair
 
 # --- Ramp Properties (Updated for Circular Ramps) ---
 NUM_RAMPS = 30 
@@ -128,7 +139,7 @@ RAMP_MAX_RADIUS = 50
 # RAMP_WIDTH, RAMP_HEIGHT are obsolete
 
 # --- Particle Properties ---
-MAX_DUST_PARTICLES = 150
+MAX_DUST_PARTICLES = 150 # Per car; particles live in one shared ParticleSystem
 DUST_SPAWN_INTERVAL = 0.03; DUST_LIFETIME = 0.8
 DUST_START_SIZE = 5; DUST_END_SIZE = 1
 MAX_MUD_PARTICLES = 80
@@ -141,6 +152,8 @@ MAP_WIDTH = 250; MAP_HEIGHT = 250; MAP_MARGIN = 15
 MAP_WORLD_SCALE_X = MAP_WIDTH / (2 * WORLD_BOUNDS)
 MAP_WORLD_SCALE_Y = MAP_HEIGHT / (2 * WORLD_BOUNDS)
 MAP_MUD_MARKER_RADIUS = 3; MAP_CHECKPOINT_MARKER_RADIUS = 4; MAP_CAR_MARKER_SIZE = 6
+STANDINGS_PANEL_POS = (SCREEN_WIDTH - MAP_WIDTH - MAP_MARGIN, MAP_HEIGHT + MAP_MARGIN * 2) # Live standings, under the map
+STANDINGS_PANEL_BG = (0, 0, 0, 140)
 
 # --- UI Properties (Layout for Setup Screen & In-Game HUD) ---
 SETUP_BUTTON_WIDTH = 200; SETUP_BUTTON_HEIGHT = 50
@@ -161,6 +174,7 @@ START_FINISH_LINE = [(-200, -300), (-200, 300)]
 START_FINISH_WIDTH = 15
 CHECKPOINT_RADIUS = 20
 CHECKPOINT_ROUNDING_RADIUS = 75
+AI_CHECKPOINT_ROUNDING_RADIUS = CHECKPOINT_ROUNDING_RADIUS * 1.5 # AI cars round checkpoints from further out
 LINE_CROSSING_DEBOUNCE = 1.0
 
 # --- Sound Properties ---
@@ -171,6 +185,13 @@ ENGINE_MIN_VOL = 0.1; ENGINE_MAX_VOL = 0.8; SKID_VOL = 0.6
 
 # --- Debugging ---
 DEBUG_DRAW_RAMPS = False
+PROFILER_HISTORY_FRAMES = 600      # Frames kept by the frame profiler (10 s at 60 FPS)
+PROFILER_OVERLAY_POS = (20, 220)   # Top-left of the profiler overlay (toggle with F3, export CSV with F4)
+PROFILER_OVERLAY_BG = (0, 0, 0, 170)
+CPROFILE_CAPTURE_FRAMES = 300      # Frames profiled under cProfile per capture (F5)
+MEMORY_CAPTURE_FRAMES = 300        # Frames between the tracemalloc before/after snapshots (F6)
+MEMORY_CAPTURE_TOP_SITES = 30      # Allocation sites listed in a memory snapshot report
+MEMORY_CAPTURE_TRACEBACK_DEPTH = 1 # Stack frames tracemalloc stores per allocation
 
 # --- Game Setup Options (Defaults/Ranges) ---
 DEFAULT_TOP_SPEED_INDEX = 2
@@ -180,6 +201,34 @@ MAX_CHECKPOINTS_ALLOWED = 10
 DEFAULT_NUM_AI = 3
 MAX_AI_OPPONENTS = 5 
 DEFAULT_DIFFICULTY_INDEX = 1
+AI_DIFFICULTY_OPTIONS = ["Easy", "Medium", "Hard", "Random"]
+DEFAULT_TOP_SPEED_PERCENT = 100
+DEFAULT_GRIP_PERCENT = 100
+
+# --- Simulation Timing ---
+PHYSICS_HZ = 120                   # Fixed simulation rate; handling does not depend on the render rate
+PHYSICS_TIME_STEP = 1.0 / PHYSICS_HZ
+MAX_PHYSICS_STEPS_PER_FRAME = 12   # Drop simulated time rather than spiral when a frame takes too long
+PHYSICS_BACKENDS = ["scalar", "numpy"] # "numpy" steps every car at once through CarFleetState
+DEFAULT_PHYSICS_BACKEND = "scalar"
+RENDER_FPS = 60                    # Target render rate; can be lowered on weak machines without changing handling
+MAX_FRAME_TIME = 0.25              # Longest real frame time fed into the physics accumulator
+TIME_SCALE_OPTIONS = [1.0, 4.0, 16.0, float("inf")] # Simulated seconds per real second; inf = as fast as possible
+DEFAULT_TIME_SCALE_INDEX = 0
+MAX_SPEED_FRAME_BUDGET = 0.8       # Fraction of a render frame spent stepping physics in "max" time scale
+LOD_DISTANCE = 1400                # AI cars further than this from the player drop to reduced detail
+LOD_PROMOTE_DISTANCE = 1200        # ...and return to full detail once back within this (hysteresis)
+
+# --- Headless Simulation ---
+HEADLESS_MAX_RACE_TIME = 900.0     # Simulated seconds before unfinished cars are marked DNF
+
+# --- Training Environment (race_env.py) ---
+ENV_ACTION_REPEAT = 4              # Physics steps per env step (4 x 1/120s = 30 decisions per simulated second)
+ENV_MAX_EPISODE_STEPS = 9000       # Episode is truncated after this many env steps (5 simulated minutes)
+ENV_PROGRESS_REWARD_SCALE = 100.0  # World units of progress toward the next target per 1.0 reward
+ENV_CHECKPOINT_REWARD = 1.0        # Bonus per checkpoint or line crossing
+ENV_FINISH_REWARD = 10.0
+ENV_STEP_PENALTY = 0.001
 
 # --- Hill Generation (Visual Only for now, will become physical) ---
 NUM_VISUAL_HILLS = 15 
@@ -192,11 +241,20 @@ TIRE_TRACK_RADIUS = 4
 TIRE_TRACK_MIN_SPEED = 30            
 TIRE_TRACK_OFFSET_REAR = 15          
 TIRE_TRACK_OFFSET_SIDE = 9           
+TIRE_TRACK_MIN_SPACING = 3           # A car only leaves a new stamp after moving this far from its last one
+TIRE_TRACK_FADE_TIME = 30.0          # Seconds for a stamp to fade out
+TIRE_TRACK_STAMP_RATE = 800          # Stamps per second the layer is sized for (every car on grass at speed)
+TIRE_TRACK_CAPACITY = int(TIRE_TRACK_STAMP_RATE * TIRE_TRACK_FADE_TIME) # Stamps kept; the oldest are overwritten
+TIRE_TRACK_FADE_LEVELS = 8           # Alpha steps a stamp fades through (one pre-rendered sprite each)
+TIRE_TRACK_TILE_SIZE = 256           # Stamps are filed under world tiles of this size, so drawing only visits the tiles in view
+TIRE_TRACK_REDRAW_BUDGET = 1500      # Stamps re-blended per frame when the fade steps down; other tiles catch up next frame
 # TIRE_TRACK_COLOR is defined in the main pastel palette section
 
 # --- Road Properties ---
 ROAD_WIDTH = 100  
 ROAD_BORDER_WIDTH = 0 # Set to 0 to remove road border
+TRACK_FRAME_SEARCH_RADIUS = 400                  # Track projection only tests centreline segments this close
+TRACK_FRAME_MAX_S_STEP = 1500                    # How far a car's track s may move between two projections
 # ROAD_COLOR & ROAD_BORDER_COLOR are defined in the main pastel palette section
 
 # --- Roundabout Properties ---
@@ -2,13 +2,20 @@
 # This file contains functions for generating the race course elements.
 
 import pygame
-import random
 import math
+import numpy as np
 
 import constants as const
-from utils import (distance_sq, lerp, point_segment_distance_sq, distance, 
+import rng
+from utils import (distance_sq, lerp, points_segments_min_distance_sq, distance, 
                    normalize_angle, deg_to_rad, rad_to_deg, angle_difference)
 from classes import Checkpoint, MudPatch, Ramp
+from spatial_index import SpatialIndex
+from surface_map import SurfaceMap
+from track_frame import TrackFrame
+from triggers import TriggerMap
+
+course_random = rng.stream("course") # Reseeded in place by rng.seed_all()
 
 
 def is_too_close(new_pos, existing_objects, min_dist_sq):
@@ -21,6 +28,20 @@ def is_too_close(new_pos, existing_objects, min_dist_sq):
             return True
     return False
 
+def road_centerline_segments(centerline_road_points):
+    """(starts, ends) arrays of the centreline's segments, for is_too_close_to_road()."""
+    points = np.asarray(centerline_road_points if centerline_road_points else [], dtype=np.float64).reshape(-1, 2)
+    return points[:-1], points[1:]
+
+def is_too_close_to_road(pos, road_segments, min_dist_sq):
+    """
+    Checks if a position is within sqrt(min_dist_sq) of any centreline segment, testing every
+    segment in one vectorized pass.
+    """
+    starts, ends = road_segments
+    if len(starts) == 0: return False
+    return points_segments_min_distance_sq([pos[0]], [pos[1]], starts, ends)[0] < min_dist_sq
+
 class VisualHill:
     """
     Represents a physical hill patch on the track, circular.
@@ -255,8 +276,8 @@ def generate_random_checkpoints(count, existing_objects_for_spacing, start_finis
     sf_line_x = start_finish_line_coords[0][0]; sf_line_y_min = min(start_finish_line_coords[0][1], start_finish_line_coords[1][1])
     sf_line_y_max = max(start_finish_line_coords[0][1], start_finish_line_coords[1][1]); sf_avoid_buffer_x = 500; sf_avoid_buffer_y = 300
     while len(checkpoint_coords) < count and attempts < max_attempts:
-        attempts += 1; wx = random.uniform(-const.WORLD_BOUNDS * margin_factor, const.WORLD_BOUNDS * margin_factor)
-        wy = random.uniform(-const.WORLD_BOUNDS * margin_factor, const.WORLD_BOUNDS * margin_factor); pos = (wx, wy)
+        attempts += 1; wx = course_random.uniform(-const.WORLD_BOUNDS * margin_factor, const.WORLD_BOUNDS * margin_factor)
+        wy = course_random.uniform(-const.WORLD_BOUNDS * margin_factor, const.WORLD_BOUNDS * margin_factor); pos = (wx, wy)
         if abs(wx - sf_line_x) < sf_avoid_buffer_x and (sf_line_y_min - sf_avoid_buffer_y) < wy < (sf_line_y_max + sf_avoid_buffer_y): continue
         temp_checkpoint_objects = [Checkpoint(c_x, c_y, -1) for c_x,c_y in checkpoint_coords]
         all_to_check_spacing = existing_objects_for_spacing + temp_checkpoint_objects
@@ -264,7 +285,7 @@ def generate_random_checkpoints(count, existing_objects_for_spacing, start_finis
         checkpoint_coords.append(pos)
     if attempts >= max_attempts and len(checkpoint_coords) < count: print(f"Warning: CourseGen - Could only generate {len(checkpoint_coords)}/{count} checkpoints.")
     while len(checkpoint_coords) < min(count, 1) and count > 0 :
-        wx = random.uniform(const.WORLD_BOUNDS*0.3, const.WORLD_BOUNDS*0.7); wy = random.uniform(-const.WORLD_BOUNDS*0.5, const.WORLD_BOUNDS*0.5); pos = (wx,wy)
+        wx = course_random.uniform(const.WORLD_BOUNDS*0.3, const.WORLD_BOUNDS*0.7); wy = course_random.uniform(-const.WORLD_BOUNDS*0.5, const.WORLD_BOUNDS*0.5); pos = (wx,wy)
         temp_checkpoint_objects = [Checkpoint(c_x, c_y, -1) for c_x,c_y in checkpoint_coords]
         if not is_too_close(pos, temp_checkpoint_objects, min_dist_sq_cp): checkpoint_coords.append(pos)
         else: checkpoint_coords.append((const.WORLD_BOUNDS*0.5, 0)); break 
@@ -277,9 +298,10 @@ def generate_random_mud_patches(count, existing_objects, start_finish_line_coord
     sf_line_x = start_finish_line_coords[0][0]; sf_line_y_min = min(start_finish_line_coords[0][1], start_finish_line_coords[1][1])
     sf_line_y_max = max(start_finish_line_coords[0][1], start_finish_line_coords[1][1]); sf_avoid_buffer_mud = 150 
     road_clearance_buffer = 20 
+    road_segments = road_centerline_segments(centerline_road_points)
     while len(mud_patches) < count and attempts < max_attempts:
-        attempts += 1; size = random.randint(const.MIN_MUD_SIZE, const.MAX_MUD_SIZE); object_radius = size / 2.0
-        wx = random.uniform(-const.WORLD_BOUNDS*0.95, const.WORLD_BOUNDS*0.95); wy = random.uniform(-const.WORLD_BOUNDS*0.95, const.WORLD_BOUNDS*0.95); pos = (wx, wy)
+        attempts += 1; size = course_random.randint(const.MIN_MUD_SIZE, const.MAX_MUD_SIZE); object_radius = size / 2.0
+        wx = course_random.uniform(-const.WORLD_BOUNDS*0.95, const.WORLD_BOUNDS*0.95); wy = course_random.uniform(-const.WORLD_BOUNDS*0.95, const.WORLD_BOUNDS*0.95); pos = (wx, wy)
         if abs(wx - sf_line_x) < (object_radius + sf_avoid_buffer_mud) and \
            (sf_line_y_min - object_radius - sf_avoid_buffer_mud) < wy < (sf_line_y_max + object_radius + sf_avoid_buffer_mud): continue
         too_close_to_course_cp = False
@@ -288,13 +310,8 @@ def generate_random_mud_patches(count, existing_objects, start_finish_line_coord
         if too_close_to_course_cp: continue
         min_dist_sq_this_mud = (object_radius + const.MIN_MUD_SIZE / 2 + const.MIN_OBJ_SEPARATION * 0.2)**2
         if is_too_close(pos, existing_objects + mud_patches, min_dist_sq_this_mud): continue
-        on_road_or_too_close = False
-        if centerline_road_points and len(centerline_road_points) >= 2:
-            min_safe_dist_from_road_center_sq = (road_width / 2.0 + object_radius + road_clearance_buffer)**2
-            for i in range(len(centerline_road_points) - 1):
-                road_p1 = centerline_road_points[i]; road_p2 = centerline_road_points[i+1]
-                if point_segment_distance_sq(pos, road_p1, road_p2) < min_safe_dist_from_road_center_sq: on_road_or_too_close = True; break
-        if on_road_or_too_close: continue
+        min_safe_dist_from_road_center_sq = (road_width / 2.0 + object_radius + road_clearance_buffer)**2
+        if is_too_close_to_road(pos, road_segments, min_safe_dist_from_road_center_sq): continue
         mud_patches.append(MudPatch(wx, wy, size))
     if attempts >= max_attempts and len(mud_patches) < count: print(f"Warning: CourseGen - Could only generate {len(mud_patches)}/{count} mud patches.")
     return mud_patches
@@ -307,18 +324,14 @@ def generate_random_ramps(count, existing_objects, start_finish_line_coords, cen
     sf_line_x = start_finish_line_coords[0][0]; sf_line_center_y = (start_finish_line_coords[0][1] + start_finish_line_coords[1][1]) / 2
     sf_avoid_radius_sq = (const.MIN_OBJ_SEPARATION * 1.2)**2
     road_clearance_buffer = 10 
+    road_segments = road_centerline_segments(centerline_road_points)
     while len(ramps) < count and attempts < max_attempts:
-        attempts += 1; radius = random.uniform(const.RAMP_MIN_RADIUS, const.RAMP_MAX_RADIUS); object_radius = radius
-        margin = 0.90; wx = random.uniform(-const.WORLD_BOUNDS*margin,const.WORLD_BOUNDS*margin); wy = random.uniform(-const.WORLD_BOUNDS*margin,const.WORLD_BOUNDS*margin); pos = (wx, wy)
+        attempts += 1; radius = course_random.uniform(const.RAMP_MIN_RADIUS, const.RAMP_MAX_RADIUS); object_radius = radius
+        margin = 0.90; wx = course_random.uniform(-const.WORLD_BOUNDS*margin,const.WORLD_BOUNDS*margin); wy = course_random.uniform(-const.WORLD_BOUNDS*margin,const.WORLD_BOUNDS*margin); pos = (wx, wy)
         if distance_sq(pos, (sf_line_x, sf_line_center_y)) < sf_avoid_radius_sq: continue
         if is_too_close(pos, existing_objects + ramps, min_dist_sq_ramp): continue
-        on_road_or_too_close = False
-        if centerline_road_points and len(centerline_road_points) >= 2:
-            min_safe_dist_from_road_center_sq = (road_width / 2.0 + object_radius + road_clearance_buffer)**2
-            for i in range(len(centerline_road_points) - 1):
-                road_p1 = centerline_road_points[i]; road_p2 = centerline_road_points[i+1]
-                if point_segment_distance_sq(pos, road_p1, road_p2) < min_safe_dist_from_road_center_sq: on_road_or_too_close = True; break
-        if on_road_or_too_close: continue 
+        min_safe_dist_from_road_center_sq = (road_width / 2.0 + object_radius + road_clearance_buffer)**2
+        if is_too_close_to_road(pos, road_segments, min_safe_dist_from_road_center_sq): continue 
         ramps.append(Ramp(wx, wy, radius))
     if attempts >= max_attempts and len(ramps) < count: print(f"Warning: CourseGen - Could only generate {len(ramps)}/{count} ramps.")
     return ramps
@@ -330,9 +343,10 @@ def generate_random_hills(count, existing_objects, start_finish_line_coords, cou
     sf_line_x = start_finish_line_coords[0][0]; sf_line_y_min = min(start_finish_line_coords[0][1],start_finish_line_coords[1][1])
     sf_line_y_max = max(start_finish_line_coords[0][1],start_finish_line_coords[1][1]); sf_avoid_buffer_hill = 100
     road_clearance_buffer = 30 
+    road_segments = road_centerline_segments(centerline_road_points)
     while len(hills) < count and attempts < max_attempts:
-        attempts += 1; diameter = random.uniform(const.MIN_HILL_SIZE, const.MAX_HILL_SIZE); object_radius = diameter / 2.0
-        margin_factor = 0.95; wx = random.uniform(-const.WORLD_BOUNDS*margin_factor,const.WORLD_BOUNDS*margin_factor); wy = random.uniform(-const.WORLD_BOUNDS*margin_factor,const.WORLD_BOUNDS*margin_factor); pos = (wx, wy)
+        attempts += 1; diameter = course_random.uniform(const.MIN_HILL_SIZE, const.MAX_HILL_SIZE); object_radius = diameter / 2.0
+        margin_factor = 0.95; wx = course_random.uniform(-const.WORLD_BOUNDS*margin_factor,const.WORLD_BOUNDS*margin_factor); wy = course_random.uniform(-const.WORLD_BOUNDS*margin_factor,const.WORLD_BOUNDS*margin_factor); pos = (wx, wy)
         if abs(wx - sf_line_x) < (object_radius + sf_avoid_buffer_hill) and \
            (sf_line_y_min - object_radius - sf_avoid_buffer_hill) < wy < (sf_line_y_max + object_radius + sf_avoid_buffer_hill): continue
         too_close_to_course_cp = False
@@ -343,13 +357,108 @@ def generate_random_hills(count, existing_objects, start_finish_line_coords, cou
         if is_too_close(pos, hills, min_dist_sq_hill_to_hill): continue
         min_dist_sq_hill_to_other = (object_radius + const.MIN_OBJ_SEPARATION * 0.3)**2
         if is_too_close(pos, existing_objects, min_dist_sq_hill_to_other): continue
-        on_road_or_too_close = False
-        if centerline_road_points and len(centerline_road_points) >= 2:
-            min_safe_dist_from_road_center_sq = (road_width / 2.0 + object_radius + road_clearance_buffer)**2
-            for i in range(len(centerline_road_points) - 1):
-                road_p1 = centerline_road_points[i]; road_p2 = centerline_road_points[i+1]
-                if point_segment_distance_sq(pos, road_p1, road_p2) < min_safe_dist_from_road_center_sq: on_road_or_too_close = True; break
-        if on_road_or_too_close: continue
+        min_safe_dist_from_road_center_sq = (road_width / 2.0 + object_radius + road_clearance_buffer)**2
+        if is_too_close_to_road(pos, road_segments, min_safe_dist_from_road_center_sq): continue
         hills.append(VisualHill(wx, wy, diameter))
     if attempts >= max_attempts and len(hills) < count: print(f"Warning: CourseGen - Could only generate {len(hills)}/{count} visual hills.")
-    return hills
\ No newline at end of file
+    return hills
+
+
+# --- Full Course Assembly ---
+class Course:
+    """
+    Bundles every generated element of a race course so it can be handed around
+    (simulation, rendering, tools) as a single object.
+    """
+    def __init__(self, checkpoints, course_checkpoints_coords, centerline_road_points, road_segments_polygons,
+                 mud_patches, ramps, visual_hills, start_finish_line=None):
+        self.checkpoints = checkpoints # Two S/F gate markers first, then the course checkpoints in order
+        self.course_checkpoints_coords = course_checkpoints_coords
+        self.centerline_road_points = centerline_road_points
+        self.road_segments_polygons = road_segments_polygons
+        self.mud_patches = mud_patches
+        self.ramps = ramps
+        self.visual_hills = visual_hills
+        self.start_finish_line = start_finish_line if start_finish_line else const.START_FINISH_LINE
+        self.rebuild_lookups()
+
+    def rebuild_lookups(self):
+        """Rebuilds the spatial indices, the surface map, the trigger zones and the track frame. Call again after replacing any element list."""
+        self.build_spatial_index()
+        self.surface_map = SurfaceMap.from_course(self)
+        self.trigger_map = TriggerMap.from_course(self)
+        self.track_frame = TrackFrame(self.centerline_road_points)
+        sf_mid = ((self.start_finish_line[0][0] + self.start_finish_line[1][0]) / 2.0, (self.start_finish_line[0][1] + self.start_finish_line[1][1]) / 2.0)
+        self.lap_start_s = self.track_frame.project(*sf_mid, s_hint=0.0)[0] # The centreline crosses the line twice; laps start at the first
+
+    def build_spatial_index(self):
+        """Files mud patches, ramps, hills and road polygons into grid indices for draw culling."""
+        self.mud_index = SpatialIndex()
+        for mud in self.mud_patches: self.mud_index.insert_rect(mud, mud.rect)
+        self.ramp_index = SpatialIndex()
+        for ramp_obj in self.ramps:
+            self.ramp_index.insert(ramp_obj, ramp_obj.world_x - ramp_obj.radius, ramp_obj.world_y - ramp_obj.radius,
+                                   ramp_obj.world_x + ramp_obj.radius, ramp_obj.world_y + ramp_obj.radius)
+        self.hill_index = SpatialIndex()
+        for hill in self.visual_hills:
+            self.hill_index.insert(hill, hill.world_x - hill.radius, hill.world_y - hill.radius,
+                                   hill.world_x + hill.radius, hill.world_y + hill.radius)
+        self.road_index = SpatialIndex()
+        for road_poly in self.road_segments_polygons:
+            xs = [p[0] for p in road_poly]; ys = [p[1] for p in road_poly]
+            self.road_index.insert(road_poly, min(xs), min(ys), max(xs), max(ys))
+
+    def view_bounds(self, cam_offset_x, cam_offset_y):
+        """World-space (min_x, min_y, max_x, max_y) of the screen when centred on the camera offset."""
+        min_x = cam_offset_x - const.CENTER_X; min_y = cam_offset_y - const.CENTER_Y
+        return min_x, min_y, min_x + const.SCREEN_WIDTH, min_y + const.SCREEN_HEIGHT
+
+    @property
+    def num_course_checkpoints(self):
+        return len(self.course_checkpoints_coords)
+
+
+def generate_course(num_checkpoints, start_finish_line_coords=None):
+    """
+    Generates a complete course: checkpoints, road, mud patches, ramps and hills.
+    Uses the same placement rules (and order of random draws) as the setup screen always has.
+    """
+    sf_line = start_finish_line_coords if start_finish_line_coords else const.START_FINISH_LINE
+    course_checkpoints_coords = generate_random_checkpoints(num_checkpoints, [], sf_line)
+    checkpoints = [Checkpoint(sf_line[0][0], sf_line[0][1], -1, is_gate=True),
+                   Checkpoint(sf_line[1][0], sf_line[1][1], -1, is_gate=True)]
+    for i_cp, (cx_cp, cy_cp) in enumerate(course_checkpoints_coords): checkpoints.append(Checkpoint(cx_cp, cy_cp, i_cp))
+
+    all_obstacles_for_gen = list(checkpoints)
+
+    if hasattr(const, 'ROAD_WIDTH') and const.ROAD_WIDTH > 0:
+        centerline_road_points, road_segments_polygons = generate_road_path(checkpoints, sf_line, const.ROAD_WIDTH)
+    else:
+        centerline_road_points = []
+        road_segments_polygons = []
+
+    mud_patches = generate_random_mud_patches(
+        const.NUM_MUD_PATCHES, all_obstacles_for_gen,
+        sf_line, course_checkpoints_coords,
+        centerline_road_points, const.ROAD_WIDTH
+    )
+    all_obstacles_for_gen.extend(mud_patches)
+
+    ramps = generate_random_ramps(
+        const.NUM_RAMPS, all_obstacles_for_gen,
+        sf_line,
+        centerline_road_points, const.ROAD_WIDTH
+    )
+    all_obstacles_for_gen.extend(ramps)
+
+    if hasattr(const, 'NUM_VISUAL_HILLS') and const.NUM_VISUAL_HILLS > 0:
+        visual_hills = generate_random_hills(
+            const.NUM_VISUAL_HILLS, all_obstacles_for_gen,
+            sf_line, course_checkpoints_coords,
+            centerline_road_points, const.ROAD_WIDTH
+        )
+    else:
+        visual_hills = []
+
+    return Course(checkpoints, course_checkpoints_coords, centerline_road_points, road_segments_polygons,
+                  mud_patches, ramps, visual_hills, sf_line)
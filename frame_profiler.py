@@ -0,0 +1,218 @@
+# rally_racer_project/frame_profiler.py
+# This file contains FrameProfiler, a lightweight per-frame timer for the phases of the main
+# loop (events, AI, surface detection, physics, drawing, flip...). Each frame's phase times go
+# into a fixed-size ring buffer so rolling mean/p95/max can be shown in an overlay or exported.
+# CProfileCapture and MemoryCapture record function-level profiles and allocation sites over the
+# next N frames of a real session.
+
+import cProfile
+import csv
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+import numpy as np
+
+import constants as const
+
+
+class FrameProfiler:
+    """
+    Times named phases of each frame. Top-level phases are switched lap-style with switch(name);
+    section(name) times a nested phase and its time is excluded from the enclosing phase, so
+    per-frame phase times always add up to the frame time.
+    """
+    def __init__(self, history_frames=const.PROFILER_HISTORY_FRAMES):
+        """
+        Args:
+            history_frames (int, optional): Number of most recent frames kept in the ring buffers.
+        """
+        self.history_frames = history_frames
+        self.phase_history = {} # Phase name -> ring buffer of per-frame seconds
+        self.frames_recorded = 0
+        self._frame_times = {}
+        self._stack = [] # [name, start_time, seconds spent in nested sections]
+
+    # --- Timing ---
+    def begin_frame(self):
+        self._frame_times = {}; self._stack = []
+
+    def push(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def pop(self):
+        name, start_time, nested_seconds = self._stack.pop()
+        elapsed = time.perf_counter() - start_time
+        self._frame_times[name] = self._frame_times.get(name, 0.0) + elapsed - nested_seconds
+        if self._stack: self._stack[-1][2] += elapsed
+
+    def switch(self, name):
+        """Ends the running top-level phase (if any) and starts name."""
+        while self._stack: self.pop()
+        self.push(name)
+
+    @contextmanager
+    def section(self, name):
+        self.push(name)
+        try:
+            yield
+        finally:
+            self.pop()
+
+    def end_frame(self):
+        """Closes any running phases and stores this frame's times in the ring buffers."""
+        while self._stack: self.pop()
+        slot = self.frames_recorded % self.history_frames
+        for name in self._frame_times:
+            if name not in self.phase_history:
+                self.phase_history[name] = np.zeros(self.history_frames)
+        for name, history in self.phase_history.items():
+            history[slot] = self._frame_times.get(name, 0.0)
+        self.frames_recorded += 1
+
+    # --- Reporting ---
+    def _filled_frames(self):
+        return min(self.frames_recorded, self.history_frames)
+
+    def _chronological(self, history):
+        count = self._filled_frames()
+        if self.frames_recorded <= self.history_frames: return history[:count]
+        slot = self.frames_recorded % self.history_frames
+        return np.concatenate((history[slot:], history[:slot]))
+
+    def stats(self):
+        """
+        Returns:
+            list: (phase, mean_ms, p95_ms, max_ms) per phase over the buffered frames, slowest mean
+                first, followed by a 'frame' row for the whole frame.
+        """
+        count = self._filled_frames()
+        if count == 0: return []
+        rows = []
+        for name, history in self.phase_history.items():
+            samples = history[:count] * 1000.0
+            rows.append((name, float(samples.mean()), float(np.percentile(samples, 95)), float(samples.max())))
+        rows.sort(key=lambda row: row[1], reverse=True)
+        frame_samples = sum(history[:count] for history in self.phase_history.values()) * 1000.0
+        rows.append(("frame", float(frame_samples.mean()), float(np.percentile(frame_samples, 95)), float(frame_samples.max())))
+        return rows
+
+    def export_csv(self, path):
+        """Writes one row per buffered frame (oldest first) with each phase's time in milliseconds."""
+        names = sorted(self.phase_history)
+        columns = [self._chronological(self.phase_history[name]) * 1000.0 for name in names]
+        first_frame = self.frames_recorded - self._filled_frames()
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["frame"] + [f"{name}_ms" for name in names])
+            for i in range(self._filled_frames()):
+                writer.writerow([first_frame + i] + [f"{column[i]:.4f}" for column in columns])
+        return path
+
+
+class NullProfiler:
+    """Stand-in with the FrameProfiler timing interface that records nothing."""
+    _null_section = nullcontext()
+
+    def begin_frame(self): pass
+    def switch(self, name): pass
+    def end_frame(self): pass
+    def section(self, name): return self._null_section
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class CProfileCapture:
+    """Runs cProfile over the next N frames and writes the result to a .pstats file."""
+    def __init__(self):
+        self._profile = None
+        self.frames_left = 0
+        self.path = None
+
+    @property
+    def active(self):
+        return self._profile is not None
+
+    def start(self, frames, path):
+        """Starts profiling; ignored while a capture is already running."""
+        if self.active or frames <= 0: return
+        self.frames_left = frames; self.path = path
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def end_frame(self):
+        """
+        Call once per frame.
+
+        Returns:
+            str: The .pstats path on the frame the capture completes, otherwise None.
+        """
+        if not self.active: return None
+        self.frames_left -= 1
+        if self.frames_left > 0: return None
+        self._profile.disable()
+        self._profile.dump_stats(self.path)
+        self._profile = None
+        return self.path
+
+
+class MemoryCapture:
+    """
+    Takes tracemalloc snapshots N frames apart and writes the allocation sites that grew the most
+    to a text report. Tracing is started for the capture and stopped again afterwards, so normal
+    play pays no tracemalloc overhead.
+    """
+    _filters = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self, top_sites=const.MEMORY_CAPTURE_TOP_SITES, traceback_depth=const.MEMORY_CAPTURE_TRACEBACK_DEPTH):
+        self.top_sites = top_sites
+        self.traceback_depth = traceback_depth
+        self.frames_left = 0
+        self.path = None
+        self._before = None
+        self._started_tracing = False
+
+    @property
+    def active(self):
+        return self._before is not None
+
+    def start(self, frames, path):
+        """Takes the 'before' snapshot; ignored while a capture is already running."""
+        if self.active or frames <= 0: return
+        self.frames_left = frames; self.path = path
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing: tracemalloc.start(self.traceback_depth)
+        tracemalloc.reset_peak() # Peak in the report covers only the captured frames
+        self._before = tracemalloc.take_snapshot().filter_traces(self._filters)
+
+    def end_frame(self):
+        """
+        Call once per frame.
+
+        Returns:
+            str: The report path on the frame the capture completes, otherwise None.
+        """
+        if not self.active: return None
+        self.frames_left -= 1
+        if self.frames_left > 0: return None
+        after = tracemalloc.take_snapshot().filter_traces(self._filters)
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        if self._started_tracing: tracemalloc.stop()
+        self.write_report(after.compare_to(self._before, "lineno"), traced_current, traced_peak)
+        self._before = None
+        return self.path
+
+    def write_report(self, diff_stats, traced_current, traced_peak):
+        """Writes the top allocation sites by size growth, then by allocation count."""
+        by_count = sorted(diff_stats, key=lambda stat: abs(stat.count_diff), reverse=True)
+        with open(self.path, "w") as report_file:
+            report_file.write(f"Traced memory: {traced_current / 1024:.1f} KiB current, {traced_peak / 1024:.1f} KiB peak\n")
+            report_file.write(f"\nTop {self.top_sites} allocation sites by size growth:\n")
+            for stat in diff_stats[:self.top_sites]: report_file.write(f"{stat}\n")
+            report_file.write(f"\nTop {self.top_sites} allocation sites by block count change:\n")
+            for stat in by_count[:self.top_sites]: report_file.write(f"{stat}\n")
+        return self.path
@@ -1,39 +1,136 @@
 import pygame
-import random
 import math
 import time
-import numpy as np
-from collections import deque
+import argparse
 from enum import Enum, auto
 
 # Import from your new modules
 import constants as const
-from utils import (
-    deg_to_rad, rad_to_deg, angle_difference, normalize_angle,
-    lerp, distance_sq, clamp, check_line_crossing,
-    is_point_in_polygon # Added for road collision
-)
+import rng
+from utils import clamp
 from sound_manager import generate_sound_array
-from course_generator import (
-    generate_random_checkpoints, generate_random_mud_patches,
-    generate_random_ramps, is_too_close, generate_random_hills,
-    generate_road_path
-)
 from ui_elements import (
     draw_button, draw_rpm_gauge, draw_pedal_indicator,
-    draw_handbrake_indicator, draw_map, draw_scrolling_track, format_time
+    draw_handbrake_indicator, draw_map, draw_scrolling_track, format_time,
+    draw_profiler_overlay, draw_standings
 )
+from frame_profiler import FrameProfiler, CProfileCapture, MemoryCapture, NULL_PROFILER
+from race_simulation import RaceSimulation, run_headless_race
+from tire_tracks import TireTrackLayer
 
 # Import classes
-from classes import Car, Particle, DustParticle, MudParticle, Ramp, MudPatch, Checkpoint
+from classes import Car
 
 
 # GameState Enum
 class GameState(Enum):
     SETUP = auto(); COUNTDOWN = auto(); RACING = auto(); FINISHED = auto()
 
+def position_car_for_drawing(car, cam_offset_x, cam_offset_y, alpha):
+    """Places a car on screen at its pose interpolated between the last two physics steps."""
+    render_x, render_y, render_heading = car.interpolated_pose(alpha)
+    car.screen_x = const.CENTER_X + (render_x - cam_offset_x)
+    car.screen_y = const.CENTER_Y + (render_y - cam_offset_y)
+    car.set_render_pose(render_heading)
+
+def time_scale_label(time_scale):
+    return "max" if math.isinf(time_scale) else f"{time_scale:g}x"
+
+def simulation_done(sim, max_race_time=const.HEADLESS_MAX_RACE_TIME):
+    """Whether the race needs no more steps: every car has finished or the race-time cap is reached."""
+    return sim.all_finished or sim.race_time >= max_race_time
+
+def advance_simulation(sim, physics_dt, physics_accumulator, frame_dt, time_scale, player_inputs, render_fps, tire_tracks=None,
+                       max_race_time=const.HEADLESS_MAX_RACE_TIME):
+    """
+    Runs the fixed-step physics for one rendered frame. time_scale simulated seconds pass per real
+    second and only the final state is drawn, so intermediate steps are never rendered. An infinite
+    time_scale steps for a fixed share of the frame's wall time instead. Either way stepping stops
+    as soon as simulation_done(), so the result never depends on how fast the machine is.
+
+    Returns:
+        tuple: (physics_accumulator, render_alpha) for the next frame.
+    """
+    def run_step():
+        sim.step(physics_dt, player_inputs)
+        if tire_tracks is not None:
+            with sim.profiler.section("tire_tracks"):
+                for car_obj, full_detail in zip(sim.cars, sim.full_detail):
+                    if full_detail: car_obj.leave_tire_tracks(tire_tracks, sim.time_s)
+
+    if math.isinf(time_scale):
+        step_deadline = time.perf_counter() + const.MAX_SPEED_FRAME_BUDGET / render_fps
+        while not simulation_done(sim, max_race_time) and time.perf_counter() < step_deadline:
+            run_step()
+        return 0.0, 1.0
+
+    # Fixed-step physics: run as many whole steps as (scaled) real time allows, then render in between them
+    max_steps = int(const.MAX_PHYSICS_STEPS_PER_FRAME * time_scale)
+    physics_accumulator += frame_dt * time_scale; steps_this_frame = 0
+    while physics_accumulator >= physics_dt and steps_this_frame < max_steps:
+        if simulation_done(sim, max_race_time): return 0.0, 1.0 # Nothing left to interpolate towards
+        run_step()
+        physics_accumulator -= physics_dt; steps_this_frame += 1
+    if steps_this_frame >= max_steps:
+        physics_accumulator = min(physics_accumulator, physics_dt)
+    return physics_accumulator, clamp(physics_accumulator / physics_dt, 0.0, 1.0)
+
+def next_checkpoint_map_index(sim):
+    """Index into course.checkpoints of the player's next checkpoint, or -1 when none is highlighted."""
+    player_car = sim.player_car
+    if player_car and player_car.race_started and not player_car.race_finished_for_car \
+            and 0 <= sim.player_next_checkpoint_index < sim.num_course_checkpoints:
+        return sim.player_next_checkpoint_index + 2
+    return -1
+
+def draw_world_background(screen, course, cam_offset_x, cam_offset_y, tire_tracks=None, profiler=NULL_PROFILER, time_s=0.0):
+    """Draws the grass, road and hills, then the visible tire tracks, faded to simulated time time_s."""
+    profiler.switch("track")
+    if course:
+        view_bounds = course.view_bounds(cam_offset_x, cam_offset_y)
+        draw_scrolling_track(screen, cam_offset_x, cam_offset_y,
+                             course.hill_index.query(*view_bounds), course.road_index.query(*view_bounds))
+    else:
+        draw_scrolling_track(screen, cam_offset_x, cam_offset_y)
+
+    profiler.switch("tire_tracks")
+    if tire_tracks is not None:
+        tire_tracks.draw(screen, cam_offset_x, cam_offset_y, time_s)
+
+def draw_race_world(screen, sim, cam_offset_x, cam_offset_y, render_alpha, highlighted_cp_idx=-1, profiler=NULL_PROFILER):
+    """Draws everything that lives in the world during a race: particles, mud, ramps, lines, checkpoints and cars."""
+    course = sim.course
+    profiler.switch("particles")
+    sim.particles.draw(screen, cam_offset_x, cam_offset_y)
+    profiler.switch("course_objects")
+    view_bounds = course.view_bounds(cam_offset_x, cam_offset_y)
+    for mud in course.mud_index.query(*view_bounds): mud.draw(screen, cam_offset_x, cam_offset_y)
+    visible_ramps = course.ramp_index.query(*view_bounds)
+    for ramp_obj in visible_ramps: ramp_obj.draw(screen, cam_offset_x, cam_offset_y)
+    if const.DEBUG_DRAW_RAMPS:
+        for ramp_obj in visible_ramps: ramp_obj.draw_debug(screen, cam_offset_x, cam_offset_y)
+    sf_p1_screen = (int(const.START_FINISH_LINE[0][0] - cam_offset_x + const.CENTER_X), int(const.START_FINISH_LINE[0][1] - cam_offset_y + const.CENTER_Y))
+    sf_p2_screen = (int(const.START_FINISH_LINE[1][0] - cam_offset_x + const.CENTER_X), int(const.START_FINISH_LINE[1][1] - cam_offset_y + const.CENTER_Y))
+    pygame.draw.line(screen, const.START_FINISH_LINE_COLOR, sf_p1_screen, sf_p2_screen, const.START_FINISH_WIDTH)
+    for i, cp_obj in enumerate(course.checkpoints): cp_obj.draw(screen, cam_offset_x, cam_offset_y, (i == highlighted_cp_idx))
+    profiler.switch("cars")
+    for car_obj in sim.ai_cars + ([sim.player_car] if sim.player_car else []): # Player drawn last, on top
+        position_car_for_drawing(car_obj, cam_offset_x, cam_offset_y, render_alpha); car_obj.draw(screen)
+
 # --- Main Game Function ---
-def main():
+def main(render_fps=const.RENDER_FPS, physics_hz=const.PHYSICS_HZ, physics_backend=const.DEFAULT_PHYSICS_BACKEND,
+         time_scale_index=const.DEFAULT_TIME_SCALE_INDEX, seed=None, cprofile_frames=None, memory_frames=None,
+         max_race_time=const.HEADLESS_MAX_RACE_TIME):
+    """
+    Runs the windowed game.
+
+    Args:
+        cprofile_frames (int, optional): When set, a cProfile capture of this many frames starts as each
+            race goes green. Also sets the length of F5 captures.
+        memory_frames (int, optional): The same for tracemalloc snapshot captures (F6).
+        max_race_time (float, optional): Simulated seconds before the cars still on course stop being simulated.
+    """
+    race_seed = rng.seed_all(seed) # A fixed seed replays the same course and AI on every Start Race
     # --- Pygame and Mixer Initialization ---
     pygame.mixer.pre_init(const.SAMPLE_RATE, -16, 2, 512)
     pygame.init()
@@ -42,16 +139,7 @@ def main():
     pygame.display.set_caption("Rally Racer")
     clock = pygame.time.Clock()
 
-    # --- Tire Tracks Surface ---
-    world_surface_size = (const.WORLD_BOUNDS * 2, const.WORLD_BOUNDS * 2)
-    try:
-        tire_tracks_surface = pygame.Surface(world_surface_size, pygame.SRCALPHA)
-        tire_tracks_surface.fill((0, 0, 0, 0)) 
-    except pygame.error as e:
-        print(f"Error creating tire_tracks_surface (possibly too large for hardware): {e}")
-        print(f"Attempted size: {world_surface_size}")
-        tire_tracks_surface = pygame.Surface((const.SCREEN_WIDTH, const.SCREEN_HEIGHT), pygame.SRCALPHA)
-        tire_tracks_surface.fill((0,0,0,0)) 
+    tire_tracks = TireTrackLayer()
 
     font = pygame.font.Font(None, 40)
     title_font = pygame.font.Font(None, 72)
@@ -60,6 +148,7 @@ def main():
     ui_font_small = pygame.font.Font(None, 24)
     option_font = pygame.font.Font(None, 40)
     countdown_font = pygame.font.Font(None, 150)
+    profiler_font = pygame.font.SysFont("monospace", 16)
 
     # --- Sound Loading/Generation ---
     try:
@@ -87,10 +176,7 @@ def main():
 
     player_car = Car(const.CENTER_X, const.CENTER_Y)
     ai_cars = []
-    mud_patches = []; checkpoints = []; course_checkpoints_coords = []; ramps = []
-    visual_hills = []
-    road_segments_polygons = []
-    centerline_road_points = [] 
+    sim = None; course = None
 
     selected_laps = const.DEFAULT_RACE_LAPS
     top_speed_options = [50, 75, 100, 125, 150, 200, 250]
@@ -101,7 +187,7 @@ def main():
     max_checkpoints = const.MAX_CHECKPOINTS_ALLOWED
     selected_num_ai = const.DEFAULT_NUM_AI
     max_ai = const.MAX_AI_OPPONENTS
-    difficulty_options = ["Easy", "Medium", "Hard", "Random"]
+    difficulty_options = const.AI_DIFFICULTY_OPTIONS
     selected_difficulty_index = const.DEFAULT_DIFFICULTY_INDEX
 
     laps_label_pos = (const.OPTION_LABEL_X, const.OPTION_Y_START + 0 * const.ROW_SPACING)
@@ -133,24 +219,37 @@ def main():
 
     game_state = GameState.SETUP
     total_laps = selected_laps
-    player_current_lap = 0; player_next_checkpoint_index = -1
-    player_lap_times = []; player_lap_start_time = 0.0
-    player_race_started = False; player_race_finished = False
-    player_last_line_crossing_time = -const.LINE_CROSSING_DEBOUNCE
-    player_final_total_time = 0.0
     countdown_timer = 0; countdown_stage = 0
     world_offset_x = 0.0; world_offset_y = 0.0; course_generated = False
-    total_race_start_time = 0.0
+    physics_dt = 1.0 / physics_hz; physics_accumulator = 0.0
+    render_alpha = 1.0 # Fraction of a physics step the renderer is ahead of the last simulated state
+    time_scale = const.TIME_SCALE_OPTIONS[time_scale_index] # Simulated seconds per real second while racing
+
+    profiler = FrameProfiler(); show_profiler_overlay = False
+    cprofile_capture = CProfileCapture(); memory_capture = MemoryCapture()
+    cprofile_capture_frames = cprofile_frames or const.CPROFILE_CAPTURE_FRAMES
+    memory_capture_frames = memory_frames or const.MEMORY_CAPTURE_FRAMES
 
     running = True
     while running:
-        dt = clock.tick(60) / 1000.0; dt = min(dt, 0.1)
-        if dt <= 0: dt = 1/60.0
+        profiler.begin_frame(); profiler.switch("idle")
+        frame_dt = clock.tick(render_fps) / 1000.0; frame_dt = min(frame_dt, const.MAX_FRAME_TIME)
+        profiler.switch("events")
         current_time_s = pygame.time.get_ticks() / 1000.0
         mouse_pos = pygame.mouse.get_pos()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT: running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_t:
+                time_scale_index = (time_scale_index + 1) % len(const.TIME_SCALE_OPTIONS)
+                time_scale = const.TIME_SCALE_OPTIONS[time_scale_index]; physics_accumulator = 0.0
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3: show_profiler_overlay = not show_profiler_overlay
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                print(f"Frame profile written to {profiler.export_csv(time.strftime('frame_profile_%Y%m%d_%H%M%S.csv'))}")
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                cprofile_capture.start(cprofile_capture_frames, time.strftime('cprofile_%Y%m%d_%H%M%S.pstats'))
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F6:
+                memory_capture.start(memory_capture_frames, time.strftime('memory_%Y%m%d_%H%M%S.txt'))
             if game_state == GameState.SETUP:
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     if laps_minus_rect.collidepoint(event.pos): selected_laps = max(1, selected_laps - 1)
@@ -166,65 +265,19 @@ def main():
                     elif difficulty_minus_rect.collidepoint(event.pos): selected_difficulty_index = (selected_difficulty_index - 1 + len(difficulty_options)) % len(difficulty_options)
                     elif difficulty_plus_rect.collidepoint(event.pos): selected_difficulty_index = (selected_difficulty_index + 1) % len(difficulty_options)
                     elif start_button_rect.collidepoint(event.pos):
-                        if tire_tracks_surface:
-                            tire_tracks_surface.fill((0, 0, 0, 0))
+                        tire_tracks.clear()
                         
-                        player_car.apply_setup(top_speed_options[selected_speed_index], grip_options[selected_grip_index])
-                        ai_cars = []
-                        for i in range(selected_num_ai):
-                            ai_unique_color = const.AI_AVAILABLE_COLORS[i % len(const.AI_AVAILABLE_COLORS)]
-                            ai_car_instance = Car(0, 0, is_ai=True, unique_body_color=ai_unique_color)
-                            ai_car_instance.apply_setup(top_speed_options[selected_speed_index], grip_options[selected_grip_index])
-                            ai_car_instance.apply_ai_difficulty(selected_difficulty_index, difficulty_options)
-                            ai_cars.append(ai_car_instance)
-
-                        course_checkpoints_coords = generate_random_checkpoints(selected_num_checkpoints, [], const.START_FINISH_LINE)
-                        checkpoints = [Checkpoint(const.START_FINISH_LINE[0][0], const.START_FINISH_LINE[0][1], -1, is_gate=True),
-                                       Checkpoint(const.START_FINISH_LINE[1][0], const.START_FINISH_LINE[1][1], -1, is_gate=True)]
-                        for i_cp, (cx_cp, cy_cp) in enumerate(course_checkpoints_coords): checkpoints.append(Checkpoint(cx_cp, cy_cp, i_cp))
-                        
-                        all_obstacles_for_gen = list(checkpoints) 
-
-                        if hasattr(const, 'ROAD_WIDTH') and const.ROAD_WIDTH > 0:
-                            centerline_road_points, road_segments_polygons = generate_road_path(
-                                checkpoints, const.START_FINISH_LINE, const.ROAD_WIDTH
-                            )
-                        else:
-                            centerline_road_points = []
-                            road_segments_polygons = []
-
-                        mud_patches = generate_random_mud_patches(
-                            const.NUM_MUD_PATCHES, all_obstacles_for_gen, 
-                            const.START_FINISH_LINE, course_checkpoints_coords,
-                            centerline_road_points, const.ROAD_WIDTH 
-                        )
-                        all_obstacles_for_gen.extend(mud_patches)
-
-                        ramps = generate_random_ramps(
-                            const.NUM_RAMPS, all_obstacles_for_gen, 
-                            const.START_FINISH_LINE,
-                            centerline_road_points, const.ROAD_WIDTH 
+                        race_seed = rng.seed_all(seed)
+                        sim = RaceSimulation.create(
+                            selected_laps, selected_num_checkpoints, selected_num_ai, selected_difficulty_index,
+                            top_speed_options[selected_speed_index], grip_options[selected_grip_index],
+                            player_car=player_car, physics_backend=physics_backend
                         )
-                        all_obstacles_for_gen.extend(ramps)
-
-                        if hasattr(const, 'NUM_VISUAL_HILLS') and const.NUM_VISUAL_HILLS > 0:
-                            visual_hills = generate_random_hills(
-                                const.NUM_VISUAL_HILLS, all_obstacles_for_gen,
-                                const.START_FINISH_LINE, course_checkpoints_coords,
-                                centerline_road_points, const.ROAD_WIDTH
-                            )
-                        else:
-                            visual_hills = []
+                        course = sim.course; ai_cars = sim.ai_cars; sim.profiler = profiler
+                        sim.lod_focus_car = player_car # Cars far off screen drop to reduced detail
                         
                         course_generated = True
                         game_state = GameState.COUNTDOWN; countdown_timer = current_time_s + 3.0; countdown_stage = 1
-                        player_start_world_x, player_start_world_y = 0.0, 20.0
-                        player_car.reset_position(player_start_world_x, player_start_world_y)
-                        for i, ai_car_instance in enumerate(ai_cars):
-                            row_num = (i // 2) + 1; col_num = i % 2
-                            ai_start_x = (col_num - 0.5) * player_car.collision_radius * 2.5
-                            ai_start_y = player_start_world_y - (row_num * player_car.collision_radius * 3.0)
-                            ai_car_instance.reset_position(ai_start_x, ai_start_y)
                         world_offset_x = player_car.world_x; world_offset_y = player_car.world_y
                         if sounds_loaded:
                             if engine_channel: engine_channel.stop()
@@ -234,12 +287,12 @@ def main():
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     if new_race_button_rect.collidepoint(event.pos):
                         game_state = GameState.SETUP; course_generated = False
-                        visual_hills = []
-                        road_segments_polygons = [] 
-                        centerline_road_points = []
+                        if sim.fleet: sim.fleet.release()
+                        sim = None; course = None
                         if sounds_loaded and engine_channel and skid_channel:
                             engine_channel.stop(); skid_channel.stop()
 
+        profiler.switch("update")
         if game_state == GameState.SETUP:
              pass
         elif game_state == GameState.COUNTDOWN:
@@ -256,14 +309,11 @@ def main():
                     elif countdown_stage == 4:
                         if beep_low_sound: sfx_channel.play(beep_low_sound)
                         game_state = GameState.RACING; total_laps = selected_laps
-                        player_current_lap = 0; player_next_checkpoint_index = -1; player_lap_times = []
-                        player_lap_start_time = 0.0; player_race_started = False; player_race_finished = False
-                        player_last_line_crossing_time = -const.LINE_CROSSING_DEBOUNCE; player_final_total_time = 0.0
-                        for ai in ai_cars:
-                            ai.race_started = False; ai.current_lap = 0; ai.lap_times = []
-                            ai.ai_target_checkpoint_index = 0; ai.last_line_crossing_time = -const.LINE_CROSSING_DEBOUNCE
-                            ai.race_finished_for_car = False
-                        total_race_start_time = current_time_s
+                        sim.start_race(); physics_accumulator = 0.0
+                        if cprofile_frames:
+                            cprofile_capture.start(cprofile_frames, time.strftime('cprofile_%Y%m%d_%H%M%S.pstats'))
+                        if memory_frames:
+                            memory_capture.start(memory_frames, time.strftime('memory_%Y%m%d_%H%M%S.txt'))
                         if sounds_loaded and engine_sound and engine_channel:
                             engine_channel.play(engine_sound, loops=-1)
                             engine_channel.set_volume(const.ENGINE_MIN_VOL)
@@ -272,79 +322,16 @@ def main():
 
         elif game_state == GameState.RACING:
             keys = pygame.key.get_pressed()
-            if not player_race_finished:
-                 player_car.set_controls(
-                    1.0 if keys[pygame.K_UP] or keys[pygame.K_w] else 0.0,
-                    1.0 if keys[pygame.K_DOWN] or keys[pygame.K_s] else 0.0,
-                    (1.0 if keys[pygame.K_RIGHT] or keys[pygame.K_d] else 0.0) - (1.0 if keys[pygame.K_LEFT] or keys[pygame.K_a] else 0.0),
-                    1.0 if keys[pygame.K_SPACE] else 0.0)
-            else: player_car.set_controls(0,0.2,0,0)
+            player_inputs = (
+                1.0 if keys[pygame.K_UP] or keys[pygame.K_w] else 0.0,
+                1.0 if keys[pygame.K_DOWN] or keys[pygame.K_s] else 0.0,
+                (1.0 if keys[pygame.K_RIGHT] or keys[pygame.K_d] else 0.0) - (1.0 if keys[pygame.K_LEFT] or keys[pygame.K_a] else 0.0),
+                1.0 if keys[pygame.K_SPACE] else 0.0)
+            physics_accumulator, render_alpha = advance_simulation(
+                sim, physics_dt, physics_accumulator, frame_dt, time_scale, player_inputs, render_fps, tire_tracks, max_race_time)
 
-            for ai in ai_cars:
-                ai.update_ai(dt, checkpoints, len(course_checkpoints_coords), total_laps, current_time_s)
-
-            cars_to_update_physics = [player_car] + ai_cars
-            for car_obj in cars_to_update_physics:
-                car_obj.on_mud = False
-                car_obj.on_road = False
-                car_obj.on_grass = False 
-                car_world_rect = car_obj.get_world_collision_rect()
-                car_center_world = (car_obj.world_x, car_obj.world_y)
-
-                for mud in mud_patches:
-                    if car_world_rect.colliderect(mud.rect) and mud.check_collision(car_center_world):
-                        car_obj.on_mud = True; break
-                
-                if not car_obj.on_mud and road_segments_polygons:
-                    for road_poly in road_segments_polygons:
-                        if is_point_in_polygon(car_center_world, road_poly):
-                            car_obj.on_road = True; break 
-                
-                if not car_obj.on_mud and not car_obj.on_road:
-                    car_obj.on_grass = True 
-
-                if not car_obj.is_airborne:
-                    for ramp_obj in ramps:
-                        if ramp_obj.check_collision(car_world_rect):
-                            if car_obj.speed > car_obj.max_car_speed * const.MIN_JUMP_SPEED_FACTOR:
-                                car_obj.trigger_jump(); break
-                
-                collided_with_a_crest_this_frame = False
-                if not car_obj.is_airborne and visual_hills:
-                    for hill in visual_hills:
-                        if hill.check_collision(car_world_rect):
-                            if hill.check_crest_collision(car_obj.world_x, car_obj.world_y):
-                                collided_with_a_crest_this_frame = True
-                                if car_obj.last_collided_hill_crest != hill:
-                                    min_speed_for_hill_jump = car_obj.max_car_speed * const.MIN_JUMP_SPEED_FACTOR
-                                    if car_obj.speed > min_speed_for_hill_jump:
-                                        car_obj.trigger_jump()
-                                        car_obj.last_collided_hill_crest = hill
-                                        break 
-                                break 
-                            elif car_obj.last_collided_hill_crest == hill:
-                                 car_obj.last_collided_hill_crest = None 
-                        elif car_obj.last_collided_hill_crest == hill:
-                            car_obj.last_collided_hill_crest = None
-                                
-                car_obj.update(dt)
-                if tire_tracks_surface and hasattr(car_obj, 'leave_tire_tracks'):
-                    car_obj.leave_tire_tracks(tire_tracks_surface, const.WORLD_BOUNDS)
-
-            for i in range(len(cars_to_update_physics)):
-                for j in range(i + 1, len(cars_to_update_physics)):
-                    car1 = cars_to_update_physics[i]; car2 = cars_to_update_physics[j]
-                    dist_x = car1.world_x - car2.world_x; dist_y = car1.world_y - car2.world_y
-                    current_dist_sq = dist_x*dist_x + dist_y*dist_y
-                    min_dist = car1.collision_radius + car2.collision_radius; min_dist_sq = min_dist*min_dist
-                    if current_dist_sq < min_dist_sq and current_dist_sq > 1e-6:
-                        current_dist = math.sqrt(current_dist_sq)
-                        overlap = min_dist - current_dist
-                        nx = dist_x / current_dist if current_dist != 0 else 1.0
-                        ny = dist_y / current_dist if current_dist != 0 else 0.0
-                        car1.resolve_collision_with(car2, nx, ny, overlap)
-
-            world_offset_x = player_car.world_x; world_offset_y = player_car.world_y
+            world_offset_x, world_offset_y, _ = player_car.interpolated_pose(render_alpha)
+            sim.update_standings()
 
             if sounds_loaded and engine_channel and skid_channel and skid_sound:
                 is_skidding = (player_car.is_drifting or player_car.is_handbraking) and not player_car.is_airborne and player_car.speed > 10
@@ -357,39 +344,22 @@ def main():
                 target_volume = const.ENGINE_MIN_VOL + (const.ENGINE_MAX_VOL - const.ENGINE_MIN_VOL) * throttle_influence * rpm_influence
                 engine_channel.set_volume(clamp(target_volume, 0.0, 1.0))
 
-            if not player_race_finished:
-                car_pos = (player_car.world_x, player_car.world_y); car_prev_pos = (player_car.prev_world_x, player_car.prev_world_y)
-                num_actual_cps = len(course_checkpoints_coords)
-                if player_race_started and 0 <= player_next_checkpoint_index < num_actual_cps:
-                    target_cp = checkpoints[player_next_checkpoint_index + 2]
-                    if distance_sq(car_pos, (target_cp.world_x, target_cp.world_y)) < const.CHECKPOINT_ROUNDING_RADIUS**2:
-                        player_next_checkpoint_index += 1
-                if current_time_s - player_last_line_crossing_time > const.LINE_CROSSING_DEBOUNCE:
-                    if distance_sq(car_prev_pos, car_pos) > 0.1:
-                        if check_line_crossing(car_prev_pos, car_pos, const.START_FINISH_LINE[0], const.START_FINISH_LINE[1]):
-                            player_last_line_crossing_time = current_time_s
-                            if not player_race_started:
-                                player_race_started = True; player_current_lap = 1; player_next_checkpoint_index = 0
-                                player_lap_start_time = current_time_s; player_lap_times = []
-                            elif player_next_checkpoint_index >= num_actual_cps:
-                                lap_time = current_time_s - player_lap_start_time; player_lap_times.append(lap_time)
-                                if player_current_lap >= total_laps:
-                                    player_race_finished = True; player_final_total_time = current_time_s - total_race_start_time
-                                    game_state = GameState.FINISHED
-                                    if sounds_loaded and engine_channel and skid_channel:
-                                        engine_channel.stop(); skid_channel.stop()
-                                else:
-                                    player_current_lap += 1; player_next_checkpoint_index = 0; player_lap_start_time = current_time_s
+            if sim.player_finished:
+                game_state = GameState.FINISHED
+                if sounds_loaded and engine_channel and skid_channel:
+                    engine_channel.stop(); skid_channel.stop()
 
-        # --- Drawing ---
-        draw_scrolling_track(screen, world_offset_x, world_offset_y, visual_hills, road_segments_polygons)
+        elif game_state == GameState.FINISHED:
+            # Keep simulating so the AI cars still on course get finishing times (T fast-forwards this)
+            if not simulation_done(sim, max_race_time):
+                physics_accumulator, render_alpha = advance_simulation(
+                    sim, physics_dt, physics_accumulator, frame_dt, time_scale, None, render_fps, max_race_time=max_race_time)
 
-        if tire_tracks_surface and (game_state == GameState.RACING or game_state == GameState.COUNTDOWN or game_state == GameState.FINISHED):
-            src_rect_x = (world_offset_x - const.CENTER_X) + const.WORLD_BOUNDS
-            src_rect_y = (world_offset_y - const.CENTER_Y) + const.WORLD_BOUNDS
-            visible_world_area_on_tracks_surface = pygame.Rect(src_rect_x, src_rect_y, const.SCREEN_WIDTH, const.SCREEN_HEIGHT)
-            screen.blit(tire_tracks_surface, (0,0), area=visible_world_area_on_tracks_surface)
+        # --- Drawing ---
+        draw_world_background(screen, course, world_offset_x, world_offset_y,
+                              tire_tracks if game_state != GameState.SETUP else None, profiler, sim.time_s if sim else 0.0)
 
+        profiler.switch("hud")
         if game_state == GameState.SETUP:
             title_surf = title_font.render("Race Setup", True, const.WHITE)
             screen.blit(title_surf, (const.CENTER_X - title_surf.get_width()//2, const.SCREEN_HEIGHT * 0.08))
@@ -419,16 +389,15 @@ def main():
             draw_button(screen, difficulty_plus_rect, ">", button_font, const.BUTTON_COLOR, const.BUTTON_TEXT_COLOR, const.BUTTON_HOVER_COLOR)
             draw_button(screen, start_button_rect, "Start Race", button_font, const.BUTTON_COLOR, const.BUTTON_TEXT_COLOR, const.BUTTON_HOVER_COLOR)
             if course_generated:
-                draw_map(screen, player_car, ai_cars, mud_patches, checkpoints, -1, const.START_FINISH_LINE, MAP_RECT_LOCAL, const.WORLD_BOUNDS, ramps, visual_hills)
+                seed_surf = ui_font_small.render(f"Last race seed: {race_seed}", True, const.GRAY)
+                screen.blit(seed_surf, (const.CENTER_X - seed_surf.get_width()//2, const.SCREEN_HEIGHT * 0.08 + title_surf.get_height()))
+                draw_map(screen, player_car, ai_cars, course.mud_patches, course.checkpoints, -1, const.START_FINISH_LINE, MAP_RECT_LOCAL, const.WORLD_BOUNDS, course.ramps, course.visual_hills)
 
         elif game_state == GameState.COUNTDOWN:
             cam_offset_x_cd = world_offset_x; cam_offset_y_cd = world_offset_y
-            player_car.screen_x = const.CENTER_X; player_car.screen_y = const.CENTER_Y
-            player_car.rotate_and_position_shapes(); player_car.draw(screen, draw_shadow=True)
+            position_car_for_drawing(player_car, cam_offset_x_cd, cam_offset_y_cd, 1.0); player_car.draw(screen, draw_shadow=True)
             for ai in ai_cars:
-                ai.screen_x = const.CENTER_X + (ai.world_x - cam_offset_x_cd)
-                ai.screen_y = const.CENTER_Y + (ai.world_y - cam_offset_y_cd)
-                ai.rotate_and_position_shapes(); ai.draw(screen, draw_shadow=True)
+                position_car_for_drawing(ai, cam_offset_x_cd, cam_offset_y_cd, 1.0); ai.draw(screen, draw_shadow=True)
             time_left = countdown_timer - current_time_s
             if time_left > 0:
                 num_to_show = math.ceil(time_left)
@@ -440,39 +409,21 @@ def main():
                 screen.blit(go_text_surf, go_text_surf.get_rect(center=(const.CENTER_X, const.CENTER_Y - 50)))
 
         elif game_state == GameState.RACING:
-            cam_offset_x_race = player_car.world_x; cam_offset_y_race = player_car.world_y
-            player_car.draw_dust(screen, cam_offset_x_race, cam_offset_y_race)
-            player_car.draw_mud_splash(screen, cam_offset_x_race, cam_offset_y_race)
-            for ai in ai_cars:
-                ai.draw_dust(screen, cam_offset_x_race, cam_offset_y_race)
-                ai.draw_mud_splash(screen, cam_offset_x_race, cam_offset_y_race)
-            for mud in mud_patches: mud.draw(screen, cam_offset_x_race, cam_offset_y_race)
-            for ramp_obj in ramps: ramp_obj.draw(screen, cam_offset_x_race, cam_offset_y_race)
-            if const.DEBUG_DRAW_RAMPS:
-                for ramp_obj in ramps: ramp_obj.draw_debug(screen, cam_offset_x_race, cam_offset_y_race)
-            sf_p1_screen = (int(const.START_FINISH_LINE[0][0] - cam_offset_x_race + const.CENTER_X), int(const.START_FINISH_LINE[0][1] - cam_offset_y_race + const.CENTER_Y))
-            sf_p2_screen = (int(const.START_FINISH_LINE[1][0] - cam_offset_x_race + const.CENTER_X), int(const.START_FINISH_LINE[1][1] - cam_offset_y_race + const.CENTER_Y))
-            pygame.draw.line(screen, const.START_FINISH_LINE_COLOR, sf_p1_screen, sf_p2_screen, const.START_FINISH_WIDTH)
-            map_next_cp_idx = -1
-            if player_race_started and not player_race_finished and 0 <= player_next_checkpoint_index < len(course_checkpoints_coords):
-                map_next_cp_idx = player_next_checkpoint_index + 2
-            for i, cp_obj in enumerate(checkpoints): cp_obj.draw(screen, cam_offset_x_race, cam_offset_y_race, (i == map_next_cp_idx))
-            for ai in ai_cars:
-                ai.screen_x = const.CENTER_X + (ai.world_x - cam_offset_x_race)
-                ai.screen_y = const.CENTER_Y + (ai.world_y - cam_offset_y_race)
-                ai.rotate_and_position_shapes(); ai.draw(screen)
-            player_car.screen_x = const.CENTER_X; player_car.screen_y = const.CENTER_Y
-            player_car.rotate_and_position_shapes(); player_car.draw(screen)
+            player_race_started = player_car.race_started; player_race_finished = player_car.race_finished_for_car
+            player_next_checkpoint_index = sim.player_next_checkpoint_index; player_lap_times = player_car.lap_times
+            map_next_cp_idx = next_checkpoint_map_index(sim)
+            draw_race_world(screen, sim, world_offset_x, world_offset_y, render_alpha, map_next_cp_idx, profiler)
             
             # --- HUD Elements - Lap Timers MOVED to top-left ---
+            profiler.switch("hud")
             timer_x_pos = 20 
             timer_y_start = 20 
             total_tm_str = "00:00.00"; current_lp_str = "00:00.00"
             if player_race_started and not player_race_finished:
-                total_tm_val = current_time_s - total_race_start_time; current_lp_val = current_time_s - player_lap_start_time
+                total_tm_val = sim.race_time; current_lp_val = sim.time_s - player_car.lap_start_time
                 total_tm_str = format_time(total_tm_val); current_lp_str = format_time(current_lp_val)
             elif player_race_finished :
-                total_tm_str = format_time(player_final_total_time)
+                total_tm_str = format_time(sim.player_final_total_time)
                 if player_lap_times: current_lp_str = format_time(player_lap_times[-1])
             total_tm_txt_surf = font.render(f"Total: {total_tm_str}", True, const.WHITE)
             screen.blit(total_tm_txt_surf, (timer_x_pos, timer_y_start))
@@ -495,24 +446,37 @@ def main():
             draw_pedal_indicator(screen, player_car.throttle_input, ACCEL_PEDAL_RECT_LOCAL, const.ACCEL_PEDAL_COLOR, "Accel", ui_font_small)
             draw_pedal_indicator(screen, player_car.brake_input, BRAKE_PEDAL_RECT_LOCAL, const.BRAKE_PEDAL_COLOR, "Brake", ui_font_small)
             draw_handbrake_indicator(screen, player_car.is_handbraking, HANDBRAKE_INDICATOR_POS_LOCAL, const.HANDBRAKE_INDICATOR_RADIUS, ui_font_small)
-            lap_disp_str = f"Lap: {player_current_lap}/{total_laps}" if player_race_started else "Cross Start Line"
+            lap_disp_str = f"Lap: {player_car.current_lap}/{total_laps}" if player_race_started else "Cross Start Line"
             lap_txt_surf_ui = font.render(lap_disp_str, True, const.WHITE); screen.blit(lap_txt_surf_ui, (const.CENTER_X - lap_txt_surf_ui.get_width() // 2, 20))
             next_cp_disp_text = ""
-            num_actual_cps_disp = len(course_checkpoints_coords)
+            num_actual_cps_disp = course.num_course_checkpoints
             if player_race_started and not player_race_finished:
                 if 0 <= player_next_checkpoint_index < num_actual_cps_disp: next_cp_disp_text = f"Next CP: {player_next_checkpoint_index + 1}/{num_actual_cps_disp}"
                 else: next_cp_disp_text = "To Finish Line"
             next_cp_txt_surf = font.render(next_cp_disp_text, True, const.NEXT_CHECKPOINT_INDICATOR_COLOR); screen.blit(next_cp_txt_surf, (const.CENTER_X - next_cp_txt_surf.get_width() // 2, 60))
             
-            draw_map(screen, player_car, ai_cars, mud_patches, checkpoints, map_next_cp_idx, const.START_FINISH_LINE, MAP_RECT_LOCAL, const.WORLD_BOUNDS, ramps, visual_hills)
+            standings_rows = []
+            for position, car_obj in enumerate(sim.standings, start=1):
+                if car_obj.race_finished_for_car: status = format_time(sim.finish_times[sim.cars.index(car_obj)] or 0.0)
+                elif car_obj.race_started: status = f"Lap {car_obj.current_lap}"
+                else: status = "-"
+                standings_rows.append((f"P{position} {sim.car_label(car_obj):<7}{status:>9}", car_obj.color))
+            draw_standings(screen, standings_rows, const.STANDINGS_PANEL_POS, profiler_font, sim.standings.index(player_car))
+
+            if time_scale != 1.0:
+                time_scale_surf = font.render(f">> {time_scale_label(time_scale)}", True, const.NEXT_CHECKPOINT_INDICATOR_COLOR)
+                screen.blit(time_scale_surf, (const.CENTER_X - time_scale_surf.get_width() // 2, 100))
+            
+            profiler.switch("map")
+            draw_map(screen, player_car, ai_cars, course.mud_patches, course.checkpoints, map_next_cp_idx, const.START_FINISH_LINE, MAP_RECT_LOCAL, const.WORLD_BOUNDS, course.ramps, course.visual_hills)
 
         elif game_state == GameState.FINISHED:
             title_surf_fin = title_font.render("Race Finished!", True, const.WHITE); screen.blit(title_surf_fin, (const.CENTER_X - title_surf_fin.get_width()//2, const.SCREEN_HEIGHT * 0.1))
-            total_time_surf_fin = font.render(f"Your Total Time: {format_time(player_final_total_time)}", True, const.WHITE); screen.blit(total_time_surf_fin, (const.CENTER_X - total_time_surf_fin.get_width()//2, const.SCREEN_HEIGHT * 0.20))
+            total_time_surf_fin = font.render(f"Your Total Time: {format_time(sim.player_final_total_time)}", True, const.WHITE); screen.blit(total_time_surf_fin, (const.CENTER_X - total_time_surf_fin.get_width()//2, const.SCREEN_HEIGHT * 0.20))
             y_lap_offset_fin = const.SCREEN_HEIGHT * 0.28
             lap_header_surf_fin = font.render("Your Lap Times:", True, const.WHITE)
             screen.blit(lap_header_surf_fin, (const.CENTER_X - lap_header_surf_fin.get_width()//2 , y_lap_offset_fin)); y_lap_offset_fin += 35
-            for i_fin, l_time_fin in enumerate(player_lap_times):
+            for i_fin, l_time_fin in enumerate(player_car.lap_times):
                 lap_num_fin = i_fin + 1; lap_time_surf_fin = lap_font.render(f"Lap {lap_num_fin}: {format_time(l_time_fin)}", True, const.WHITE)
                 screen.blit(lap_time_surf_fin, (const.CENTER_X - lap_time_surf_fin.get_width()//2 , y_lap_offset_fin)); y_lap_offset_fin += 35
             y_lap_offset_fin += 15
@@ -520,7 +484,9 @@ def main():
                 ai_header_surf_fin = font.render(f"AI {i_ai_fin+1} ({ai_fin.color}) Lap Times:", True, ai_fin.color if ai_fin.color else const.AI_CAR_BODY_COLOR)
                 screen.blit(ai_header_surf_fin, (const.CENTER_X - ai_header_surf_fin.get_width()//2 , y_lap_offset_fin)); y_lap_offset_fin += 35
                 if not ai_fin.lap_times and not ai_fin.race_finished_for_car:
-                    no_time_surf_fin = lap_font.render("Did not finish", True, const.GRAY)
+                    ai_still_racing = sim.race_time < max_race_time
+                    no_time_text = f"Still racing (T: {time_scale_label(time_scale)})" if ai_still_racing else "Did not finish"
+                    no_time_surf_fin = lap_font.render(no_time_text, True, const.GRAY)
                     screen.blit(no_time_surf_fin, (const.CENTER_X - no_time_surf_fin.get_width()//2 , y_lap_offset_fin)); y_lap_offset_fin += 35
                 elif ai_fin.race_finished_for_car:
                     ai_total_time = sum(ai_fin.lap_times)
@@ -534,10 +500,61 @@ def main():
             new_race_button_rect.top = max(const.SCREEN_HEIGHT * 0.7, y_lap_offset_fin + 20)
             draw_button(screen, new_race_button_rect, "New Race Setup", button_font, const.BUTTON_COLOR, const.BUTTON_TEXT_COLOR, const.BUTTON_HOVER_COLOR)
 
+        if show_profiler_overlay:
+            profiler.switch("overlay")
+            draw_profiler_overlay(screen, profiler.stats(), const.PROFILER_OVERLAY_POS, profiler_font)
+
+        profiler.switch("flip")
         pygame.display.flip()
+        profiler.end_frame()
+        cprofile_path = cprofile_capture.end_frame()
+        if cprofile_path: print(f"cProfile capture written to {cprofile_path}")
+        memory_path = memory_capture.end_frame()
+        if memory_path: print(f"Memory snapshot report written to {memory_path}")
 
     pygame.mixer.quit()
     pygame.quit()
 
+def print_headless_result(race):
+    print(f"Seed {race['seed']}: {race['steps']} steps, {race['race_time']:.2f}s simulated in {race['wall_time']:.2f}s wall time")
+    for row in race['results']:
+        if row['finished']: outcome = f"Total {format_time(row['finish_time'])}"
+        else: outcome = f"DNF ({row['laps_completed']} laps)"
+        lap_strs = ", ".join(format_time(t) for t in row['lap_times'])
+        print(f"  P{row['position']} {row['car']:<6} {outcome:<18} Laps: {lap_strs}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rally Racer")
+    parser.add_argument("--headless", action="store_true", help="Run an AI-only race with no window, sound or rendering")
+    parser.add_argument("--laps", type=int, default=const.DEFAULT_RACE_LAPS)
+    parser.add_argument("--ai", type=int, default=const.DEFAULT_NUM_AI, help="Number of AI cars")
+    parser.add_argument("--checkpoints", type=int, default=const.DEFAULT_NUM_CHECKPOINTS)
+    parser.add_argument("--difficulty", choices=const.AI_DIFFICULTY_OPTIONS, default=const.AI_DIFFICULTY_OPTIONS[const.DEFAULT_DIFFICULTY_INDEX])
+    parser.add_argument("--seed", type=int, default=None, help="Master seed for the course, AI and effects random streams")
+    parser.add_argument("--fps", type=int, default=const.RENDER_FPS, help="Target render frame rate")
+    parser.add_argument("--physics-hz", type=int, default=const.PHYSICS_HZ, help="Fixed physics simulation rate")
+    parser.add_argument("--physics", choices=const.PHYSICS_BACKENDS, default=const.DEFAULT_PHYSICS_BACKEND, help="Car physics backend")
+    parser.add_argument("--time-scale", choices=[time_scale_label(t) for t in const.TIME_SCALE_OPTIONS],
+                        default=time_scale_label(const.TIME_SCALE_OPTIONS[const.DEFAULT_TIME_SCALE_INDEX]),
+                        help="Initial simulation speed (press T in game to cycle)")
+    parser.add_argument("--cprofile", type=int, default=None, metavar="FRAMES",
+                        help="Profile the first FRAMES frames of each race under cProfile (F5 in game) and write a .pstats file")
+    parser.add_argument("--tracemalloc", type=int, default=None, metavar="FRAMES",
+                        help="Diff tracemalloc snapshots FRAMES frames apart from the start of each race (F6 in game)")
+    parser.add_argument("--max-race-time", type=float, default=const.HEADLESS_MAX_RACE_TIME, help="Simulated seconds before unfinished cars are DNF")
+    return parser.parse_args()
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.headless:
+        print_headless_result(run_headless_race(
+            num_laps=args.laps, num_ai=args.ai, seed=args.seed,
+            difficulty_index=const.AI_DIFFICULTY_OPTIONS.index(args.difficulty),
+            num_checkpoints=args.checkpoints, time_step=1.0 / args.physics_hz, max_race_time=args.max_race_time,
+            physics_backend=args.physics
+        ))
+    else:
+        time_scale_labels = [time_scale_label(t) for t in const.TIME_SCALE_OPTIONS]
+        main(render_fps=args.fps, physics_hz=args.physics_hz, physics_backend=args.physics,
+             time_scale_index=time_scale_labels.index(args.time_scale), seed=args.seed,
+             cprofile_frames=args.cprofile, memory_frames=args.tracemalloc, max_race_time=args.max_race_time)
\ No newline at end of file
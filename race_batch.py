@@ -0,0 +1,118 @@
+# rally_racer_project/race_batch.py
+# This file runs many seeded headless races in parallel across a process pool and streams
+# a table of lap times, DNFs and finishing order as races complete.
+#
+# Example:
+#   python race_batch.py --races 200 --ai 5 --difficulty Easy Hard --laps 3 --out results.csv
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") # Keep pygame's banner out of the CSV on stdout
+
+import constants as const
+from race_simulation import run_headless_race
+
+RESULT_COLUMNS = [
+    "seed", "difficulty", "num_ai", "laps", "car", "position", "finished",
+    "finish_time", "laps_completed", "best_lap", "lap_times",
+]
+
+
+def race_jobs(num_races, seed_start=0, num_ai=const.DEFAULT_NUM_AI, difficulties=None,
+              num_laps=const.DEFAULT_RACE_LAPS, num_checkpoints=const.DEFAULT_NUM_CHECKPOINTS,
+              max_race_time=const.HEADLESS_MAX_RACE_TIME, physics_backend=const.DEFAULT_PHYSICS_BACKEND):
+    """
+    Yields one job dict per (seed, difficulty) combination. Jobs are plain dicts of
+    run_headless_race keyword arguments so they pickle cheaply to worker processes.
+    """
+    if not difficulties: difficulties = [const.AI_DIFFICULTY_OPTIONS[const.DEFAULT_DIFFICULTY_INDEX]]
+    for seed in range(seed_start, seed_start + num_races):
+        for difficulty in difficulties:
+            yield {
+                'seed': seed, 'num_ai': num_ai, 'num_laps': num_laps, 'num_checkpoints': num_checkpoints,
+                'difficulty_index': const.AI_DIFFICULTY_OPTIONS.index(difficulty),
+                'max_race_time': max_race_time, 'physics_backend': physics_backend,
+            }
+
+
+def run_race_job(job):
+    """Worker entry point: runs one race and flattens it into table rows (one per car)."""
+    race = run_headless_race(**job)
+    difficulty = const.AI_DIFFICULTY_OPTIONS[job['difficulty_index']]
+    rows = []
+    for result in race['results']:
+        lap_times = result['lap_times']
+        rows.append({
+            'seed': job['seed'], 'difficulty': difficulty, 'num_ai': job['num_ai'], 'laps': job['num_laps'],
+            'car': result['car'], 'position': result['position'], 'finished': result['finished'],
+            'finish_time': round(result['finish_time'], 3) if result['finished'] else "",
+            'laps_completed': result['laps_completed'],
+            'best_lap': round(min(lap_times), 3) if lap_times else "",
+            'lap_times': ";".join(f"{t:.3f}" for t in lap_times),
+        })
+    return {'rows': rows, 'steps': race['steps'], 'wall_time': race['wall_time']}
+
+
+def run_race_batch(jobs, max_workers=None):
+    """
+    Runs jobs across a ProcessPoolExecutor and yields each race's result as soon as it
+    completes. Only a small window of jobs is in flight at once, so arbitrarily long job
+    iterators never have to be materialized.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * 2
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = set()
+        for job in jobs:
+            in_flight.add(executor.submit(run_race_job, job))
+            if len(in_flight) >= max_in_flight: break
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                next_job = next(jobs, None)
+                if next_job is not None: in_flight.add(executor.submit(run_race_job, next_job))
+                yield future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run seeded AI-only races in parallel and tabulate the results")
+    parser.add_argument("--races", type=int, default=100, help="Number of course seeds to race")
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--ai", type=int, default=const.MAX_AI_OPPONENTS, help="AI cars per race")
+    parser.add_argument("--difficulty", nargs="+", choices=const.AI_DIFFICULTY_OPTIONS, default=None,
+                        help="One or more AI difficulties; every seed is raced at each")
+    parser.add_argument("--laps", type=int, default=const.DEFAULT_RACE_LAPS)
+    parser.add_argument("--checkpoints", type=int, default=const.DEFAULT_NUM_CHECKPOINTS)
+    parser.add_argument("--max-race-time", type=float, default=const.HEADLESS_MAX_RACE_TIME)
+    parser.add_argument("--physics", choices=const.PHYSICS_BACKENDS, default=const.DEFAULT_PHYSICS_BACKEND)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--out", default=None, help="CSV file to write (default: stdout)")
+    args = parser.parse_args()
+
+    jobs = race_jobs(args.races, args.seed_start, args.ai, args.difficulty, args.laps, args.checkpoints,
+                     args.max_race_time, args.physics)
+    out_file = open(args.out, "w", newline="") if args.out else sys.stdout
+    writer = csv.DictWriter(out_file, fieldnames=RESULT_COLUMNS)
+    writer.writeheader()
+
+    batch_start = time.perf_counter(); races_done = 0; cars_dnf = 0; total_steps = 0
+    try:
+        for race in run_race_batch(jobs, args.workers):
+            writer.writerows(race['rows']); out_file.flush()
+            races_done += 1; total_steps += race['steps']
+            cars_dnf += sum(1 for row in race['rows'] if not row['finished'])
+    finally:
+        if args.out: out_file.close()
+    elapsed = time.perf_counter() - batch_start
+    print(f"{races_done} races in {elapsed:.1f}s ({races_done / elapsed if elapsed > 0 else 0:.2f} races/s, "
+          f"{total_steps / elapsed if elapsed > 0 else 0:.0f} steps/s), {cars_dnf} DNF cars", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
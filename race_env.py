@@ -0,0 +1,217 @@
+# rally_racer_project/race_env.py
+# This file exposes the race simulation as a reset()/step(action) environment for training and
+# evaluating driving policies offline, plus VectorRaceEnv, which steps K independent races in
+# lockstep with every car of every race integrated in one shared CarFleetState.
+# The API follows the Gymnasium conventions (obs, reward, terminated, truncated, info)
+# without depending on the gymnasium package.
+
+import math
+import numpy as np
+
+import constants as const
+import rng
+from course_generator import generate_course
+from race_simulation import RaceSimulation
+from classes import Car, CarFleetState
+
+# Observation layout (float32):
+#   0-1  agent world position / WORLD_BOUNDS
+#   2-3  cos/sin of heading
+#   4    speed / max_car_speed
+#   5-6  vector to the next target (checkpoint or start/finish line) / WORLD_BOUNDS
+#   7-10 on_road, on_mud, on_grass, is_airborne flags
+OBSERVATION_SIZE = 11
+# Action layout: throttle [0, 1], brake [0, 1], steer [-1, 1], handbrake [0, 1]
+ACTION_SIZE = 4
+ACTION_LOW = np.array([0.0, 0.0, -1.0, 0.0], dtype=np.float32)
+ACTION_HIGH = np.array([1.0, 1.0, 1.0, 1.0], dtype=np.float32)
+
+
+class RaceEnv:
+    """
+    Single-agent environment: the agent drives the player car, optionally against AI cars.
+    Each step() applies one action for action_repeat fixed physics steps.
+    """
+    def __init__(self, num_ai=0, num_laps=1, num_checkpoints=const.DEFAULT_NUM_CHECKPOINTS,
+                 difficulty_index=const.DEFAULT_DIFFICULTY_INDEX, top_speed_percent=const.DEFAULT_TOP_SPEED_PERCENT,
+                 grip_percent=const.DEFAULT_GRIP_PERCENT, action_repeat=const.ENV_ACTION_REPEAT,
+                 max_episode_steps=const.ENV_MAX_EPISODE_STEPS, physics_backend=const.DEFAULT_PHYSICS_BACKEND,
+                 new_course_each_reset=True):
+        self.num_laps = num_laps
+        self.num_checkpoints = num_checkpoints
+        self.difficulty_index = difficulty_index
+        self.top_speed_percent = top_speed_percent
+        self.grip_percent = grip_percent
+        self.action_repeat = action_repeat
+        self.max_episode_steps = max_episode_steps
+        self.physics_backend = physics_backend
+        self.new_course_each_reset = new_course_each_reset
+
+        # Cars persist across episodes so an outer CarFleetState binding stays valid
+        self.agent_car = Car(const.CENTER_X, const.CENTER_Y)
+        self.ai_cars = [Car(0, 0, is_ai=True, unique_body_color=const.AI_AVAILABLE_COLORS[i % len(const.AI_AVAILABLE_COLORS)])
+                        for i in range(num_ai)]
+        self.cars = [self.agent_car] + self.ai_cars
+        self.sim = None
+        self.course = None
+        self.episode_steps = 0
+
+    # --- Episode control ---
+    def reset(self, seed=None):
+        """Starts a new race. Returns (observation, info)."""
+        if seed is not None:
+            rng.seed_all(seed)
+        if self.sim and self.sim.fleet:
+            self.sim.fleet.release()
+        self.agent_car.apply_setup(self.top_speed_percent, self.grip_percent)
+        for ai_car in self.ai_cars:
+            ai_car.apply_setup(self.top_speed_percent, self.grip_percent)
+            ai_car.apply_ai_difficulty(self.difficulty_index, const.AI_DIFFICULTY_OPTIONS)
+        if self.course is None or self.new_course_each_reset:
+            self.course = generate_course(self.num_checkpoints)
+        self.sim = RaceSimulation(self.course, self.agent_car, self.ai_cars, self.num_laps,
+                                  visual_effects=False, physics_backend=self.physics_backend)
+        self.sim.place_cars_on_grid()
+        self.sim.start_race()
+        self.sim.update_surface_flags() # The first observation's surface features, before any step has sampled them
+        self.episode_steps = 0
+        return self.observe(), self._info()
+
+    def step(self, action):
+        """Applies action for action_repeat physics steps. Returns (obs, reward, terminated, truncated, info)."""
+        inputs = action_to_inputs(action)
+        progress_before = self._begin_action()
+        for _ in range(self.action_repeat):
+            self.sim.step(const.PHYSICS_TIME_STEP, inputs)
+        reward, terminated, truncated = self._end_action(progress_before)
+        return self.observe(), reward, terminated, truncated, self._info()
+
+    # --- Reward bookkeeping (shared with VectorRaceEnv) ---
+    def progress_count(self):
+        """Number of targets reached so far: start line, each checkpoint and each lap line crossing."""
+        if not self.agent_car.race_started: return 0
+        return 1 + len(self.agent_car.lap_times) * (self.sim.num_course_checkpoints + 1) + max(0, self.sim.player_next_checkpoint_index)
+
+    def target_position(self):
+        """World position the agent should head for next (checkpoint or start/finish line midpoint)."""
+        next_index = self.sim.player_next_checkpoint_index
+        if self.agent_car.race_started and 0 <= next_index < self.sim.num_course_checkpoints:
+            target_cp = self.course.checkpoints[next_index + 2]
+            return target_cp.world_x, target_cp.world_y
+        sf_line = self.course.start_finish_line
+        return (sf_line[0][0] + sf_line[1][0]) / 2.0, (sf_line[0][1] + sf_line[1][1]) / 2.0
+
+    def _begin_action(self):
+        target_x, target_y = self.target_position()
+        distance_before = math.hypot(target_x - self.agent_car.world_x, target_y - self.agent_car.world_y)
+        return self.progress_count(), target_x, target_y, distance_before
+
+    def _end_action(self, progress_before):
+        count_before, target_x, target_y, distance_before = progress_before
+        self.episode_steps += 1
+        distance_after = math.hypot(target_x - self.agent_car.world_x, target_y - self.agent_car.world_y)
+        reward = (distance_before - distance_after) / const.ENV_PROGRESS_REWARD_SCALE
+        reward += (self.progress_count() - count_before) * const.ENV_CHECKPOINT_REWARD
+        reward -= const.ENV_STEP_PENALTY
+        terminated = self.agent_car.race_finished_for_car
+        if terminated: reward += const.ENV_FINISH_REWARD
+        truncated = not terminated and self.episode_steps >= self.max_episode_steps
+        return reward, terminated, truncated
+
+    def _info(self):
+        return {
+            'race_time': self.sim.race_time,
+            'lap': self.agent_car.current_lap,
+            'next_checkpoint': self.sim.player_next_checkpoint_index,
+            'lap_times': list(self.agent_car.lap_times),
+        }
+
+    def observe(self):
+        car = self.agent_car
+        target_x, target_y = self.target_position()
+        heading_rad = math.radians(car.heading)
+        return np.array([
+            car.world_x / const.WORLD_BOUNDS, car.world_y / const.WORLD_BOUNDS,
+            math.cos(heading_rad), math.sin(heading_rad),
+            car.speed / car.max_car_speed if car.max_car_speed > 0 else 0.0,
+            (target_x - car.world_x) / const.WORLD_BOUNDS, (target_y - car.world_y) / const.WORLD_BOUNDS,
+            car.on_road, car.on_mud, car.on_grass, car.is_airborne,
+        ], dtype=np.float32)
+
+
+class VectorRaceEnv:
+    """
+    K independent RaceEnvs stepped in lockstep. All cars of all races share one CarFleetState,
+    so physics for the whole batch is a single vectorized pass; observations, rewards and
+    done flags come back as arrays. Finished races reset automatically, as in Gymnasium's
+    vector envs (the last observation is in info['final_observation']).
+    """
+    def __init__(self, num_envs, **env_kwargs):
+        env_kwargs['physics_backend'] = "scalar" # Cars are bound to the shared fleet below instead
+        self.envs = [RaceEnv(**env_kwargs) for _ in range(num_envs)]
+        self.num_envs = num_envs
+        self.fleet = CarFleetState([car for env in self.envs for car in env.cars])
+        self.agent_rows = np.array([env.agent_car._fleet_row for env in self.envs], dtype=np.intp)
+        self.action_repeat = self.envs[0].action_repeat
+
+    def reset(self, seed=None):
+        """Resets every race (env i uses seed + i when seed is given). Returns (obs[K, OBS], infos)."""
+        infos = []
+        for i, env in enumerate(self.envs):
+            _, info = env.reset(None if seed is None else seed + i)
+            infos.append(info)
+        return self.observe(), infos
+
+    def step(self, actions):
+        """
+        Args:
+            actions (array-like): Shape (K, ACTION_SIZE).
+        Returns:
+            (obs[K, OBS], rewards[K], terminated[K], truncated[K], infos)
+        """
+        actions = np.asarray(actions, dtype=np.float32).reshape(self.num_envs, ACTION_SIZE)
+        inputs = [action_to_inputs(action) for action in actions]
+        progress_before = [env._begin_action() for env in self.envs]
+        dt = const.PHYSICS_TIME_STEP
+        for _ in range(self.action_repeat):
+            for env, env_inputs in zip(self.envs, inputs): env.sim.begin_step(dt, env_inputs)
+            self.fleet.step(dt)
+            for env in self.envs: env.sim.finish_step(dt)
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        terminated = np.zeros(self.num_envs, dtype=bool); truncated = np.zeros(self.num_envs, dtype=bool)
+        for i, env in enumerate(self.envs):
+            rewards[i], terminated[i], truncated[i] = env._end_action(progress_before[i])
+        infos = [env._info() for env in self.envs]
+        observations = self.observe()
+        for i, env in enumerate(self.envs):
+            if terminated[i] or truncated[i]:
+                infos[i]['final_observation'] = observations[i].copy()
+                env.reset()
+                observations[i] = env.observe()
+        return observations, rewards, terminated, truncated, infos
+
+    def observe(self):
+        """Builds the (K, OBSERVATION_SIZE) observation batch straight from the fleet arrays."""
+        rows = self.agent_rows; a = self.fleet.arrays
+        x = a["world_x"][rows]; y = a["world_y"][rows]
+        heading_rad = np.radians(a["heading"][rows])
+        max_speed = a["max_car_speed"][rows]
+        targets = np.array([env.target_position() for env in self.envs], dtype=np.float64).reshape(self.num_envs, 2)
+        observations = np.empty((self.num_envs, OBSERVATION_SIZE), dtype=np.float32)
+        observations[:, 0] = x / const.WORLD_BOUNDS; observations[:, 1] = y / const.WORLD_BOUNDS
+        observations[:, 2] = np.cos(heading_rad); observations[:, 3] = np.sin(heading_rad)
+        observations[:, 4] = np.where(max_speed > 0, a["speed"][rows] / np.where(max_speed > 0, max_speed, 1.0), 0.0)
+        observations[:, 5] = (targets[:, 0] - x) / const.WORLD_BOUNDS; observations[:, 6] = (targets[:, 1] - y) / const.WORLD_BOUNDS
+        observations[:, 7] = a["on_road"][rows]; observations[:, 8] = a["on_mud"][rows]
+        observations[:, 9] = a["on_grass"][rows]; observations[:, 10] = a["is_airborne"][rows]
+        return observations
+
+    def close(self):
+        self.fleet.release()
+
+
+def action_to_inputs(action):
+    """Clips an action array to the valid ranges and returns (throttle, brake, steer, handbrake)."""
+    clipped = np.clip(np.asarray(action, dtype=np.float32), ACTION_LOW, ACTION_HIGH)
+    return float(clipped[0]), float(clipped[1]), float(clipped[2]), float(clipped[3])
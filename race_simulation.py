@@ -0,0 +1,433 @@
+# rally_racer_project/race_simulation.py
+# This file contains the RaceSimulation class, which owns the cars, the course and all
+# lap/checkpoint bookkeeping for a race and advances them without touching the display.
+# main.py drives it from the pygame loop; run_headless_race() drives it with no window at all.
+
+import itertools
+import math
+import time
+import numpy as np
+
+import constants as const
+import rng
+from course_generator import generate_course
+from surface_map import FRICTION_BY_CODE, SPEED_DAMPENING_BY_CODE
+from spatial_index import overlapping_circle_pairs
+from triggers import TriggerSystem, RAMP, HILL_CREST, CHECKPOINT, AI_CHECKPOINT, START_FINISH, ENTER
+from classes import Car, CarFleetState, ParticleSystem
+from frame_profiler import NULL_PROFILER
+
+
+class RaceSimulation:
+    """
+    Advances a race in simulated time: AI, surface detection, jumps, car physics,
+    car-car collisions and lap bookkeeping. Nothing in here draws or plays sound.
+    Jumps, checkpoints and laps are driven by the events of a TriggerSystem over the course's
+    trigger zones; add_listener() on self.triggers hooks further handlers (telemetry...) onto them.
+    """
+    def __init__(self, course, player_car=None, ai_cars=None, total_laps=const.DEFAULT_RACE_LAPS, visual_effects=True,
+                 physics_backend=const.DEFAULT_PHYSICS_BACKEND):
+        """
+        Args:
+            course (Course): The generated course to race on.
+            player_car (Car, optional): The human-controlled car, or None for AI-only races.
+            ai_cars (list, optional): AI-controlled cars.
+            total_laps (int, optional): Laps needed to finish the race.
+            visual_effects (bool, optional): Whether cars simulate dust/mud particles.
+                Headless runs turn this off since nothing will ever draw them.
+            physics_backend (str, optional): "scalar" calls Car.update per car; "numpy" binds
+                every car into one CarFleetState and integrates them in a single vectorized pass.
+        """
+        self.course = course
+        self.player_car = player_car
+        self.ai_cars = list(ai_cars) if ai_cars else []
+        self.cars = ([player_car] if player_car else []) + self.ai_cars
+        self.total_laps = total_laps
+        self.visual_effects = visual_effects
+        if physics_backend not in const.PHYSICS_BACKENDS:
+            raise ValueError(f"Unknown physics backend '{physics_backend}'")
+        self.fleet = CarFleetState(self.cars) if physics_backend == "numpy" else None
+        self.collision_radii = np.array([car.collision_radius for car in self.cars], dtype=np.float64)
+        self.surface_sample_offsets = np.array([car.surface_sample_offsets for car in self.cars], dtype=np.float64).reshape(len(self.cars), -1, 2)
+        particle_capacity = (const.MAX_DUST_PARTICLES + const.MAX_MUD_PARTICLES) * len(self.cars) if visual_effects else 0
+        self.particles = ParticleSystem(particle_capacity, len(self.cars)) # Dust and mud of every car
+        for car_index, car in enumerate(self.cars): car.particles = self.particles; car.particle_owner = car_index
+        self.profiler = NULL_PROFILER # main.py swaps in a FrameProfiler to time the step phases
+        self.triggers = TriggerSystem(course, len(self.cars))
+        self.triggers.add_listener(self._on_hill_crest_event, (HILL_CREST,))
+        self.triggers.add_listener(self._on_checkpoint_event, (CHECKPOINT, AI_CHECKPOINT))
+        self.triggers.add_listener(self._on_start_finish_crossed, (START_FINISH,))
+        self._armed_hill_crests = [set() for _ in self.cars] # Crest zones each car has entered but not yet jumped from
+        self.lod_focus_car = None # main.py points this at the player car; None keeps every car on full physics
+        self.full_detail = [True] * len(self.cars) # False while a car is simulated at reduced detail (see update_lod)
+        self.step_count = 0
+
+        self.time_s = 0.0 # Simulated seconds since the simulation was created
+        self._trigger_step_dt = 0.0 # dt of the step whose trigger events are being handled
+        self.race_start_time = 0.0
+        self.player_next_checkpoint_index = -1
+        self.player_final_total_time = 0.0
+        self.finish_times = [None] * len(self.cars) # Race time (since start_race) at which each car finished
+        self.track_s = [None] * len(self.cars) # Each car's last arc-length along the track frame (see update_standings)
+        self._standings_laps = [0] * len(self.cars)
+        self.standings = list(self.cars) # Cars in race order, refreshed by update_standings()
+
+    @classmethod
+    def create(cls, num_laps=const.DEFAULT_RACE_LAPS, num_checkpoints=const.DEFAULT_NUM_CHECKPOINTS,
+               num_ai=const.DEFAULT_NUM_AI, difficulty_index=const.DEFAULT_DIFFICULTY_INDEX,
+               top_speed_percent=const.DEFAULT_TOP_SPEED_PERCENT, grip_percent=const.DEFAULT_GRIP_PERCENT,
+               player_car=None, visual_effects=True, physics_backend=const.DEFAULT_PHYSICS_BACKEND):
+        """
+        Builds the cars and a freshly generated course exactly as the setup screen does,
+        and places the cars on the starting grid.
+        """
+        if player_car:
+            player_car.apply_setup(top_speed_percent, grip_percent)
+        ai_cars = []
+        for i in range(num_ai):
+            ai_unique_color = const.AI_AVAILABLE_COLORS[i % len(const.AI_AVAILABLE_COLORS)]
+            ai_car_instance = Car(0, 0, is_ai=True, unique_body_color=ai_unique_color)
+            ai_car_instance.apply_setup(top_speed_percent, grip_percent)
+            ai_car_instance.apply_ai_difficulty(difficulty_index, const.AI_DIFFICULTY_OPTIONS)
+            ai_cars.append(ai_car_instance)
+        course = generate_course(num_checkpoints)
+        simulation = cls(course, player_car, ai_cars, num_laps, visual_effects, physics_backend)
+        simulation.place_cars_on_grid()
+        return simulation
+
+    @property
+    def num_course_checkpoints(self):
+        return self.course.num_course_checkpoints
+
+    @property
+    def race_time(self):
+        """Simulated seconds since start_race()."""
+        return self.time_s - self.race_start_time
+
+    def place_cars_on_grid(self, start_world_x=0.0, start_world_y=20.0):
+        if not self.cars: return
+        grid_radius = self.cars[0].collision_radius
+        if self.player_car:
+            self.player_car.reset_position(start_world_x, start_world_y)
+        for i, ai_car_instance in enumerate(self.ai_cars):
+            row_num = (i // 2) + 1; col_num = i % 2
+            ai_start_x = (col_num - 0.5) * grid_radius * 2.5
+            ai_start_y = start_world_y - (row_num * grid_radius * 3.0)
+            ai_car_instance.reset_position(ai_start_x, ai_start_y)
+        self.reset_triggers()
+
+    def start_race(self):
+        """Resets every car's lap state and starts the race clock (the moment the lights go green)."""
+        self.player_next_checkpoint_index = -1
+        self.player_final_total_time = 0.0
+        for car in self.cars:
+            car.race_started = False; car.current_lap = 0; car.lap_times = []
+            car.ai_target_checkpoint_index = 0; car.last_line_crossing_time = -const.LINE_CROSSING_DEBOUNCE
+            car.lap_start_time = 0.0; car.race_finished_for_car = False
+        self.finish_times = [None] * len(self.cars)
+        self.track_s = [None] * len(self.cars); self._standings_laps = [0] * len(self.cars)
+        self.race_start_time = self.time_s
+        self.reset_triggers()
+
+    def reset_triggers(self):
+        """Forgets which zones the cars were in, after they have been moved by hand."""
+        self.triggers.reset()
+        for armed_crests in self._armed_hill_crests: armed_crests.clear()
+
+    @property
+    def player_finished(self):
+        return bool(self.player_car and self.player_car.race_finished_for_car)
+
+    @property
+    def all_finished(self):
+        return all(car.race_finished_for_car for car in self.cars)
+
+    # --- Stepping ---
+    def step(self, dt, player_inputs=None):
+        """
+        Advances the race by dt simulated seconds.
+
+        Args:
+            dt (float): Simulated seconds to advance.
+            player_inputs (tuple, optional): (throttle, brake, steer, handbrake) for the player car.
+                Ignored for AI-only races; None leaves the player's controls released.
+        """
+        if dt <= 0: return
+        self.begin_step(dt, player_inputs)
+        self.integrate(dt)
+        self.finish_step(dt)
+
+    # step() is split into phases so callers batching several races into one CarFleetState
+    # (see race_env.VectorRaceEnv) can run begin_step/finish_step per race around a single fleet step.
+    def begin_step(self, dt, player_inputs=None):
+        """Advances the clock, picks each car's level of detail, sets controls (player input and AI) and detects surfaces and jumps."""
+        self.time_s += dt; self.step_count += 1
+        self.update_lod()
+
+        if self.player_car:
+            if self.player_car.race_finished_for_car: self.player_car.set_controls(0, 0.2, 0, 0)
+            elif player_inputs is not None: self.player_car.set_controls(*player_inputs)
+            else: self.player_car.set_controls(0, 0, 0, 0)
+
+        with self.profiler.section("ai"):
+            for ai in self.ai_cars:
+                ai.update_ai(dt, self.course.checkpoints, self.num_course_checkpoints)
+
+        with self.profiler.section("surfaces"):
+            self.update_surface_flags()
+            for car_index, car_obj in enumerate(self.cars):
+                self.update_jump_triggers(car_index, car_obj)
+
+    def integrate(self, dt):
+        """Runs car physics (and particle effects) for every car, then moves the particles."""
+        with self.profiler.section("car_update"):
+            if self.fleet:
+                self.fleet.step(dt)
+                if self.visual_effects:
+                    for car_obj, full_detail in zip(self.cars, self.full_detail):
+                        if full_detail: car_obj.update_dust(dt); car_obj.update_mud_splash(dt)
+            else:
+                for car_obj, full_detail in zip(self.cars, self.full_detail):
+                    car_obj.update(dt, update_effects=self.visual_effects and full_detail)
+            if self.visual_effects: self.particles.update(dt)
+
+    def update_lod(self):
+        """
+        Drops AI cars further than LOD_DISTANCE from lod_focus_car to reduced detail (no dust, mud
+        splashes or tire tracks) and restores full detail once they are back within LOD_PROMOTE_DISTANCE.
+        Only cosmetic work is skipped: AI, car physics, surfaces, jumps, collisions and the trigger zones
+        that time laps run every step for every car, so the race result doesn't depend on which car the
+        camera follows.
+        """
+        focus = self.lod_focus_car
+        if focus is None:
+            if not all(self.full_detail): self.full_detail = [True] * len(self.cars)
+            return
+        demote_dist_sq = const.LOD_DISTANCE ** 2; promote_dist_sq = const.LOD_PROMOTE_DISTANCE ** 2
+        for car_index, car_obj in enumerate(self.cars):
+            if car_obj is focus or car_obj is self.player_car: continue
+            dist_x = car_obj.world_x - focus.world_x; dist_y = car_obj.world_y - focus.world_y
+            dist_sq = dist_x*dist_x + dist_y*dist_y
+            if self.full_detail[car_index]:
+                if dist_sq > demote_dist_sq:
+                    self.full_detail[car_index] = False
+                    self.particles.clear_owner(car_index) # Off screen; don't leave them frozen in place
+            elif dist_sq < promote_dist_sq:
+                self.full_detail[car_index] = True
+
+    def finish_step(self, dt):
+        """Resolves car-car collisions, then updates the trigger zones, which runs the lap bookkeeping."""
+        with self.profiler.section("collisions"):
+            self.resolve_car_collisions()
+
+        with self.profiler.section("triggers"):
+            self._trigger_step_dt = dt
+            self.triggers.update(self.cars)
+            self._record_finish_times()
+
+    def update_surface_flags(self):
+        """
+        Samples the surface map under every car's centre and tires in one gather. The centre sets
+        on_mud/on_road/on_grass (mud wins over road); each tire contributes a quarter of the car's
+        surface friction multiplier and speed dampening.
+        """
+        if not self.cars: return
+        if self.fleet:
+            a = self.fleet.arrays
+            world_xs = a["world_x"]; world_ys = a["world_y"]; headings = a["heading"]
+        else:
+            world_xs = np.array([car.world_x for car in self.cars]); world_ys = np.array([car.world_y for car in self.cars])
+            headings = np.array([car.heading for car in self.cars])
+        codes = self.course.surface_map.sample_body_points(world_xs, world_ys, headings, self.surface_sample_offsets)
+        centre_codes = codes[:, 0]; tire_codes = codes[:, 1:]
+        on_mud = (centre_codes & const.SURFACE_MUD) != 0
+        on_road = ~on_mud & ((centre_codes & const.SURFACE_ROAD) != 0)
+        on_grass = ~on_mud & ~on_road
+        friction_multipliers = FRICTION_BY_CODE[tire_codes].mean(axis=1)
+        speed_dampening = SPEED_DAMPENING_BY_CODE[tire_codes].mean(axis=1)
+        if self.fleet:
+            a["on_mud"][:] = on_mud; a["on_road"][:] = on_road; a["on_grass"][:] = on_grass
+            a["surface_friction_multiplier"][:] = friction_multipliers; a["surface_speed_dampening"][:] = speed_dampening
+            return
+        for car_obj, mud, road, grass, friction, dampening in zip(self.cars, on_mud.tolist(), on_road.tolist(), on_grass.tolist(),
+                                                                  friction_multipliers.tolist(), speed_dampening.tolist()):
+            car_obj.on_mud = mud; car_obj.on_road = road; car_obj.on_grass = grass
+            car_obj.surface_friction_multiplier = friction; car_obj.surface_speed_dampening = dampening
+
+    def update_jump_triggers(self, car_index, car_obj):
+        """
+        Launches a grounded car that is fast enough if it is on a ramp, or on a hill crest it hasn't
+        jumped from since driving onto it. Reads the occupancy from the last trigger update.
+        """
+        if car_obj.is_airborne or car_obj.speed <= car_obj.max_car_speed * const.MIN_JUMP_SPEED_FACTOR: return
+        armed_crests = self._armed_hill_crests[car_index]
+        for zone in self.triggers.occupied[car_index]:
+            if zone.kind == RAMP or zone in armed_crests:
+                armed_crests.discard(zone); car_obj.trigger_jump(); return
+
+    def resolve_car_collisions(self):
+        """
+        Pushes apart overlapping cars. Fields of COLLISION_BROAD_PHASE_MIN_CARS or more get their
+        candidate pairs from overlapping_circle_pairs(), using the positions at the start of the pass;
+        smaller fields just test every pair. Each candidate is re-measured before it is resolved,
+        since resolving an earlier pair may already have moved the cars.
+        """
+        cars = self.cars
+        if len(cars) < 2: return
+        if len(cars) < const.COLLISION_BROAD_PHASE_MIN_CARS:
+            candidate_pairs = itertools.combinations(range(len(cars)), 2)
+        else:
+            if self.fleet:
+                xs = self.fleet.arrays["world_x"]; ys = self.fleet.arrays["world_y"]
+            else:
+                xs = [car.world_x for car in cars]; ys = [car.world_y for car in cars]
+            candidate_pairs = overlapping_circle_pairs(xs, ys, self.collision_radii).tolist()
+        for i, j in candidate_pairs:
+            car1 = cars[i]; car2 = cars[j]
+            dist_x = car1.world_x - car2.world_x; dist_y = car1.world_y - car2.world_y
+            current_dist_sq = dist_x*dist_x + dist_y*dist_y
+            min_dist = car1.collision_radius + car2.collision_radius; min_dist_sq = min_dist*min_dist
+            if current_dist_sq < min_dist_sq and current_dist_sq > 1e-6:
+                current_dist = math.sqrt(current_dist_sq)
+                overlap = min_dist - current_dist
+                nx = dist_x / current_dist if current_dist != 0 else 1.0
+                ny = dist_y / current_dist if current_dist != 0 else 0.0
+                car1.resolve_collision_with(car2, nx, ny, overlap)
+
+    # --- Trigger events ---
+    def _on_hill_crest_event(self, event):
+        armed_crests = self._armed_hill_crests[event.car_index]
+        if event.type == ENTER: armed_crests.add(event.zone)
+        else: armed_crests.discard(event.zone)
+
+    def _event_time(self, event):
+        """Simulated time at which a trigger event happened within the step that reported it."""
+        return self.time_s - self._trigger_step_dt * (1.0 - event.time_fraction)
+
+    def _on_checkpoint_event(self, event):
+        if event.type == ENTER: self.advance_checkpoints(event.car_index, event.zone)
+
+    def _on_start_finish_crossed(self, event):
+        car = event.car; current_time_s = self._event_time(event)
+        if car.race_finished_for_car or current_time_s - car.last_line_crossing_time <= const.LINE_CROSSING_DEBOUNCE: return
+        car.last_line_crossing_time = current_time_s
+        if not car.race_started:
+            car.race_started = True; car.current_lap = 1; car.lap_start_time = current_time_s; car.lap_times = []
+            self._set_next_checkpoint_index(car, 0)
+        elif self.next_checkpoint_index(car) >= self.num_course_checkpoints:
+            car.lap_times.append(current_time_s - car.lap_start_time)
+            if car.current_lap >= self.total_laps:
+                car.race_finished_for_car = True
+                self.finish_times[event.car_index] = current_time_s - self.race_start_time
+                if car is self.player_car: self.player_final_total_time = self.finish_times[event.car_index]
+                return
+            car.current_lap += 1; car.lap_start_time = current_time_s; self._set_next_checkpoint_index(car, 0)
+        else: return
+        self.advance_checkpoints(event.car_index)
+
+    def advance_checkpoints(self, car_index, entered_zone=None):
+        """
+        Moves a racing car's next checkpoint past every checkpoint zone it is already inside, and
+        past entered_zone if that is the next one (it may have been passed straight through this step).
+        """
+        car = self.cars[car_index]
+        if not car.race_started or car.race_finished_for_car: return
+        zones = self.course.trigger_map.zones_of(CHECKPOINT if car is self.player_car else AI_CHECKPOINT)
+        next_index = self.next_checkpoint_index(car)
+        if next_index < len(zones) and zones[next_index] is entered_zone: next_index += 1
+        while next_index < len(zones) and self.triggers.is_inside(car_index, zones[next_index]): next_index += 1
+        self._set_next_checkpoint_index(car, next_index)
+
+    def _set_next_checkpoint_index(self, car, index):
+        if car is self.player_car: self.player_next_checkpoint_index = index
+        else: car.ai_target_checkpoint_index = index
+
+    def _record_finish_times(self):
+        """Fills in finish_times for cars marked finished outside the line handler."""
+        for i, car in enumerate(self.cars):
+            if car.race_finished_for_car and self.finish_times[i] is None:
+                self.finish_times[i] = self.race_time
+
+    # --- Standings ---
+    def next_checkpoint_index(self, car):
+        """Course checkpoint the car is heading for this lap; num_course_checkpoints means the finish line."""
+        if car is self.player_car: return max(self.player_next_checkpoint_index, 0)
+        return car.ai_target_checkpoint_index
+
+    def update_standings(self):
+        """
+        Orders the cars by race position: finishers by finish time, then everyone else by lap,
+        checkpoint reached and distance travelled along the track frame.
+
+        Returns:
+            list: self.standings, the cars leader first.
+        """
+        track_frame = self.course.track_frame
+        with self.profiler.section("standings"):
+            keys = []
+            for i, car in enumerate(self.cars):
+                lap = car.current_lap if car.race_started else 0
+                if lap != self._standings_laps[i]: # Just crossed the line: continue from the lap start, not the end of the centreline
+                    self._standings_laps[i] = lap; self.track_s[i] = self.course.lap_start_s
+                self.track_s[i] = track_frame.project(car.world_x, car.world_y, self.track_s[i])[0]
+                if car.race_finished_for_car: keys.append((0, self.finish_times[i] or 0.0, 0, 0.0))
+                else: keys.append((1, -lap, -self.next_checkpoint_index(car), -self.track_s[i]))
+            self.standings = [self.cars[i] for i in sorted(range(len(self.cars)), key=keys.__getitem__)]
+        return self.standings
+
+    def race_position(self, car):
+        return self.standings.index(car) + 1
+
+    # --- Results ---
+    def car_label(self, car):
+        if car is self.player_car: return "Player"
+        return f"AI {self.ai_cars.index(car) + 1}"
+
+    def results(self):
+        """
+        Returns one dict per car, ordered by finishing position (finishers by finish time,
+        then non-finishers by laps completed).
+        """
+        rows = []
+        for i, car in enumerate(self.cars):
+            rows.append({
+                'car': self.car_label(car),
+                'finished': car.race_finished_for_car,
+                'finish_time': self.finish_times[i],
+                'laps_completed': len(car.lap_times),
+                'lap_times': list(car.lap_times),
+            })
+        rows.sort(key=lambda r: (not r['finished'], r['finish_time'] if r['finished'] else 0.0, -r['laps_completed']))
+        for position, row in enumerate(rows, start=1):
+            row['position'] = position
+        return rows
+
+
+def run_headless_race(num_laps=const.DEFAULT_RACE_LAPS, num_ai=const.DEFAULT_NUM_AI, seed=None,
+                      difficulty_index=const.DEFAULT_DIFFICULTY_INDEX, num_checkpoints=const.DEFAULT_NUM_CHECKPOINTS,
+                      top_speed_percent=const.DEFAULT_TOP_SPEED_PERCENT, grip_percent=const.DEFAULT_GRIP_PERCENT,
+                      time_step=const.PHYSICS_TIME_STEP, max_race_time=const.HEADLESS_MAX_RACE_TIME,
+                      physics_backend=const.DEFAULT_PHYSICS_BACKEND):
+    """
+    Runs a complete AI-only race with no window, mixer or rendering, as fast as the CPU allows.
+    Cars still running after max_race_time simulated seconds are reported as DNF.
+
+    Returns:
+        dict: 'seed' (the master seed used, also when none was given), 'race_time', 'steps', 'wall_time' and the per-car 'results' rows.
+    """
+    seed = rng.seed_all(seed)
+    simulation = RaceSimulation.create(num_laps, num_checkpoints, num_ai, difficulty_index,
+                                       top_speed_percent, grip_percent, player_car=None, visual_effects=False,
+                                       physics_backend=physics_backend)
+    simulation.start_race()
+    wall_start = time.perf_counter(); steps = 0
+    while simulation.cars and not simulation.all_finished and simulation.race_time < max_race_time:
+        simulation.step(time_step)
+        steps += 1
+    return {
+        'seed': seed,
+        'race_time': simulation.race_time,
+        'steps': steps,
+        'wall_time': time.perf_counter() - wall_start,
+        'results': simulation.results(),
+    }
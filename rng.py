@@ -0,0 +1,60 @@
+# rally_racer_project/rng.py
+# This file contains the seeded random number registry. Every subsystem draws from its own
+# named stream, each derived from one master seed, so a seed reproduces a course and race
+# exactly and cosmetic randomness (dust, mud splash, audio noise) can never shift the
+# numbers the simulation sees.
+
+import hashlib
+import random
+import numpy as np
+
+# "course": course layout, mud shapes, ramps, hills. "ai": per-car setup variation and AI
+# driving parameters. "particles": dust and mud splash. "audio": generated sound noise.
+STREAM_NAMES = ("course", "ai", "particles", "audio")
+
+_master_seed = None
+_streams = {name: random.Random() for name in STREAM_NAMES}
+_numpy_streams = {name: np.random.default_rng() for name in STREAM_NAMES}
+
+
+def derive_seed(master_seed, name):
+    """Stable 64-bit seed for a stream (independent of PYTHONHASHSEED and the Python version)."""
+    digest = hashlib.sha256(f"{master_seed}:{name}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def seed_all(master_seed=None):
+    """
+    Reseeds every stream from one master seed. The stream objects are reseeded in place, so
+    references obtained earlier from stream() stay valid.
+
+    Args:
+        master_seed (int, optional): Seed to use; None picks a fresh one from system entropy.
+
+    Returns:
+        int: The master seed actually used, so an unseeded run can be replayed.
+    """
+    global _master_seed
+    if master_seed is None:
+        master_seed = random.SystemRandom().randrange(2**32)
+    _master_seed = master_seed
+    for name in STREAM_NAMES:
+        stream_seed = derive_seed(master_seed, name)
+        _streams[name].seed(stream_seed)
+        _numpy_streams[name].bit_generator.state = np.random.PCG64(stream_seed).state
+    return master_seed
+
+
+def current_seed():
+    """The master seed of the last seed_all() call, or None if the streams were never seeded."""
+    return _master_seed
+
+
+def stream(name):
+    """The random.Random instance for a subsystem."""
+    return _streams[name]
+
+
+def numpy_stream(name):
+    """The numpy Generator for a subsystem."""
+    return _numpy_streams[name]
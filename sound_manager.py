@@ -3,6 +3,7 @@
 
 import numpy as np
 import math
+import rng
 # Assuming constants.py is in the parent directory or the project root is in PYTHONPATH
 # If running main.py from the project root, this import should work.
 from constants import SAMPLE_RATE # Only import what's needed
@@ -41,7 +42,7 @@ def generate_sound_array(freq, duration_ms, waveform='sine', sample_rate=SAMPLE_
         wave = 0.5 * np.sign(np.sin(2. * math.pi * freq * t))
     elif waveform == 'noise':
         # White noise: random values between -0.5 and 0.5
-        wave = np.random.uniform(-0.5, 0.5, len(t))
+        wave = rng.numpy_stream("audio").uniform(-0.5, 0.5, len(t))
     elif waveform == 'engine': # Sawtooth-like wave for a basic engine sound
         # This creates a waveform that rises linearly and then drops, repeating.
         # The frequency here controls the pitch of the "putt-putt" sound.
@@ -0,0 +1,104 @@
+# rally_racer_project/spatial_index.py
+# This file contains SpatialIndex, a uniform grid over world space used to find the track
+# elements (mud, ramps, hills, road polygons) near a point or rect without scanning the whole course,
+# and overlapping_circle_pairs(), the sort-and-sweep broad-phase used for car-car collisions.
+
+import math
+import numpy as np
+
+import constants as const
+
+
+class SpatialIndex:
+    """
+    Files each item under every grid cell its bounding box overlaps. Queries only visit the cells
+    a box covers, so their cost grows with the number of nearby items rather than the course size.
+    Cells are kept in a dict keyed by (cell_x, cell_y), so the grid needs no fixed world extent.
+    """
+    def __init__(self, cell_size=const.SPATIAL_INDEX_CELL_SIZE):
+        """
+        Args:
+            cell_size (float, optional): Width and height of a grid cell in world units.
+        """
+        self.cell_size = cell_size
+        self.items = []
+        self.cells = {} # (cell_x, cell_y) -> indices into self.items, ascending
+
+    def __len__(self):
+        return len(self.items)
+
+    def _cell_range(self, min_x, min_y, max_x, max_y):
+        inv_cell_size = 1.0 / self.cell_size
+        return (math.floor(min_x * inv_cell_size), math.floor(min_y * inv_cell_size),
+                math.floor(max_x * inv_cell_size), math.floor(max_y * inv_cell_size))
+
+    def insert(self, item, min_x, min_y, max_x, max_y):
+        """Adds item with the given world-space bounding box."""
+        item_index = len(self.items)
+        self.items.append(item)
+        cell_x0, cell_y0, cell_x1, cell_y1 = self._cell_range(min_x, min_y, max_x, max_y)
+        for cell_x in range(cell_x0, cell_x1 + 1):
+            for cell_y in range(cell_y0, cell_y1 + 1):
+                self.cells.setdefault((cell_x, cell_y), []).append(item_index)
+
+    def insert_rect(self, item, rect):
+        self.insert(item, rect.left, rect.top, rect.right, rect.bottom)
+
+    def query(self, min_x, min_y, max_x, max_y):
+        """
+        Returns:
+            list: Every item whose bounding box shares a cell with the given box, in insertion order.
+                This is a superset of the items actually overlapping it; callers do the exact test.
+        """
+        cell_x0, cell_y0, cell_x1, cell_y1 = self._cell_range(min_x, min_y, max_x, max_y)
+        items = self.items; cells = self.cells
+        if cell_x0 == cell_x1 and cell_y0 == cell_y1:
+            bucket = cells.get((cell_x0, cell_y0))
+            return [items[i] for i in bucket] if bucket else []
+        found = set()
+        if (cell_x1 - cell_x0 + 1) * (cell_y1 - cell_y0 + 1) > len(cells): # Fewer occupied cells than covered ones
+            for (cell_x, cell_y), bucket in cells.items():
+                if cell_x0 <= cell_x <= cell_x1 and cell_y0 <= cell_y <= cell_y1: found.update(bucket)
+            return [items[i] for i in sorted(found)]
+        for cell_x in range(cell_x0, cell_x1 + 1):
+            for cell_y in range(cell_y0, cell_y1 + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket: found.update(bucket)
+        return [items[i] for i in sorted(found)]
+
+    def query_rect(self, rect):
+        return self.query(rect.left, rect.top, rect.right, rect.bottom)
+
+    def query_point(self, x, y):
+        return self.query(x, y, x, y)
+
+
+def overlapping_circle_pairs(xs, ys, radii):
+    """
+    Finds every pair of circles that overlap, without testing all n² pairs. Circles are sorted
+    by x and each one is only paired with the circles after it whose x is within its radius plus
+    the largest radius (sort and sweep); those candidates get one vectorized distance test.
+
+    Args:
+        xs, ys, radii (np.ndarray): (N,) circle centres and radii.
+
+    Returns:
+        np.ndarray: (P, 2) index pairs (i < j) of overlapping, non-coincident circles, sorted by i then j.
+    """
+    xs = np.asarray(xs, dtype=np.float64); ys = np.asarray(ys, dtype=np.float64); radii = np.asarray(radii, dtype=np.float64)
+    count = len(xs)
+    if count < 2: return np.empty((0, 2), dtype=np.intp)
+    order = np.argsort(xs, kind="stable")
+    sorted_xs = xs[order]
+    sweep_ends = np.searchsorted(sorted_xs, sorted_xs + radii[order] + radii.max(), side="right")
+    partner_counts = sweep_ends - np.arange(count) - 1
+    firsts = np.repeat(np.arange(count), partner_counts)
+    run_starts = np.repeat(np.cumsum(partner_counts) - partner_counts, partner_counts)
+    seconds = firsts + 1 + (np.arange(len(firsts)) - run_starts)
+    a = order[firsts]; b = order[seconds]
+    dx = xs[a] - xs[b]; dy = ys[a] - ys[b]
+    dist_sq = dx * dx + dy * dy
+    min_dist = radii[a] + radii[b]
+    overlapping = (dist_sq < min_dist * min_dist) & (dist_sq > 1e-6)
+    pairs = np.stack((np.minimum(a, b)[overlapping], np.maximum(a, b)[overlapping]), axis=1)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
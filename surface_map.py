@@ -0,0 +1,146 @@
+# rally_racer_project/surface_map.py
+# This file contains SurfaceMap, a uint8 grid baked once per course that records what lies under
+# every few world units (road, mud, ramp, hill crest) so physics can classify a car's surface with
+# a single array index instead of running polygon tests against the whole course.
+
+import numpy as np
+
+import constants as const
+
+
+def _surface_table(road_value, mud_value, grass_value):
+    """Per-code lookup table over every uint8 code, with mud taking priority over road."""
+    codes = np.arange(256)
+    return np.where(codes & const.SURFACE_MUD, mud_value, np.where(codes & const.SURFACE_ROAD, road_value, grass_value))
+
+# Friction multiplier and speed dampening a wheel gets from the surface code under it
+FRICTION_BY_CODE = _surface_table(const.ROAD_FRICTION_MULTIPLIER, const.MUD_FRICTION_MULTIPLIER, const.GRASS_FRICTION_MULTIPLIER)
+SPEED_DAMPENING_BY_CODE = _surface_table(1.0, const.MUD_SPEED_DAMPENING, const.GRASS_SPEED_DAMPENING)
+
+
+class SurfaceMap:
+    """
+    A square grid of surface bit flags (const.SURFACE_ROAD, SURFACE_MUD, SURFACE_RAMP,
+    SURFACE_HILL_CREST) covering [-world_bounds, world_bounds) on both axes. A cell with no
+    flag set is grass, as is everything outside the grid. Shapes are rasterized by cell centre.
+    """
+    def __init__(self, world_bounds=const.WORLD_BOUNDS, cell_size=const.SURFACE_MAP_CELL_SIZE):
+        """
+        Args:
+            world_bounds (float, optional): Half-width of the covered square in world units.
+            cell_size (float, optional): World units per grid cell.
+        """
+        self.world_bounds = world_bounds
+        self.cell_size = cell_size
+        self.cells_per_side = int(np.ceil(2 * world_bounds / cell_size))
+        self.grid = np.zeros((self.cells_per_side, self.cells_per_side), dtype=np.uint8) # [row (y), column (x)]
+
+    @classmethod
+    def from_course(cls, course, world_bounds=const.WORLD_BOUNDS, cell_size=const.SURFACE_MAP_CELL_SIZE):
+        """Bakes the road polygons, mud patches, ramps and hill crests of a course."""
+        surface_map = cls(world_bounds, cell_size)
+        surface_map.fill_polygons(course.road_segments_polygons, const.SURFACE_ROAD)
+        for mud in course.mud_patches: surface_map.fill_mud_patch(mud, const.SURFACE_MUD)
+        for ramp_obj in course.ramps: surface_map.fill_circle(ramp_obj.world_x, ramp_obj.world_y, ramp_obj.radius, const.SURFACE_RAMP)
+        for hill in course.visual_hills: surface_map.fill_circle(hill.world_x, hill.world_y, hill.crest_radius, const.SURFACE_HILL_CREST)
+        return surface_map
+
+    # --- Baking ---
+    def _cell_window(self, min_x, min_y, max_x, max_y):
+        """
+        Returns:
+            tuple: (row slice, column slice, cell centre xs, cell centre ys) for the cells whose
+                centres may fall inside the box, clipped to the grid. None if the box misses it.
+        """
+        first_col = max(0, int(np.floor((min_x + self.world_bounds) / self.cell_size)))
+        first_row = max(0, int(np.floor((min_y + self.world_bounds) / self.cell_size)))
+        last_col = min(self.cells_per_side - 1, int(np.floor((max_x + self.world_bounds) / self.cell_size)))
+        last_row = min(self.cells_per_side - 1, int(np.floor((max_y + self.world_bounds) / self.cell_size)))
+        if first_col > last_col or first_row > last_row: return None
+        centre_xs = (np.arange(first_col, last_col + 1) + 0.5) * self.cell_size - self.world_bounds
+        centre_ys = (np.arange(first_row, last_row + 1) + 0.5) * self.cell_size - self.world_bounds
+        return slice(first_row, last_row + 1), slice(first_col, last_col + 1), centre_xs, centre_ys
+
+    def fill_polygons(self, polygons, code):
+        """
+        Sets code on every cell whose centre is inside any of the polygons (even-odd rule).
+        Polygons with the same vertex count are tested together, each over a window of cells the
+        size of the largest bounding box in its group.
+        """
+        by_vertex_count = {}
+        for points in polygons:
+            if len(points) >= 3: by_vertex_count.setdefault(len(points), []).append(points)
+        for group in by_vertex_count.values():
+            vertices = np.asarray(group, dtype=np.float64) # (polygons, vertices, 2)
+            first_cols = np.floor((vertices[:, :, 0].min(axis=1) + self.world_bounds) / self.cell_size).astype(np.intp)
+            first_rows = np.floor((vertices[:, :, 1].min(axis=1) + self.world_bounds) / self.cell_size).astype(np.intp)
+            last_cols = np.floor((vertices[:, :, 0].max(axis=1) + self.world_bounds) / self.cell_size).astype(np.intp)
+            last_rows = np.floor((vertices[:, :, 1].max(axis=1) + self.world_bounds) / self.cell_size).astype(np.intp)
+            window_cols = np.arange(int((last_cols - first_cols).max()) + 1)
+            window_rows = np.arange(int((last_rows - first_rows).max()) + 1)
+            px = ((first_cols[:, np.newaxis] + window_cols + 0.5) * self.cell_size - self.world_bounds)[:, np.newaxis, :]
+            py = ((first_rows[:, np.newaxis] + window_rows + 0.5) * self.cell_size - self.world_bounds)[:, :, np.newaxis]
+            inside = np.zeros((len(group), len(window_rows), len(window_cols)), dtype=bool)
+            with np.errstate(divide="ignore", invalid="ignore"): # Horizontal edges never straddle a row
+                for i in range(vertices.shape[1]):
+                    x1 = vertices[:, i - 1, 0, np.newaxis, np.newaxis]; y1 = vertices[:, i - 1, 1, np.newaxis, np.newaxis]
+                    x2 = vertices[:, i, 0, np.newaxis, np.newaxis]; y2 = vertices[:, i, 1, np.newaxis, np.newaxis]
+                    straddles = (y1 > py) != (y2 > py)
+                    inside ^= straddles & (px < (x2 - x1) * (py - y1) / (y2 - y1) + x1)
+            polygon_idx, window_row, window_col = np.nonzero(inside)
+            rows = first_rows[polygon_idx] + window_row; cols = first_cols[polygon_idx] + window_col
+            in_grid = (rows >= 0) & (rows < self.cells_per_side) & (cols >= 0) & (cols < self.cells_per_side)
+            rows = rows[in_grid]; cols = cols[in_grid]
+            self.grid[rows, cols] |= code
+
+    def fill_mud_patch(self, mud, code):
+        """Sets code on every cell whose centre is inside the mud patch, using its compiled polar geometry."""
+        window = self._cell_window(mud.rect.left, mud.rect.top, mud.rect.right, mud.rect.bottom)
+        if window is None: return
+        rows, cols, centre_xs, centre_ys = window
+        self.grid[rows, cols][mud.check_collision_many(centre_xs[np.newaxis, :], centre_ys[:, np.newaxis])] |= code
+
+    def fill_circle(self, centre_x, centre_y, radius, code):
+        """Sets code on every cell whose centre is inside the circle."""
+        window = self._cell_window(centre_x - radius, centre_y - radius, centre_x + radius, centre_y + radius)
+        if window is None: return
+        rows, cols, centre_xs, centre_ys = window
+        dist_sq = (centre_xs[np.newaxis, :] - centre_x) ** 2 + (centre_ys[:, np.newaxis] - centre_y) ** 2
+        self.grid[rows, cols][dist_sq < radius * radius] |= code
+
+    # --- Lookup ---
+    def lookup(self, world_x, world_y):
+        """Surface flags under a world position (0, i.e. grass, outside the grid)."""
+        col = int((world_x + self.world_bounds) // self.cell_size)
+        row = int((world_y + self.world_bounds) // self.cell_size)
+        if 0 <= row < self.cells_per_side and 0 <= col < self.cells_per_side:
+            return int(self.grid[row, col])
+        return const.SURFACE_GRASS
+
+    def lookup_many(self, world_xs, world_ys):
+        """Vectorized lookup() for arrays of positions."""
+        cols = np.floor((np.asarray(world_xs) + self.world_bounds) / self.cell_size).astype(np.intp)
+        rows = np.floor((np.asarray(world_ys) + self.world_bounds) / self.cell_size).astype(np.intp)
+        in_grid = (rows >= 0) & (rows < self.cells_per_side) & (cols >= 0) & (cols < self.cells_per_side)
+        codes = np.full(rows.shape, const.SURFACE_GRASS, dtype=np.uint8)
+        codes[in_grid] = self.grid[rows[in_grid], cols[in_grid]]
+        return codes
+
+    def sample_body_points(self, world_xs, world_ys, headings, offsets):
+        """
+        Looks up points fixed to each car's body (centre, tires...) for a whole field in one gather.
+
+        Args:
+            world_xs, world_ys, headings (np.ndarray): (N,) car positions and headings in degrees.
+            offsets (np.ndarray): (K, 2) or (N, K, 2) points in the car's frame (x forward, y right).
+
+        Returns:
+            np.ndarray: (N, K) surface codes.
+        """
+        offsets = np.asarray(offsets, dtype=np.float64)
+        heading_rad = np.radians(np.asarray(headings, dtype=np.float64))[:, np.newaxis]
+        cos_h = np.cos(heading_rad); sin_h = np.sin(heading_rad)
+        offset_x = offsets[..., 0]; offset_y = offsets[..., 1]
+        sample_xs = np.asarray(world_xs, dtype=np.float64)[:, np.newaxis] + offset_x * cos_h - offset_y * sin_h
+        sample_ys = np.asarray(world_ys, dtype=np.float64)[:, np.newaxis] + offset_x * sin_h + offset_y * cos_h
+        return self.lookup_many(sample_xs, sample_ys)
@@ -0,0 +1,44 @@
+# tests/test_car_sprites.py
+# CarSpriteCache shadows: one cached sprite per heading and jump step, with the jump's alpha baked in.
+
+import pygame
+import pytest
+
+import constants as const
+from classes import Car, CarSpriteCache
+from classes.car_sprites import CAR_SPRITES
+
+
+@pytest.fixture(autouse=True)
+def display():
+    pygame.display.init(); pygame.display.set_mode((1, 1))
+    yield
+    pygame.display.quit()
+
+
+def max_alpha(sprite):
+    return max(sprite.get_at((x, y))[3] for x in range(sprite.get_width()) for y in range(sprite.get_height()))
+
+
+def test_shadows_are_cached_per_heading_and_jump_step():
+    cache = CarSpriteCache(); car = Car(0, 0)
+    ground = cache.shadow_sprite(car, 30.0)
+    assert cache.shadow_sprite(car, 30.4) is ground
+    assert cache.shadow_sprite(car, 30.0, 0.5 / const.CAR_SHADOW_JUMP_STEPS) is ground # Rounds to the same jump step
+    top = cache.shadow_sprite(car, 30.0, 1.0)
+    assert top is not ground and len(cache) == 2
+    assert top.get_width() < ground.get_width()
+    assert max_alpha(ground) == const.SHADOW_COLOR[3]
+    assert max_alpha(top) == int(const.SHADOW_COLOR[3] * 0.3)
+
+
+def test_drawing_a_jumping_car_leaves_the_cached_shadows_alone():
+    CAR_SPRITES.clear(); car = Car(0, 0); car.screen_x = car.screen_y = 50
+    screen = pygame.Surface((100, 100))
+    car.set_render_pose(10.0); car.draw(screen)
+    ground = CAR_SPRITES.shadow_sprite(car, 10.0); alpha_before = ground.get_alpha()
+    car.is_airborne = True; car.initial_airborne_duration_this_jump = 1.0
+    for timer in (0.9, 0.7, 0.5, 0.3):
+        car.airborne_timer = timer; car.set_render_pose(10.0); car.draw(screen)
+    assert ground.get_alpha() == alpha_before and max_alpha(ground) == const.SHADOW_COLOR[3]
+    assert len([key for key in CAR_SPRITES.sprites if key[0] is None]) == 4 # Ground, plus three distinct jump steps (0.7 and 0.3 mirror)
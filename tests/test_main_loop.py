@@ -0,0 +1,39 @@
+# tests/test_main_loop.py
+# The windowed game's fixed-step driver, advance_simulation().
+
+import math
+
+import pytest
+
+import constants as const
+import rng
+from main import advance_simulation, simulation_done
+from race_simulation import RaceSimulation
+
+FRAME_DT = 1.0 / const.RENDER_FPS
+
+
+def make_race():
+    rng.seed_all(3)
+    sim = RaceSimulation.create(num_ai=2, num_checkpoints=2, visual_effects=False)
+    sim.start_race()
+    return sim
+
+
+@pytest.mark.parametrize("time_scale", [math.inf, 50.0])
+def test_stepping_stops_at_the_race_time_cap(time_scale):
+    sim = make_race(); accumulator = 0.0
+    for _ in range(200):
+        accumulator, _ = advance_simulation(sim, const.PHYSICS_TIME_STEP, accumulator, FRAME_DT, time_scale, None,
+                                            const.RENDER_FPS, max_race_time=2.0)
+    assert simulation_done(sim, 2.0)
+    assert 2.0 <= sim.race_time < 2.0 + const.PHYSICS_TIME_STEP
+
+
+def test_finished_race_is_not_stepped():
+    sim = make_race()
+    for car in sim.cars: car.race_finished_for_car = True
+    time_before = sim.time_s
+    for time_scale in (math.inf, 1.0, 8.0):
+        assert advance_simulation(sim, const.PHYSICS_TIME_STEP, 0.0, FRAME_DT, time_scale, None, const.RENDER_FPS) == (0.0, 1.0)
+    assert sim.time_s == time_before
@@ -0,0 +1,23 @@
+# tests/test_race_env.py
+# Observations of the RL environments.
+
+import numpy as np
+
+from race_env import RaceEnv, VectorRaceEnv
+
+
+def test_first_observation_has_surface_features():
+    env = RaceEnv(num_ai=1, num_checkpoints=2)
+    observation, _ = env.reset(seed=3)
+    assert observation[7:10].sum() == 1 # Exactly one of on_road / on_mud / on_grass
+    car = env.agent_car
+    assert observation[7:10].tolist() == [car.on_road, car.on_mud, car.on_grass]
+
+
+def test_vector_env_first_observations_match_single_envs():
+    vector_env = VectorRaceEnv(2, num_checkpoints=2)
+    observations, _ = vector_env.reset(seed=3)
+    assert observations.shape[0] == 2
+    assert np.all(observations[:, 7:10].sum(axis=1) == 1)
+    single_observation, _ = RaceEnv(num_checkpoints=2).reset(seed=3)
+    np.testing.assert_allclose(observations[0], single_observation, rtol=1e-6)
@@ -0,0 +1,36 @@
+# tests/test_surface_map.py
+# SurfaceMap baking and lookup codes.
+
+import numpy as np
+
+import constants as const
+from surface_map import SurfaceMap, FRICTION_BY_CODE, SPEED_DAMPENING_BY_CODE
+
+
+def test_codes_combine_and_default_to_grass():
+    surface_map = SurfaceMap(world_bounds=200, cell_size=4)
+    surface_map.fill_polygons([[(-100, -20), (100, -20), (100, 20), (-100, 20)]], const.SURFACE_ROAD)
+    surface_map.fill_circle(0, 0, 30, const.SURFACE_MUD)
+    assert surface_map.lookup(0, 0) == const.SURFACE_ROAD | const.SURFACE_MUD
+    assert surface_map.lookup(80, 0) == const.SURFACE_ROAD
+    assert surface_map.lookup(0, 25) == const.SURFACE_MUD
+    assert surface_map.lookup(80, 80) == const.SURFACE_GRASS
+    assert surface_map.lookup(1000, 0) == const.SURFACE_GRASS # Outside the grid
+    assert surface_map.lookup_many(np.array([0, 80, 80, 1000]), np.array([0, 0, 80, 0])).tolist() == \
+        [const.SURFACE_ROAD | const.SURFACE_MUD, const.SURFACE_ROAD, const.SURFACE_GRASS, const.SURFACE_GRASS]
+
+
+def test_mud_takes_priority_over_road():
+    road_and_mud = const.SURFACE_ROAD | const.SURFACE_MUD
+    assert FRICTION_BY_CODE[road_and_mud] == const.MUD_FRICTION_MULTIPLIER
+    assert SPEED_DAMPENING_BY_CODE[road_and_mud] == const.MUD_SPEED_DAMPENING
+    assert FRICTION_BY_CODE[const.SURFACE_ROAD | const.SURFACE_RAMP] == const.ROAD_FRICTION_MULTIPLIER
+    assert FRICTION_BY_CODE[const.SURFACE_GRASS] == const.GRASS_FRICTION_MULTIPLIER
+
+
+def test_body_points_are_sampled_in_the_car_frame():
+    surface_map = SurfaceMap(world_bounds=200, cell_size=4)
+    surface_map.fill_circle(40, 0, 8, const.SURFACE_MUD)
+    offsets = np.array([(0.0, 0.0), (40.0, 0.0)])
+    codes = surface_map.sample_body_points(np.array([0.0, 0.0]), np.array([0.0, 0.0]), np.array([0.0, 90.0]), offsets)
+    assert codes.tolist() == [[const.SURFACE_GRASS, const.SURFACE_MUD], [const.SURFACE_GRASS, const.SURFACE_GRASS]]
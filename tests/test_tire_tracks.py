@@ -0,0 +1,70 @@
+# tests/test_tire_tracks.py
+# TireTrackLayer: cached tiles draw the same as a fresh blend, fade out on schedule and are only redrawn when they change.
+
+import numpy as np
+import pygame
+import pytest
+
+import constants as const
+from tire_tracks import TireTrackLayer
+
+
+@pytest.fixture(autouse=True)
+def display():
+    pygame.display.init(); pygame.display.set_mode((1, 1))
+    yield
+    pygame.display.quit()
+
+
+def render(layer, camera, time_s):
+    screen = pygame.Surface((const.SCREEN_WIDTH, const.SCREEN_HEIGHT)); screen.fill((60, 140, 60))
+    layer.draw(screen, *camera, time_s)
+    return pygame.image.tobytes(screen, "RGB")
+
+
+def random_stamps(rand, start_time, num_stamps):
+    return [(rand.uniform(-900.0, 900.0), rand.uniform(-700.0, 700.0), rand.uniform(0.0, 360.0), start_time + i * 0.01)
+            for i in range(num_stamps)]
+
+
+def drive(layer, rand, start_time, num_stamps):
+    for stamp in random_stamps(rand, start_time, num_stamps): layer.stamp(*stamp)
+
+
+def test_cached_tiles_match_a_fresh_blend():
+    rand = np.random.default_rng(4); cached = TireTrackLayer(capacity=1000); stamps = []; camera = (0.0, 0.0)
+    for frame in range(40):
+        time_s = frame * 1.3
+        for stamp in random_stamps(rand, time_s, 30):
+            cached.stamp(*stamp); stamps.append(stamp)
+        camera = (camera[0] + rand.uniform(-60.0, 60.0), camera[1] + rand.uniform(-60.0, 60.0))
+        fresh = TireTrackLayer(capacity=1000)
+        for stamp in stamps: fresh.stamp(*stamp)
+        assert render(cached, camera, time_s) == render(fresh, camera, time_s)
+
+
+def test_faded_stamps_are_dropped():
+    layer = TireTrackLayer(); rand = np.random.default_rng(1)
+    drive(layer, rand, 0.0, 200)
+    render(layer, (0.0, 0.0), 1.0)
+    assert layer.tiles
+    render(layer, (0.0, 0.0), 2.0 + const.TIRE_TRACK_FADE_TIME)
+    assert not layer.tiles
+
+
+def test_tiles_are_only_redrawn_when_the_fade_steps(monkeypatch):
+    layer = TireTrackLayer(); rand = np.random.default_rng(2)
+    drive(layer, rand, 0.0, 300)
+    redraws = []
+    redraw = layer._redraw
+    monkeypatch.setattr(layer, "_redraw", lambda key, epoch: redraws.append(key) or redraw(key, epoch))
+    first = render(layer, (0.0, 0.0), 3.0)
+    tiles_in_view = len(redraws)
+    assert tiles_in_view
+    drive(layer, rand, 3.0, 20) # New stamps are blended into the cached tiles
+    render(layer, (0.0, 0.0), 3.1)
+    assert len(redraws) == tiles_in_view
+    render(layer, (0.0, 0.0), layer.fade_step + 0.01) # Every stamp fades one level
+    assert len(redraws) == 2 * tiles_in_view
+    assert first != render(layer, (0.0, 0.0), 2 * layer.fade_step + 0.01)
+
@@ -0,0 +1,47 @@
+# tests/test_track_frame.py
+# TrackFrame projection: exact nearest-segment answers, and far off-road points only testing nearby segments.
+
+import numpy as np
+import pytest
+
+import constants as const
+from track_frame import TrackFrame
+
+
+def wavy_centerline(num_points=2001, length=100000.0):
+    xs = np.linspace(0.0, length, num_points)
+    return np.stack((xs, 600.0 * np.sin(xs / 2500.0)), axis=1)
+
+
+def brute_force_project(points, world_x, world_y, s_hint=None):
+    starts = points[:-1]; vectors = np.diff(points, axis=0); lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+    cumulative_s = np.concatenate(([0.0], np.cumsum(lengths)))
+    t = np.clip(((world_x - starts[:, 0]) * vectors[:, 0] + (world_y - starts[:, 1]) * vectors[:, 1]) / lengths ** 2, 0.0, 1.0)
+    dist_sq = (world_x - starts[:, 0] - t * vectors[:, 0]) ** 2 + (world_y - starts[:, 1] - t * vectors[:, 1]) ** 2
+    if s_hint is not None:
+        outside = (cumulative_s[1:] < s_hint - const.TRACK_FRAME_MAX_S_STEP) | (cumulative_s[:-1] > s_hint + const.TRACK_FRAME_MAX_S_STEP)
+        if not outside.all(): dist_sq[outside] = np.inf
+    best = int(np.argmin(dist_sq))
+    return cumulative_s[best] + t[best] * lengths[best]
+
+
+@pytest.mark.parametrize("offset", [0.0, 300.0, 1500.0, 6000.0, 40000.0])
+def test_project_matches_brute_force(offset):
+    points = wavy_centerline(); frame = TrackFrame(points)
+    rand = np.random.default_rng(5)
+    for x in rand.uniform(-2000.0, 102000.0, 40):
+        y = 600.0 * np.sin(x / 2500.0) + offset * rand.choice((-1.0, 1.0))
+        assert frame.project(x, y)[0] == pytest.approx(brute_force_project(points, x, y), abs=1e-6)
+        s_hint = float(np.clip(x + rand.uniform(-3000.0, 3000.0), 0.0, frame.length))
+        assert frame.project(x, y, s_hint)[0] == pytest.approx(brute_force_project(points, x, y, s_hint), abs=1e-6)
+
+
+def test_far_points_only_examine_nearby_segments(monkeypatch):
+    frame = TrackFrame(wavy_centerline())
+    examined = []
+    closest = frame._closest
+    monkeypatch.setattr(frame, "_closest", lambda segments, x, y: examined.append(len(segments)) or closest(segments, x, y))
+    for x in np.linspace(5000.0, 95000.0, 20):
+        frame.project(x, 600.0 * np.sin(x / 2500.0) + 3000.0)
+        frame.project(x, 600.0 * np.sin(x / 2500.0) - 3000.0, s_hint=x)
+    assert max(examined) < len(frame) // 10
@@ -0,0 +1,110 @@
+# tests/test_triggers.py
+# TriggerSystem event order and swept timing on a hand-built TriggerMap.
+
+from types import SimpleNamespace
+
+import pytest
+
+from triggers import (TriggerMap, TriggerSystem, TriggerZone, RAMP, CHECKPOINT, START_FINISH,
+                      ENTER, EXIT, CROSS)
+
+
+class FakeCar:
+    collision_box_half_size = 10.0
+
+    def __init__(self, x=0.0, y=0.0):
+        self.prev_world_x = self.world_x = x; self.prev_world_y = self.world_y = y
+
+    def move_to(self, x, y):
+        self.prev_world_x = self.world_x; self.prev_world_y = self.world_y
+        self.world_x = x; self.world_y = y
+
+
+def make_system(*zones, num_cars=1):
+    trigger_map = TriggerMap()
+    for zone in zones: trigger_map.add(zone)
+    return TriggerSystem(SimpleNamespace(trigger_map=trigger_map), num_cars)
+
+
+def summary(events):
+    return [(event.type, event.zone.kind, round(event.time_fraction, 6)) for event in events]
+
+
+def test_events_are_ordered_by_when_they_happen_during_the_move():
+    system = make_system(TriggerZone(START_FINISH, line=((300.0, -50.0), (300.0, 50.0))),
+                         TriggerZone(CHECKPOINT, 0, (100.0, 0.0), 20.0))
+    car = FakeCar(); car.move_to(400.0, 0.0)
+    assert summary(system.update([car])) == [(ENTER, CHECKPOINT, 0.2), (EXIT, CHECKPOINT, 0.3), (CROSS, START_FINISH, 0.75)]
+    assert system.occupied[0] == []
+
+
+def test_enter_and_exit_are_reported_once():
+    zone = TriggerZone(CHECKPOINT, 0, (0.0, 0.0), 50.0)
+    system = make_system(zone)
+    car = FakeCar(-100.0, 0.0)
+    car.move_to(-25.0, 0.0)
+    assert summary(system.update([car])) == [(ENTER, CHECKPOINT, pytest.approx(2 / 3))]
+    assert system.is_inside(0, zone)
+    car.move_to(0.0, 0.0)
+    assert system.update([car]) == []
+    car.move_to(100.0, 0.0)
+    assert summary(system.update([car])) == [(EXIT, CHECKPOINT, 0.5)]
+    assert not system.is_inside(0, zone)
+
+
+def test_exit_comes_before_enter_at_the_same_moment():
+    first = TriggerZone(CHECKPOINT, 0, (0.0, 0.0), 10.0)
+    second = TriggerZone(CHECKPOINT, 1, (20.0, 0.0), 10.0)
+    system = make_system(first, second)
+    car = FakeCar(); system.update([car]) # Starts inside the first zone
+    car.move_to(0.0, 0.0); system.update([car])
+    car.move_to(20.0, 0.0)
+    assert [(event.type, event.zone.payload) for event in system.update([car])] == [(EXIT, 0), (ENTER, 1)]
+
+
+def test_ramps_test_the_car_box_at_the_end_of_the_move():
+    ramp = TriggerZone(RAMP, None, (0.0, 0.0), 20.0, uses_car_box=True)
+    system = make_system(ramp)
+    car = FakeCar(-100.0, 0.0)
+    car.move_to(100.0, 0.0) # Passing straight over a box zone within one step is not swept
+    assert system.update([car]) == []
+    car.move_to(25.0, 0.0) # Centre outside the circle, box overlapping it
+    assert summary(system.update([car])) == [(ENTER, RAMP, 1.0)]
+
+
+def test_line_crossings_need_movement_across_the_line():
+    system = make_system(TriggerZone(START_FINISH, line=((0.0, -50.0), (0.0, 50.0))))
+    car = FakeCar(-10.0, 0.0)
+    car.move_to(-1.0, 0.0)
+    assert system.update([car]) == []
+    car.move_to(3.0, 0.0)
+    assert summary(system.update([car])) == [(CROSS, START_FINISH, 0.25)]
+
+
+def test_slow_cars_still_cross_the_line_at_a_high_step_rate():
+    system = make_system(TriggerZone(START_FINISH, line=((0.0, -50.0), (0.0, 50.0))))
+    car = FakeCar(-0.1, 0.0); events = []
+    for _ in range(10): # 3 u/s at 120 Hz
+        car.move_to(car.world_x + 3.0 / 120, 0.0); events += system.update([car])
+    assert [(event.type, event.zone.kind) for event in events] == [(CROSS, START_FINISH)]
+
+
+def test_listeners_only_get_their_kinds_and_cars_are_independent():
+    system = make_system(TriggerZone(CHECKPOINT, 0, (0.0, 0.0), 20.0),
+                         TriggerZone(START_FINISH, line=((50.0, -50.0), (50.0, 50.0))), num_cars=2)
+    received = []
+    system.add_listener(received.append, (START_FINISH,))
+    moving = FakeCar(-40.0, 0.0); parked = FakeCar(500.0, 500.0)
+    moving.move_to(60.0, 0.0); parked.move_to(500.0, 500.0)
+    events = system.update([moving, parked])
+    assert [(event.type, event.car_index) for event in events] == [(ENTER, 0), (EXIT, 0), (CROSS, 0)]
+    assert [(event.type, event.car_index) for event in received] == [(CROSS, 0)]
+
+
+def test_reset_forgets_occupancy():
+    system = make_system(TriggerZone(CHECKPOINT, 0, (0.0, 0.0), 20.0))
+    car = FakeCar()
+    assert [event.type for event in system.update([car])] == [ENTER]
+    system.reset()
+    car.move_to(0.0, 0.0)
+    assert [event.type for event in system.update([car])] == [ENTER]
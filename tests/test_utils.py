@@ -0,0 +1,55 @@
+# tests/test_utils.py
+# The NumPy batch helpers in utils.py agree with the scalar functions they stand in for.
+
+import math
+
+import numpy as np
+import pytest
+
+from utils import (check_line_crossing, is_point_in_polygon, point_segment_distance_sq,
+                   points_in_polygon, points_segments_min_distance_sq, segments_cross_line)
+
+
+def random_polygon(rand, num_vertices):
+    """A star-shaped polygon with vertices at random radii around (0, 0)."""
+    angles = np.sort(rand.uniform(0.0, 2 * math.pi, num_vertices))
+    radii = rand.uniform(20.0, 100.0, num_vertices)
+    return list(zip((radii * np.cos(angles)).tolist(), (radii * np.sin(angles)).tolist()))
+
+
+@pytest.mark.parametrize("num_vertices", [3, 4, 9, 40])
+def test_points_in_polygon_matches_scalar(num_vertices):
+    rand = np.random.default_rng(num_vertices)
+    polygon = random_polygon(rand, num_vertices)
+    xs = rand.uniform(-110.0, 110.0, 500); ys = rand.uniform(-110.0, 110.0, 500)
+    expected = [is_point_in_polygon((x, y), polygon) for x, y in zip(xs.tolist(), ys.tolist())]
+    assert points_in_polygon(xs, ys, polygon).tolist() == expected
+
+
+def test_points_in_polygon_degenerate_polygon():
+    assert not points_in_polygon([0.0, 1.0], [0.0, 1.0], [(0.0, 0.0), (5.0, 5.0)]).any()
+
+
+def test_points_segments_min_distance_sq_matches_scalar():
+    rand = np.random.default_rng(2)
+    starts = rand.uniform(-50.0, 50.0, (30, 2)); ends = starts + rand.uniform(-20.0, 20.0, (30, 2))
+    ends[3] = starts[3] # A zero-length segment
+    xs = rand.uniform(-80.0, 80.0, 200); ys = rand.uniform(-80.0, 80.0, 200)
+    expected = [min(point_segment_distance_sq((x, y), tuple(a), tuple(b)) for a, b in zip(starts.tolist(), ends.tolist()))
+                for x, y in zip(xs.tolist(), ys.tolist())]
+    assert points_segments_min_distance_sq(xs, ys, starts, ends) == pytest.approx(expected, rel=1e-12, abs=1e-12)
+    assert np.isinf(points_segments_min_distance_sq([0.0], [0.0], [], [])).all()
+
+
+@pytest.mark.parametrize("line", [((0.0, -40.0), (0.0, 40.0)), ((-30.0, -30.0), (25.0, 35.0)), ((-40.0, 10.0), (40.0, 10.0))])
+def test_segments_cross_line_matches_scalar(line):
+    rand = np.random.default_rng(3)
+    starts = rand.uniform(-50.0, 50.0, (400, 2)); ends = starts + rand.uniform(-30.0, 30.0, (400, 2))
+    # Touching and collinear cases: moves ending exactly on the line, and moves along it
+    (q1x, q1y), (q2x, q2y) = line
+    starts[:20] = [(q1x + (q2x - q1x) * t, q1y + (q2y - q1y) * t) for t in np.linspace(-0.5, 1.5, 20)]
+    ends[:20] = starts[:20] + [(q2x - q1x) * 0.1, (q2y - q1y) * 0.1]
+    ends[20:40] = [(q1x + (q2x - q1x) * t, q1y + (q2y - q1y) * t) for t in np.linspace(0.0, 1.0, 20)]
+    expected = [check_line_crossing(tuple(a), tuple(b), *line) for a, b in zip(starts.tolist(), ends.tolist())]
+    assert segments_cross_line(starts, ends, *line).tolist() == expected
+    assert any(expected) and not all(expected)
@@ -0,0 +1,183 @@
+# rally_racer_project/tire_tracks.py
+# This file contains TireTrackLayer, the tire-track marks left on the grass. Marks are kept as a
+# fixed-capacity ring buffer of stamps in NumPy arrays and fade out with age, so memory and draw
+# cost stay bounded however long the race runs and however many cars leave marks. Stamps are also
+# filed under the square world tiles their marks cover, so drawing only looks at the tiles in view,
+# and each tile in view keeps its blended marks until they change.
+
+import itertools
+import math
+import numpy as np
+import pygame
+
+import constants as const
+
+
+def _stamp_sprite(alpha):
+    """One tire mark: a TIRE_TRACK_RADIUS circle in TIRE_TRACK_COLOR with the given alpha."""
+    size = const.TIRE_TRACK_RADIUS * 2 + 1
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA); sprite.fill((0, 0, 0, 0))
+    pygame.draw.circle(sprite, const.TIRE_TRACK_COLOR[:3] + (alpha,), (const.TIRE_TRACK_RADIUS, const.TIRE_TRACK_RADIUS), const.TIRE_TRACK_RADIUS)
+    return sprite
+
+
+class _DrawnTile:
+    """The blended marks of one tile in view as of fade step epoch, and the slots filed under it since."""
+    def __init__(self, surface, epoch):
+        self.surface = surface
+        self.epoch = epoch
+        self.bounds = None # pygame.Rect in tile pixels covering every mark drawn, None while empty
+        self.pending = [] # Slots filed under the tile after it was drawn
+
+
+class TireTrackLayer:
+    """
+    Each stamp records a car's position, heading and the time it was made; drawing puts a mark
+    under both rear tires. Once capacity stamps exist the oldest is overwritten. A stamp fades to
+    nothing over TIRE_TRACK_FADE_TIME in TIRE_TRACK_FADE_LEVELS steps that each have a pre-rendered
+    sprite; every stamp steps down at the same moments (multiples of fade_time / levels), and
+    stamps that have faded out are dropped. The default capacity holds TIRE_TRACK_STAMP_RATE
+    stamps a second for the whole fade time, so stamps fade out before they are overwritten.
+    Each stamp is filed under every TIRE_TRACK_TILE_SIZE tile its marks overlap, in a dict keyed by
+    (tile_x, tile_y) whose entries exist only while they hold stamps. Each tile in view keeps a
+    surface with its marks max-blended (so overlapping marks don't darken each other): new stamps
+    are blended in as they arrive, and the tile is only redrawn from scratch when the fade steps
+    down. Those redraws stop for the frame once TIRE_TRACK_REDRAW_BUDGET stamps have been redrawn,
+    oldest first, so a view full of marks catches up over a few frames instead of stalling one.
+    Drawing blits just the part of the tile surfaces that has marks.
+    """
+    def __init__(self, capacity=const.TIRE_TRACK_CAPACITY, fade_time=const.TIRE_TRACK_FADE_TIME, tile_size=const.TIRE_TRACK_TILE_SIZE):
+        """
+        Args:
+            capacity (int, optional): Stamps kept before the oldest are overwritten.
+            fade_time (float, optional): Seconds a stamp takes to fade out completely.
+            tile_size (int, optional): Width and height of a tile in world units.
+        """
+        self.capacity = capacity
+        self.fade_time = fade_time
+        self.fade_step = fade_time / const.TIRE_TRACK_FADE_LEVELS # Every stamp fades one level at each multiple of this
+        self.tile_size = tile_size
+        self.xs = np.zeros(capacity); self.ys = np.zeros(capacity); self.headings = np.zeros(capacity)
+        self.times = np.zeros(capacity) # Simulated time each stamp was made
+        self.count = 0 # Stamps in use (at most capacity)
+        self.next_slot = 0 # Slot the next stamp overwrites
+        self.tiles = {} # (tile_x, tile_y) -> set of the slots whose marks overlap the tile
+        self._slot_tiles = [()] * capacity # Tile keys each slot is filed under
+        self._drawn = {} # (tile_x, tile_y) -> _DrawnTile, for the tiles in view last frame
+        self._spare_surfaces = [] # Surfaces of tiles that left the view, for reuse
+        base_alpha = const.TIRE_TRACK_COLOR[3]
+        self._sprites = np.empty(const.TIRE_TRACK_FADE_LEVELS + 1, dtype=object) # Indexed by fade level
+        self._sprites[:] = [_stamp_sprite(round(base_alpha * level / const.TIRE_TRACK_FADE_LEVELS))
+                            for level in range(const.TIRE_TRACK_FADE_LEVELS + 1)]
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        for slots in self.tiles.values(): # Only filed slots have tile keys to forget
+            for slot in slots: self._slot_tiles[slot] = ()
+        self.count = 0; self.next_slot = 0; self.tiles.clear()
+        for key in list(self._drawn): self._release(key)
+
+    def _epoch(self, time_s):
+        return math.floor(time_s / self.fade_step)
+
+    def stamp(self, world_x, world_y, heading, time_s):
+        """Records a car at (world_x, world_y) with the given heading in degrees at simulated time time_s."""
+        slot = self.next_slot
+        if self._slot_tiles[slot]:
+            # Overwriting a stamp that hasn't faded out yet: the tiles showing it are redrawn without it
+            if self._epoch(time_s) - self._epoch(self.times[slot]) < const.TIRE_TRACK_FADE_LEVELS:
+                for key in self._slot_tiles[slot]: self._release(key)
+            self._unfile(slot)
+        self.xs[slot] = world_x; self.ys[slot] = world_y; self.headings[slot] = heading; self.times[slot] = time_s
+        reach = const.TIRE_TRACK_OFFSET_REAR + const.TIRE_TRACK_OFFSET_SIDE + const.TIRE_TRACK_RADIUS + 1; tile_size = self.tile_size
+        keys = tuple((tile_x, tile_y)
+                     for tile_x in range(math.floor((world_x - reach) / tile_size), math.floor((world_x + reach) / tile_size) + 1)
+                     for tile_y in range(math.floor((world_y - reach) / tile_size), math.floor((world_y + reach) / tile_size) + 1))
+        for key in keys:
+            self.tiles.setdefault(key, set()).add(slot)
+            drawn = self._drawn.get(key)
+            if drawn is not None: drawn.pending.append(slot)
+        self._slot_tiles[slot] = keys
+        self.next_slot = (slot + 1) % self.capacity; self.count = min(self.count + 1, self.capacity)
+
+    def _unfile(self, slot):
+        for key in self._slot_tiles[slot]:
+            slots = self.tiles[key]; slots.discard(slot)
+            if not slots: del self.tiles[key]
+        self._slot_tiles[slot] = ()
+
+    def _release(self, key):
+        """Forgets a tile's blended marks, keeping its surface for reuse."""
+        drawn = self._drawn.pop(key, None)
+        if drawn is not None: self._spare_surfaces.append(drawn.surface)
+
+    def _fade_levels(self, slots, epoch):
+        return np.minimum(const.TIRE_TRACK_FADE_LEVELS - (epoch - np.floor(self.times[slots] / self.fade_step)),
+                          const.TIRE_TRACK_FADE_LEVELS).astype(np.intp)
+
+    def _blend_marks(self, drawn, slots, levels, tile_x, tile_y):
+        """Max-blends the marks of the given slots, at the given fade levels, into a tile's surface."""
+        if not len(slots): return
+        radius = const.TIRE_TRACK_RADIUS
+        heading_rad = np.radians(self.headings[slots]); cos_h = np.cos(heading_rad); sin_h = np.sin(heading_rad)
+        rear_x = self.xs[slots] - const.TIRE_TRACK_OFFSET_REAR * cos_h; rear_y = self.ys[slots] - const.TIRE_TRACK_OFFSET_REAR * sin_h
+        side_x = -const.TIRE_TRACK_OFFSET_SIDE * sin_h; side_y = const.TIRE_TRACK_OFFSET_SIDE * cos_h
+        # Both rear tires; sprite top-left corners in tile pixels
+        mark_xs = (np.floor(np.concatenate((rear_x + side_x, rear_x - side_x))) - tile_x * self.tile_size - radius).astype(np.intp)
+        mark_ys = (np.floor(np.concatenate((rear_y + side_y, rear_y - side_y))) - tile_y * self.tile_size - radius).astype(np.intp)
+        levels = np.concatenate((levels, levels))
+        bounds = pygame.Rect(int(mark_xs.min()), int(mark_ys.min()), int(mark_xs.max() - mark_xs.min()) + 2 * radius + 1,
+                             int(mark_ys.max() - mark_ys.min()) + 2 * radius + 1).clip(drawn.surface.get_rect())
+        if not bounds.width or not bounds.height: return
+        drawn.bounds = bounds if drawn.bounds is None else drawn.bounds.union(bounds)
+        drawn.surface.blits(zip(self._sprites[levels].tolist(), zip(mark_xs.tolist(), mark_ys.tolist()),
+                                itertools.repeat(None), itertools.repeat(pygame.BLEND_RGBA_MAX)), doreturn=False)
+
+    def _redraw(self, key, epoch):
+        """
+        Blends every stamp of a tile afresh at the fade levels of epoch, dropping the stamps that have faded out.
+
+        Returns:
+            _DrawnTile: The tile's blended marks, or None if none of its stamps are left.
+        """
+        filed = self.tiles.get(key) # Gone if redrawing a neighbour dropped its last stamps
+        slots = np.fromiter(filed or (), dtype=np.intp, count=len(filed or ()))
+        levels = self._fade_levels(slots, epoch); live = levels > 0
+        for slot in slots[~live].tolist(): self._unfile(slot)
+        if key not in self.tiles:
+            self._release(key); return None
+        drawn = self._drawn.get(key)
+        if drawn is None:
+            surface = self._spare_surfaces.pop() if self._spare_surfaces else pygame.Surface((self.tile_size, self.tile_size), pygame.SRCALPHA)
+            surface.fill((0, 0, 0, 0))
+            drawn = self._drawn[key] = _DrawnTile(surface, epoch)
+        else:
+            if drawn.bounds is not None: drawn.surface.fill((0, 0, 0, 0), drawn.bounds)
+            drawn.epoch = epoch; drawn.bounds = None; drawn.pending.clear()
+        self._blend_marks(drawn, slots[live], levels[live], *key)
+        return drawn
+
+    def draw(self, surface, camera_offset_x, camera_offset_y, time_s):
+        """Draws the marks of the stamps inside the view centred on the camera, faded to time_s."""
+        view_left = math.floor(camera_offset_x - const.CENTER_X); view_top = math.floor(camera_offset_y - const.CENTER_Y)
+        tile_size = self.tile_size; epoch = self._epoch(time_s)
+        in_view = [(tile_x, tile_y) for tile_x in range(view_left // tile_size, (view_left + const.SCREEN_WIDTH - 1) // tile_size + 1)
+                   for tile_y in range(view_top // tile_size, (view_top + const.SCREEN_HEIGHT - 1) // tile_size + 1) if (tile_x, tile_y) in self.tiles]
+        for key in [key for key in self._drawn if key not in in_view]: self._release(key)
+        for key in in_view: # Tiles coming into view have nothing to show until drawn, so they don't wait for the budget
+            if key not in self._drawn: self._redraw(key, epoch)
+        budget = const.TIRE_TRACK_REDRAW_BUDGET
+        for key in sorted((key for key in in_view if key in self._drawn and self._drawn[key].epoch != epoch), key=lambda key: self._drawn[key].epoch):
+            if budget <= 0: break
+            budget -= len(self.tiles.get(key, ())); self._redraw(key, epoch)
+        for key in in_view:
+            drawn = self._drawn.get(key)
+            if drawn is None or key not in self.tiles: continue
+            if drawn.pending: # Blended at the fade level the rest of the tile was drawn at
+                slots = np.array(drawn.pending, dtype=np.intp); drawn.pending.clear()
+                self._blend_marks(drawn, slots, self._fade_levels(slots, drawn.epoch), *key)
+            if drawn.bounds is not None:
+                surface.blit(drawn.surface, (key[0] * tile_size - view_left + drawn.bounds.x, key[1] * tile_size - view_top + drawn.bounds.y),
+                             area=drawn.bounds)
@@ -0,0 +1,127 @@
+# rally_racer_project/track_frame.py
+# This file contains TrackFrame, an arc-length parameterization of the road centreline that maps
+# world positions to (s, lateral offset) track coordinates and back. Race standings use s to order
+# cars between checkpoints.
+
+import bisect
+import numpy as np
+
+import constants as const
+from spatial_index import SpatialIndex
+
+
+class TrackFrame:
+    """
+    Track coordinates along a centreline polyline: s is the distance travelled along the
+    centreline from its first point, lateral the signed distance from it (positive to the right
+    of the direction of travel). Segments are filed in a SpatialIndex so projecting a point only
+    tests the few segments near it, and s -> position is a bisect over the cumulative lengths.
+    Points far off the road widen the index query until it finds segments, rather than testing
+    every segment.
+    """
+    def __init__(self, centerline_points, cell_size=const.SPATIAL_INDEX_CELL_SIZE, search_radius=const.TRACK_FRAME_SEARCH_RADIUS):
+        """
+        Args:
+            centerline_points (list): (x, y) points of the road centreline in driving order.
+            cell_size (float, optional): Cell size of the segment index.
+            search_radius (float, optional): Segments are filed this far beyond their ends, so points
+                within it of the centreline are answered by the cell they fall in; points further away
+                need a wider query.
+        """
+        points = np.asarray(centerline_points, dtype=np.float64).reshape(-1, 2)
+        self.segment_starts = points[:-1]
+        self.segment_vectors = np.diff(points, axis=0)
+        self.segment_lengths = np.hypot(self.segment_vectors[:, 0], self.segment_vectors[:, 1])
+        self.cumulative_s = np.concatenate(([0.0], np.cumsum(self.segment_lengths)))
+        self.length = float(self.cumulative_s[-1])
+        self._cumulative_s_list = self.cumulative_s.tolist() # bisect is faster on a list than on an array
+        self._all_segments = np.arange(len(self.segment_lengths))
+        self.search_radius = search_radius
+        self._index_bounds = (*(points.min(axis=0) - search_radius).tolist(), *(points.max(axis=0) + search_radius).tolist())
+
+        self.segment_index = SpatialIndex(cell_size)
+        for i, ((x1, y1), (x2, y2)) in enumerate(zip(points[:-1].tolist(), points[1:].tolist())):
+            self.segment_index.insert(i, min(x1, x2) - search_radius, min(y1, y2) - search_radius,
+                                      max(x1, x2) + search_radius, max(y1, y2) + search_radius)
+
+    def __len__(self):
+        return len(self.segment_lengths)
+
+    def project(self, world_x, world_y, s_hint=None):
+        """
+        Maps a world position to track coordinates.
+
+        Args:
+            s_hint (float, optional): The point's s from the previous call. Only segments within
+                TRACK_FRAME_MAX_S_STEP of it along the track are considered, so a car cutting across
+                the grass, or passing where the centreline comes back near itself (roundabouts, the
+                start/finish straight), keeps following its own part of the track.
+
+        Returns:
+            tuple: (s, lateral). (0.0, 0.0) if the centreline has no segments.
+        """
+        if len(self.segment_lengths) == 0: return 0.0, 0.0
+        segments = self._candidates(self.segment_index.query_point(world_x, world_y), s_hint)
+        if len(segments):
+            return self._closest(segments, world_x, world_y)[1:]
+        # Further than search_radius from every (in-window) segment: double a box around the point until
+        # it catches some, then re-query a box reaching the nearest of them so no closer segment is missed
+        half_size = self.search_radius
+        while not len(segments):
+            if self._box_covers_index(world_x, world_y, half_size):
+                segments = self._candidates(self._all_segments, s_hint)
+                if not len(segments): segments = self._all_segments
+                return self._closest(segments, world_x, world_y)[1:]
+            segments = self._candidates(self._query_box(world_x, world_y, half_size), s_hint)
+            half_size *= 2
+        dist_sq, s, lateral = self._closest(segments, world_x, world_y)
+        reach = np.sqrt(dist_sq) - self.search_radius # Segments filed within reach of the point's box may be closer
+        if reach > half_size / 2:
+            segments = self._candidates(self._query_box(world_x, world_y, reach), s_hint)
+            dist_sq, s, lateral = self._closest(segments, world_x, world_y)
+        return s, lateral
+
+    def _query_box(self, world_x, world_y, half_size):
+        return self.segment_index.query(world_x - half_size, world_y - half_size, world_x + half_size, world_y + half_size)
+
+    def _box_covers_index(self, world_x, world_y, half_size):
+        min_x, min_y, max_x, max_y = self._index_bounds
+        return world_x - half_size <= min_x and world_y - half_size <= min_y and world_x + half_size >= max_x and world_y + half_size >= max_y
+
+    def _candidates(self, found, s_hint):
+        """The segment indices found by an index query, as an array, limited to s_hint's window if given."""
+        segments = np.array(found, dtype=np.intp)
+        return self._segments_near_s(segments, s_hint) if s_hint is not None and len(segments) else segments
+
+    def _closest(self, segments, world_x, world_y):
+        """
+        Returns:
+            tuple: (squared distance, s, lateral) of the point on the given segments closest to the world position.
+        """
+        starts = self.segment_starts[segments]; vectors = self.segment_vectors[segments]; lengths = self.segment_lengths[segments]
+        rel_x = world_x - starts[:, 0]; rel_y = world_y - starts[:, 1]
+        lengths_sq = np.maximum(lengths * lengths, 1e-12)
+        t = np.clip((rel_x * vectors[:, 0] + rel_y * vectors[:, 1]) / lengths_sq, 0.0, 1.0)
+        dist_sq = (rel_x - t * vectors[:, 0]) ** 2 + (rel_y - t * vectors[:, 1]) ** 2
+        s_values = self.cumulative_s[segments] + t * lengths
+        best = int(np.argmin(dist_sq))
+        lateral = (vectors[best, 0] * rel_y[best] - vectors[best, 1] * rel_x[best]) / max(lengths[best], 1e-6)
+        return float(dist_sq[best]), float(s_values[best]), float(lateral)
+
+    def _segments_near_s(self, segments, s_hint):
+        """The given segments that overlap [s_hint - TRACK_FRAME_MAX_S_STEP, s_hint + TRACK_FRAME_MAX_S_STEP]."""
+        in_window = (self.cumulative_s[segments + 1] >= s_hint - const.TRACK_FRAME_MAX_S_STEP) & \
+                    (self.cumulative_s[segments] <= s_hint + const.TRACK_FRAME_MAX_S_STEP)
+        return segments[in_window]
+
+    def position_at(self, s, lateral=0.0):
+        """World (x, y) at track coordinates (s, lateral). s is clamped to [0, length]."""
+        if len(self.segment_lengths) == 0: return 0.0, 0.0
+        s = min(max(s, 0.0), self.length)
+        i = min(bisect.bisect_right(self._cumulative_s_list, s) - 1, len(self.segment_lengths) - 1)
+        length = self.segment_lengths[i]
+        t = (s - self.cumulative_s[i]) / length if length > 0 else 0.0
+        dir_x, dir_y = self.segment_vectors[i] / (length if length > 0 else 1.0)
+        x = self.segment_starts[i, 0] + t * self.segment_vectors[i, 0] - dir_y * lateral
+        y = self.segment_starts[i, 1] + t * self.segment_vectors[i, 1] + dir_x * lateral
+        return float(x), float(y)
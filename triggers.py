@@ -0,0 +1,214 @@
+# rally_racer_project/triggers.py
+# This file contains the trigger-zone system: TriggerMap, the zones of a course (ramps, hill crests,
+# checkpoints, the start/finish line) filed in a SpatialIndex, and TriggerSystem, which tracks which
+# zones each car is in and reports enter/exit/cross events only when that changes.
+
+import math
+from collections import namedtuple
+
+import constants as const
+from utils import clamp, check_line_crossing, segments_cross_line
+from spatial_index import SpatialIndex
+
+# Zone kinds
+RAMP = "ramp"
+HILL_CREST = "hill_crest"
+CHECKPOINT = "checkpoint"       # Rounding circle of a course checkpoint as the player must drive it
+AI_CHECKPOINT = "ai_checkpoint" # The same checkpoint with the AI's wider rounding radius
+START_FINISH = "start_finish"
+
+# Event types
+ENTER = "enter"
+EXIT = "exit"
+CROSS = "cross"
+
+# time_fraction: how far through the car's move this step the event happened (0 = previous position, 1 = current)
+TriggerEvent = namedtuple("TriggerEvent", "type car_index car zone time_fraction")
+_EVENT_ORDER = {EXIT: 0, ENTER: 1, CROSS: 2} # Tie-break for events at the same fraction
+
+
+class TriggerZone:
+    """
+    A circle a car can be inside of, or a line a car can cross. Circles test either the car's
+    centre or, with uses_car_box, its square collision box. payload is the track element
+    (Ramp, VisualHill) or checkpoint index the zone was made for.
+    """
+    def __init__(self, kind, payload=None, center=None, radius=0.0, uses_car_box=False, line=None):
+        self.kind = kind
+        self.payload = payload
+        self.center = center
+        self.radius = radius
+        self.uses_car_box = uses_car_box
+        self.line = line
+
+    @property
+    def is_line(self):
+        return self.line is not None
+
+    def bounds(self):
+        if self.is_line:
+            (x1, y1), (x2, y2) = self.line
+            return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+        x, y = self.center
+        return x - self.radius, y - self.radius, x + self.radius, y + self.radius
+
+    def contains(self, x, y, box_half_size):
+        """Whether a car at (x, y) with the given collision box half-size is inside this circle."""
+        zone_x, zone_y = self.center
+        if self.uses_car_box: # Closest point of the box to the centre
+            x = clamp(zone_x, x - box_half_size, x + box_half_size); y = clamp(zone_y, y - box_half_size, y + box_half_size)
+        dx = x - zone_x; dy = y - zone_y
+        return dx*dx + dy*dy < self.radius * self.radius
+
+    def sweep(self, prev_x, prev_y, x, y):
+        """
+        Where the straight move from (prev_x, prev_y) to (x, y) enters and leaves this circle.
+
+        Returns:
+            tuple: (enter_fraction, exit_fraction) along the move, unclamped (values in [0, 1] fall
+                within it), or None if the move's line misses the circle.
+        """
+        zone_x, zone_y = self.center
+        dx = x - prev_x; dy = y - prev_y; fx = prev_x - zone_x; fy = prev_y - zone_y
+        a = dx*dx + dy*dy
+        if a < 1e-12: return None
+        b = fx*dx + fy*dy; c = fx*fx + fy*fy - self.radius * self.radius
+        discriminant = b*b - a*c
+        if discriminant <= 0: return None
+        root = math.sqrt(discriminant)
+        return (-b - root) / a, (-b + root) / a
+
+    def crossing_fraction(self, prev_x, prev_y, x, y):
+        """Fraction along the move from (prev_x, prev_y) to (x, y) at which it crosses this line, or None."""
+        if not check_line_crossing((prev_x, prev_y), (x, y), *self.line): return None
+        return self.line_fraction(prev_x, prev_y, x, y)
+
+    def line_fraction(self, prev_x, prev_y, x, y):
+        """crossing_fraction() for a move already known to cross this line."""
+        (q1x, q1y), (q2x, q2y) = self.line
+        dx = x - prev_x; dy = y - prev_y; ex = q2x - q1x; ey = q2y - q1y
+        denominator = dx*ey - dy*ex
+        if abs(denominator) < 1e-12: return 1.0 # Moving along the line; count it at the end of the move
+        return clamp(((q1x - prev_x)*ey - (q1y - prev_y)*ex) / denominator, 0.0, 1.0)
+
+
+class TriggerMap:
+    """
+    The static zones of a course, filed in a SpatialIndex. Zones of each kind keep their
+    registration order in zones_by_kind, so checkpoint zones can be looked up by course index.
+    """
+    def __init__(self, cell_size=const.SPATIAL_INDEX_CELL_SIZE):
+        self.zones = []
+        self.zones_by_kind = {}
+        self.lines = [] # The line zones, tested against every car's move at once
+        self.index = SpatialIndex(cell_size)
+
+    @classmethod
+    def from_course(cls, course):
+        trigger_map = cls()
+        for ramp_obj in course.ramps:
+            trigger_map.add(TriggerZone(RAMP, ramp_obj, (ramp_obj.world_x, ramp_obj.world_y), ramp_obj.radius, uses_car_box=True))
+        for hill in course.visual_hills:
+            trigger_map.add(TriggerZone(HILL_CREST, hill, (hill.world_x, hill.world_y), hill.crest_radius))
+        for cp_index, cp in enumerate(course.checkpoints[2:]): # Skip the two S/F gate markers
+            trigger_map.add(TriggerZone(CHECKPOINT, cp_index, (cp.world_x, cp.world_y), const.CHECKPOINT_ROUNDING_RADIUS))
+            trigger_map.add(TriggerZone(AI_CHECKPOINT, cp_index, (cp.world_x, cp.world_y), const.AI_CHECKPOINT_ROUNDING_RADIUS))
+        trigger_map.add(TriggerZone(START_FINISH, line=tuple(course.start_finish_line)))
+        return trigger_map
+
+    def add(self, zone):
+        self.zones.append(zone)
+        self.zones_by_kind.setdefault(zone.kind, []).append(zone)
+        if zone.is_line: self.lines.append(zone)
+        self.index.insert(zone, *zone.bounds())
+        return zone
+
+    def zones_of(self, kind):
+        return self.zones_by_kind.get(kind, [])
+
+
+class TriggerSystem:
+    """
+    Per-race trigger state over a course's TriggerMap. update() tests each car only against the
+    zones the spatial index files near its last move, keeps the circles it is inside in occupied,
+    and returns (and passes to listeners) an event for every change:
+        ENTER / EXIT when a car moves into or out of a circle,
+        CROSS when a car's move from its previous to its current position crosses a line.
+    Moves are swept: a car whose centre passes right through a circle within one step gets both
+    ENTER and EXIT, and every event carries the fraction of the move at which it happened, so
+    large steps neither skip checkpoints nor snap lap times to the step. Circles that test the car's
+    box (ramps) are only tested at the current position, with fraction 1.
+    The map is read from course.trigger_map on every update, so rebuilding the course's lookups
+    takes effect immediately. Line crossings are tested in one batch per line, over the cars whose
+    moves the index files near it.
+    """
+    def __init__(self, course, num_cars):
+        """
+        Args:
+            course (Course): The course whose trigger_map to use.
+            num_cars (int): Cars are identified by their index into the list passed to update().
+        """
+        self.course = course
+        self.occupied = [[] for _ in range(num_cars)] # Zones each car is inside, in map order
+        self._listeners = []
+
+    def add_listener(self, callback, kinds=None):
+        """Calls callback(event) for every event on zones of the given kinds (all kinds if None)."""
+        self._listeners.append((callback, frozenset(kinds) if kinds is not None else None))
+
+    def reset(self):
+        """Forgets every car's occupancy, e.g. after teleporting the cars. Cars already inside a zone get a fresh ENTER."""
+        for zones in self.occupied: zones.clear()
+
+    def is_inside(self, car_index, zone):
+        return zone in self.occupied[car_index]
+
+    def update(self, cars):
+        """
+        Args:
+            cars (list): The cars, in the order used for car_index.
+
+        Returns:
+            list: TriggerEvent tuples, each car's in the order they happened during its move.
+        """
+        trigger_map = self.course.trigger_map; events_by_car = []
+        line_moves = {} # Line zone -> (car_index, move, the car's events) of each car near it
+        for car_index, car in enumerate(cars):
+            x = car.world_x; y = car.world_y; prev_x = car.prev_world_x; prev_y = car.prev_world_y
+            half_size = car.collision_box_half_size
+            nearby = trigger_map.index.query(min(x, prev_x) - half_size, min(y, prev_y) - half_size,
+                                             max(x, prev_x) + half_size, max(y, prev_y) + half_size)
+            previously_inside = self.occupied[car_index]
+            inside = []; car_events = []
+            for zone in nearby:
+                if zone.is_line: # Crossings are tested below, for every car near the line at once
+                    line_moves.setdefault(zone, []).append((car_index, (prev_x, prev_y, x, y), car_events))
+                    continue
+                now_inside = zone.contains(x, y, half_size); was_inside = zone in previously_inside
+                if now_inside: inside.append(zone)
+                if now_inside == was_inside and (now_inside or zone.uses_car_box): continue
+                fractions = None if zone.uses_car_box else zone.sweep(prev_x, prev_y, x, y)
+                if now_inside:
+                    car_events.append(TriggerEvent(ENTER, car_index, car, zone, clamp(fractions[0], 0.0, 1.0) if fractions else 1.0))
+                elif was_inside:
+                    car_events.append(TriggerEvent(EXIT, car_index, car, zone, clamp(fractions[1], 0.0, 1.0) if fractions else 1.0))
+                elif fractions and 0.0 <= fractions[0] and fractions[1] <= 1.0: # Passed right through during the move
+                    car_events.append(TriggerEvent(ENTER, car_index, car, zone, fractions[0]))
+                    car_events.append(TriggerEvent(EXIT, car_index, car, zone, fractions[1]))
+            for zone in previously_inside: # Zones left behind outside the query (the car was moved by hand)
+                if zone not in nearby: car_events.append(TriggerEvent(EXIT, car_index, car, zone, 1.0))
+            self.occupied[car_index] = inside
+            events_by_car.append(car_events)
+        for zone, moves in line_moves.items():
+            crossed = segments_cross_line([move[:2] for _, move, _ in moves], [move[2:] for _, move, _ in moves], *zone.line)
+            for (car_index, move, car_events), hit in zip(moves, crossed.tolist()):
+                if hit: car_events.append(TriggerEvent(CROSS, car_index, cars[car_index], zone, zone.line_fraction(*move)))
+        events = []
+        for car_events in events_by_car:
+            if len(car_events) > 1: car_events.sort(key=lambda event: (event.time_fraction, _EVENT_ORDER[event.type]))
+            events.extend(car_events)
+        if self._listeners:
+            for event in events:
+                for callback, kinds in self._listeners:
+                    if kinds is None or event.zone.kind in kinds: callback(event)
+        return events
@@ -173,4 +173,28 @@ def draw_pedal_indicator(surface, value, display_rect, active_color, label, font
 def draw_handbrake_indicator(surface, active, position_tuple, radius, font_to_use):
     color_to_use = const.HANDBRAKE_INDICATOR_COLOR if active else const.GRAY
     pygame.draw.circle(surface, color_to_use, position_tuple, radius)
-    pygame.draw.circle(surface, const.BLACK, position_tuple, radius, 1)
\ No newline at end of file
+    pygame.draw.circle(surface, const.BLACK, position_tuple, radius, 1)
+
+def draw_standings(surface, rows, position, font_to_use, highlight_index=-1):
+    """Draws the live race order as a panel of rows of (text, color); highlight_index gets a marker."""
+    if not rows: return
+    line_height = font_to_use.get_linesize()
+    rendered = [font_to_use.render(("> " if i == highlight_index else "  ") + text, True, color) for i, (text, color) in enumerate(rows)]
+    panel = pygame.Surface((max(text.get_width() for text in rendered) + 20, line_height * len(rendered) + 10), pygame.SRCALPHA)
+    panel.fill(const.STANDINGS_PANEL_BG)
+    for i, text in enumerate(rendered):
+        panel.blit(text, (10, 5 + i * line_height))
+    surface.blit(panel, position)
+
+def draw_profiler_overlay(surface, stats_rows, position, font_to_use):
+    """Draws a table of per-phase frame timings (rows of (phase, mean_ms, p95_ms, max_ms))."""
+    if not stats_rows: return
+    line_height = font_to_use.get_linesize()
+    lines = [f"{'phase':<16}{'mean':>8}{'p95':>8}{'max':>8}"]
+    lines += [f"{name:<16}{mean_ms:>8.2f}{p95_ms:>8.2f}{max_ms:>8.2f}" for name, mean_ms, p95_ms, max_ms in stats_rows]
+    rendered = [font_to_use.render(line, True, const.WHITE) for line in lines]
+    panel = pygame.Surface((max(text.get_width() for text in rendered) + 20, line_height * len(rendered) + 10), pygame.SRCALPHA)
+    panel.fill(const.PROFILER_OVERLAY_BG)
+    for i, text in enumerate(rendered):
+        panel.blit(text, (10, 5 + i * line_height))
+    surface.blit(panel, position)
@@ -2,6 +2,7 @@
 # This file contains general utility functions for the Rally Racer game.
 
 import math
+import numpy as np
 
 def deg_to_rad(degrees):
     """Converts degrees to radians."""
@@ -182,4 +183,75 @@ def is_point_in_polygon(point, polygon_vertices):
                     if p1x == p2x or x <= xinters: # If edge is vertical OR point is to the left of intersection
                         inside = not inside
         p1x, p1y = p2x, p2y
-    return inside
\ No newline at end of file
+    return inside
+
+# --- Batch (NumPy) counterparts of the scalar helpers above ---
+# Each takes arrays of points or segments and returns the same answers as calling the scalar
+# function once per element (squared distances to within the last bit), without the Python loop.
+def points_in_polygon(xs, ys, polygon_vertices):
+    """
+    is_point_in_polygon() for many points against one polygon.
+    xs, ys: (N,) point coordinates. polygon_vertices: list of (x, y).
+    Returns: (N,) bool array.
+    """
+    xs = np.asarray(xs, dtype=np.float64); ys = np.asarray(ys, dtype=np.float64)
+    inside = np.zeros(xs.shape, dtype=bool)
+    if len(polygon_vertices) < 3: return inside
+    vertices = np.asarray(polygon_vertices, dtype=np.float64)
+    for (p1x, p1y), (p2x, p2y) in zip(np.roll(vertices, 1, axis=0).tolist(), vertices.tolist()):
+        if p1y == p2y: continue # Horizontal edges never toggle, as in the scalar version
+        crosses = (ys > min(p1y, p2y)) & (ys <= max(p1y, p2y)) & (xs <= max(p1x, p2x))
+        if p1x != p2x: crosses &= xs <= (ys - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+        inside ^= crosses
+    return inside
+
+def points_segments_min_distance_sq(xs, ys, segment_starts, segment_ends):
+    """
+    The smallest point_segment_distance_sq() from each point to any of the segments.
+    xs, ys: (N,) point coordinates. segment_starts, segment_ends: (M, 2) segment end points.
+    Returns: (N,) float array (inf if there are no segments).
+    """
+    px = np.asarray(xs, dtype=np.float64)[:, np.newaxis]; py = np.asarray(ys, dtype=np.float64)[:, np.newaxis]
+    starts = np.asarray(segment_starts, dtype=np.float64).reshape(-1, 2); ends = np.asarray(segment_ends, dtype=np.float64).reshape(-1, 2)
+    if len(starts) == 0: return np.full(px.shape[0], np.inf)
+    ax = starts[:, 0]; ay = starts[:, 1]
+    ab_x = ends[:, 0] - ax; ab_y = ends[:, 1] - ay
+    ap_x = px - ax; ap_y = py - ay
+    len_sq_ab = ab_x * ab_x + ab_y * ab_y
+    with np.errstate(divide="ignore", invalid="ignore"): # Zero-length segments fall back to the start point below
+        t = (ap_x * ab_x + ap_y * ab_y) / len_sq_ab
+    t = np.where(len_sq_ab == 0, 0.0, t)
+    closest_x = np.where(t < 0, ax, np.where(t > 1, ends[:, 0], ax + t * ab_x))
+    closest_y = np.where(t < 0, ay, np.where(t > 1, ends[:, 1], ay + t * ab_y))
+    return ((px - closest_x)**2 + (py - closest_y)**2).min(axis=1)
+
+def segments_cross_line(segment_starts, segment_ends, line_p1, line_p2):
+    """
+    check_line_crossing() for many segments (e.g. every car's move this step) against one line.
+    segment_starts, segment_ends: (N, 2) arrays. line_p1, line_p2: tuples (x, y).
+    Returns: (N,) bool array.
+    """
+    starts = np.asarray(segment_starts, dtype=np.float64).reshape(-1, 2); ends = np.asarray(segment_ends, dtype=np.float64).reshape(-1, 2)
+    p1x, p1y = starts[:, 0], starts[:, 1]; p2x, p2y = ends[:, 0], ends[:, 1]
+    (q1x, q1y), (q2x, q2y) = line_p1, line_p2
+    overlaps = ~((np.maximum(p1x, p2x) < min(q1x, q2x)) | (np.minimum(p1x, p2x) > max(q1x, q2x)) |
+                 (np.maximum(p1y, p2y) < min(q1y, q2y)) | (np.minimum(p1y, p2y) > max(q1y, q2y)))
+
+    def orientation(px, py, qx, qy, rx, ry):
+        val = (qy - py) * (rx - qx) - (qx - px) * (ry - qy)
+        return np.where(np.abs(val) < 1e-9, 0, np.where(val > 0, 1, 2))
+
+    def on_segment(px, py, qx, qy, rx, ry):
+        return ((qx <= np.maximum(px, rx)) & (qx >= np.minimum(px, rx)) &
+                (qy <= np.maximum(py, ry)) & (qy >= np.minimum(py, ry)))
+
+    o1 = orientation(p1x, p1y, p2x, p2y, q1x, q1y)
+    o2 = orientation(p1x, p1y, p2x, p2y, q2x, q2y)
+    o3 = orientation(q1x, q1y, q2x, q2y, p1x, p1y)
+    o4 = orientation(q1x, q1y, q2x, q2y, p2x, p2y)
+    crosses = (o1 != o2) & (o3 != o4)
+    crosses |= (o1 == 0) & on_segment(p1x, p1y, q1x, q1y, p2x, p2y)
+    crosses |= (o2 == 0) & on_segment(p1x, p1y, q2x, q2y, p2x, p2y)
+    crosses |= (o3 == 0) & on_segment(q1x, q1y, p1x, p1y, q2x, q2y)
+    crosses |= (o4 == 0) & on_segment(q1x, q1y, p2x, p2y, q2x, q2y)
+    return overlaps & crosses